@@ -0,0 +1,147 @@
+"""Output reader benchmark: thread + readline() loop vs the shared asyncio runner
+
+A synthetic build prints UAT/UBT-like lines at a fixed rate. Each reader
+stores them in a LogBuffer and feeds them to a ProgressTracker, like a real
+build job does. A reader keeps up when it has everything shortly after the
+producer stops writing.
+
+    python benchmarks/bench_runner.py --rate 50000 --seconds 5 --builds 1
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugin_rebuilder.async_runner import run_command  # noqa: E402
+from plugin_rebuilder.log_buffer import LogBuffer  # noqa: E402
+from plugin_rebuilder.uat_parser import ProgressTracker  # noqa: E402
+
+# Writes rate lines/s for seconds, then records when it finished writing
+PRODUCER = r'''
+import sys, time
+rate, seconds, done_file, bad_bytes = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3], sys.argv[4] == "1"
+out = sys.stdout.buffer
+out.write(b'Running: dotnet "UnrealBuildTool.dll" UnrealGame Win64 Shipping -Project=x\n')
+total = int(rate * seconds)
+start = time.time()
+written = 0
+while written < total:
+    due = min(total, int((time.time() - start) * rate) + 1)
+    batch = []
+    for i in range(written, due):
+        if bad_bytes and i % 1000 == 999:
+            # Compiler message in a legacy code page, as MSVC prints with non-English locales
+            batch.append(f"Foo{i}.cpp(3): warning C4819: character \x92 not representable\n".encode("latin-1"))
+        elif i % 50 == 0:
+            batch.append(f"C:\\Plugin\\Source\\Foo{i}.cpp(12): warning C4996: 'x': deprecated\n".encode())
+        else:
+            batch.append(f"[{i % 1000 + 1}/1000] Compile [x64] Module.Plugin.{i}.cpp\n".encode())
+    out.write(b"".join(batch))
+    written = due
+    time.sleep(0.001)
+out.flush()
+with open(done_file, "w") as f:
+    f.write(repr(time.time()))
+'''
+
+
+def producer_command(rate, seconds, done_file, bad_bytes):
+    script = os.path.join(tempfile.gettempdir(), "bench_runner_producer.py")
+    with open(script, "w") as f:
+        f.write(PRODUCER)
+    return [sys.executable, script, str(rate), str(seconds), done_file, str(int(bad_bytes))]
+
+
+def consumer():
+    log = LogBuffer()
+    progress = ProgressTracker()
+    return log, progress
+
+
+def run_readline(command):
+    """The previous reader: text mode, bufsize=1, one readline() and append per line"""
+    log, progress = consumer()
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, bufsize=1
+    )
+    try:
+        for line in iter(process.stdout.readline, ''):
+            line = line.strip()
+            if line:
+                log.append(line)
+                progress.feed(line)
+    except UnicodeDecodeError as e:
+        process.kill()
+        process.wait()
+        return log.total_lines, f"crashed: {e.reason}"
+    process.wait()
+    return log.total_lines, None
+
+
+def run_async(command):
+    log, progress = consumer()
+
+    def on_lines(lines):
+        log.extend(lines)
+        for line in lines:
+            progress.feed(line)
+
+    run_command(command, on_lines)
+    return log.total_lines, None
+
+
+def bench(name, reader, rate, seconds, builds, bad_bytes=False):
+    done_files = [tempfile.mktemp(suffix=".done") for _ in range(builds)]
+    results = [None] * builds
+    finished = [None] * builds
+
+    def build(index):
+        results[index] = reader(producer_command(rate, seconds, done_files[index], bad_bytes))
+        finished[index] = time.time()
+
+    started = time.time()
+    cpu_started = time.process_time()
+    threads = [threading.Thread(target=build, args=(i,)) for i in range(builds)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lags = []
+    for index, done_file in enumerate(done_files):
+        if not os.path.exists(done_file):
+            continue  # Reader gave up and killed the producer
+        with open(done_file) as f:
+            lags.append(finished[index] - float(f.read()))
+        os.remove(done_file)
+    cpu = time.process_time() - cpu_started
+    lines = sum(count for count, _ in results)
+    errors = {error for _, error in results if error}
+    elapsed = max(finished) - started
+    lag = max(lags, default=0.0)
+    verdict = "; ".join(errors) if errors else "keeps up" if lag < 0.5 else "FALLS BEHIND"
+    print(
+        f"{name:10} {lines:>9} lines in {elapsed:6.2f}s  {lines / elapsed:>9.0f} lines/s  "
+        f"reader cpu {cpu / max(1, lines) * 1e6:5.2f} us/line  "
+        f"lag after producer finished {lag:6.2f}s  {verdict}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=50000, help="lines per second per build")
+    parser.add_argument("--seconds", type=float, default=5, help="how long each build prints")
+    parser.add_argument("--builds", type=int, default=1, help="concurrent builds")
+    parser.add_argument("--bad-bytes", action="store_true", help="mix in lines that are not valid in the locale encoding")
+    args = parser.parse_args()
+    print(f"{args.builds} build(s) x {args.rate} lines/s x {args.seconds}s on {os.cpu_count()} cores")
+    bench("readline", run_readline, args.rate, args.seconds, args.builds, args.bad_bytes)
+    bench("asyncio", run_async, args.rate, args.seconds, args.builds, args.bad_bytes)
+
+
+if __name__ == "__main__":
+    main()
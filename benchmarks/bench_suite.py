@@ -0,0 +1,285 @@
+"""End-to-end wrapper benchmarks against a simulated engine (no UE needed)
+
+Builds a fake engine with plugin_rebuilder.simulator and runs real BuildJobs
+through a BuildQueue, measuring what the wrapper adds on top of UAT:
+
+  headless   log throughput, display latency and memory of the CLI's JSON lines path
+  gui        the same through the GUI's path (LogFlusher into Flet Text controls,
+             job list redraws); Flet controls are only built when flet is installed
+  cancel     time from cancel to the whole process tree being gone, with
+             children that exit on SIGTERM and with ones that ignore it
+
+    python benchmarks/bench_suite.py                   # 1M lines per build
+    python benchmarks/bench_suite.py --lines 100000 --json results.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plugin_rebuilder.build_queue import RUNNING, BuildQueue  # noqa: E402
+from plugin_rebuilder.cli import BuildReporter, JsonLinesWriter  # noqa: E402
+from plugin_rebuilder.log_buffer import LogFlusher  # noqa: E402
+from plugin_rebuilder.process_tree import descendants, pid_alive  # noqa: E402
+from plugin_rebuilder.simulator import (  # noqa: E402
+    MARK_PREFIX, configure_fake_engine, create_fake_engine, create_fake_plugin,
+)
+
+try:
+    import flet as ft
+except ImportError:
+    ft = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Same as the GUI's terminal view and job list refresh
+TERMINAL_VIEW_LINES = 1000
+PROGRESS_REFRESH_SECONDS = 0.5
+MEMORY_SAMPLE_SECONDS = 0.1
+# Fields compared with --baseline: True when higher is better, and absolute noise allowed on top of --tolerance
+COMPARED = {"lines_per_second": (True, 0), "latency_p95_ms": (False, 20), "rss_peak_growth_mb": (False, 5),
+            "cancel_seconds": (False, 0.2)}
+
+
+def process_rss():
+    """Resident memory of this process in bytes"""
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+class MemorySampler:
+    def __init__(self):
+        self.start_rss = process_rss()
+        self.peak = self.start_rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(MEMORY_SAMPLE_SECONDS):
+            self.peak = max(self.peak, process_rss())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return {
+            "rss_start_mb": round(self.start_rss / 1024 ** 2, 1),
+            "rss_peak_growth_mb": round((self.peak - self.start_rss) / 1024 ** 2, 1),
+            "rss_end_growth_mb": round((process_rss() - self.start_rss) / 1024 ** 2, 1),
+        }
+
+
+class Latencies:
+    """Delay between the simulator writing a mark line and the wrapper showing it"""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def seen(self, lines, now=None):
+        now = now or time.time()
+        for line in lines:
+            if line.startswith(MARK_PREFIX):
+                with self._lock:
+                    self.samples.append(now - float(line[len(MARK_PREFIX):]))
+
+    def summary(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return {"marks_seen": 0}
+        return {
+            "marks_seen": len(samples),
+            "latency_p50_ms": round(statistics.median(samples) * 1000, 1),
+            "latency_p95_ms": round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1000, 1),
+            "latency_max_ms": round(samples[-1] * 1000, 1),
+        }
+
+
+class MarkStream:
+    """Stand-in for stdout that notices mark lines in the JSON events written to it"""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text)
+        if MARK_PREFIX in text:
+            self.latencies.seen([json.loads(text)["line"]])
+
+    def flush(self):
+        pass
+
+
+def wait_for(queue, timeout=None):
+    deadline = time.time() + timeout if timeout else None
+    while queue.active and (deadline is None or time.time() < deadline):
+        time.sleep(0.02)
+
+
+def build_result(job, started, memory, latencies):
+    elapsed = job.finished_at - started
+    return {
+        "status": job.status,
+        "lines": job.log.total_lines,
+        "seconds": round(elapsed, 2),
+        "lines_per_second": round(job.log.total_lines / elapsed),
+        "cpu_seconds": None,
+        **latencies.summary(),
+        **memory,
+    }
+
+
+def bench_headless(engine, plugin, out):
+    latencies = Latencies()
+    stream = MarkStream(latencies)
+    queue = BuildQueue(max_workers=1, on_job_update=BuildReporter(JsonLinesWriter(stream)).job_updated)
+    memory = MemorySampler()
+    cpu = time.process_time()
+    started = time.time()
+    job = queue.submit(plugin, engine, out)
+    wait_for(queue)
+    result = build_result(job, started, memory.stop(), latencies)
+    result["cpu_seconds"] = round(time.process_time() - cpu, 2)
+    result["json_mb"] = round(stream.bytes / 1024 ** 2, 1)
+    return result
+
+
+def bench_gui(engine, plugin, out):
+    """The GUI's data path without a window: flusher -> Text controls, plus periodic job redraws"""
+    latencies = Latencies()
+    view = []
+    redraws = []
+
+    def render(lines):
+        latencies.seen(lines)
+        if ft:
+            view.extend(ft.Text(line, selectable=True, size=12) for line in lines[-TERMINAL_VIEW_LINES:])
+        else:
+            view.extend(lines[-TERMINAL_VIEW_LINES:])
+        del view[:-TERMINAL_VIEW_LINES]
+
+    queue = BuildQueue(max_workers=1)
+    memory = MemorySampler()
+    cpu = time.process_time()
+    started = time.time()
+    job = queue.submit(plugin, engine, out)
+    flusher = LogFlusher(job.log, render).start()
+    while queue.active:
+        time.sleep(PROGRESS_REFRESH_SECONDS)
+        redraw = time.perf_counter()
+        if job.status == RUNNING:
+            job.progress.summary()
+            job.progress.fraction
+        redraws.append(time.perf_counter() - redraw)
+    flusher.stop()
+    result = build_result(job, started, memory.stop(), latencies)
+    result["cpu_seconds"] = round(time.process_time() - cpu, 2)
+    result["controls"] = "flet" if ft else "strings (flet not installed)"
+    result["redraw_max_ms"] = round(max(redraws, default=0) * 1000, 2)
+    return result
+
+
+def bench_cancel(engine, plugin, out, stubborn):
+    configure_fake_engine(engine, lines=None, rate=2000, children=3, child_depth=2, ignore_sigterm=stubborn,
+                          mark_every=0)
+    queue = BuildQueue(max_workers=1)
+    job = queue.submit(plugin, engine, out)
+    while job.status != RUNNING or not job.process or job.log.total_lines < 200:
+        time.sleep(0.01)
+    time.sleep(0.3)  # Let the child tree come up
+    tree = [job.process.pid, *descendants(job.process.pid)]
+    started = time.time()
+    queue.cancel(job.id)
+    wait_for(queue)
+    finished = time.time() - started
+    left = [pid for pid in tree if pid_alive(pid)]
+    return {
+        "children_ignore_sigterm": stubborn,
+        "processes": len(tree),
+        "status": job.status,
+        "cancel_seconds": round(finished, 2),
+        "report": job.cancel_report,
+        "processes_left": len(left),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for bench, values in results.items():
+        for field, (higher_is_better, slack) in COMPARED.items():
+            old, new = baseline.get(bench, {}).get(field), values.get(field)
+            if old is None or new is None:
+                continue
+            if higher_is_better:
+                worse = new < old * (1 - tolerance) - slack
+            else:
+                worse = new > old * (1 + tolerance) + slack
+            if worse:
+                found.append(f"{bench} {field}: {old} -> {new}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1000000, help="lines per simulated build")
+    parser.add_argument("--rate", type=int, default=0, help="lines per second (default: as fast as possible)")
+    parser.add_argument("--mark-every", type=int, default=1000, help="lines between latency marks")
+    parser.add_argument("--only", choices=["headless", "gui", "cancel"], action="append", help="run only these")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run; exit with 1 if anything got worse")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative change --baseline accepts")
+    parser.add_argument("--keep", action="store_true", help="keep the fake engine and packages afterwards")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="plugin-rebuilder-bench-")
+    engine = os.path.join(work, "UE_5.4")
+    plugin = create_fake_plugin(os.path.join(work, "plugins"))
+    create_fake_engine(engine, lines=args.lines, rate=args.rate, mark_every=args.mark_every)
+    print(f"{args.lines} lines per build, rate {args.rate or 'unlimited'}, {os.cpu_count()} cores, work dir {work}")
+
+    results = {}
+    only = args.only or ["headless", "gui", "cancel"]
+    if "headless" in only:
+        results["headless"] = bench_headless(engine, plugin, os.path.join(work, "out-headless"))
+        print("headless", json.dumps(results["headless"]))
+    if "gui" in only:
+        results["gui"] = bench_gui(engine, plugin, os.path.join(work, "out-gui"))
+        print("gui     ", json.dumps(results["gui"]))
+    if "cancel" in only:
+        results["cancel"] = bench_cancel(engine, plugin, os.path.join(work, "out-cancel"), stubborn=False)
+        print("cancel  ", json.dumps(results["cancel"]))
+        results["cancel_stubborn"] = bench_cancel(engine, plugin, os.path.join(work, "out-cancel"), stubborn=True)
+        print("cancel  ", json.dumps(results["cancel_stubborn"]))
+    if not args.keep:
+        shutil.rmtree(work, ignore_errors=True)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for regression in found:
+            print("REGRESSION", regression)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Build engine behind the unreal plugin rebuilder GUI
+
+Importing this package never loads Flet; the GUI lives in plugin_rebuilder.gui.
+"""
+
+from .build_queue import BuildJob, BuildQueue, build_command, validate_build_inputs
+from .log_buffer import LogBuffer, LogFlusher
+
+__all__ = ["BuildJob", "BuildQueue", "LogBuffer", "LogFlusher", "build_command", "validate_build_inputs"]
@@ -0,0 +1,491 @@
+"""Build agents: run plugin builds on other machines
+
+An agent is a small HTTP server wrapping a local BuildQueue. The tool sends
+it a zip of the plugin sources, the engine version and the UAT arguments,
+streams the log back by polling, and downloads the packaged plugin as a zip
+when the build is done:
+
+    GET    /status                   engines, job slots and load
+    POST   /jobs?engine=&plugin=&arg= plugin zip as body, returns {"id"}
+    GET    /jobs/<id>                status
+    GET    /jobs/<id>/log?offset=&wait= lines from offset on (long poll)
+    GET    /jobs/<id>/output         packaged plugin as zip
+    DELETE /jobs/<id>                cancel, or forget a finished job
+
+Agents run whatever code the uploaded plugin compiles, so only expose them
+to machines you trust: an agent listening on anything but loopback refuses
+to start without a token, and UAT arguments from clients must be plain
+-Switch or -Name=Value options (no paths, no -Plugin/-Package overrides).
+"""
+import hmac
+import ipaddress
+import json
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .build_cache import engine_version
+from .build_queue import FINISHED_STATES, BuildJob, BuildQueue
+from .commands import format_command
+from .engines import EngineRegistry
+from .fileops import clear_directory
+from .host import cpu_count, max_parallel_builds
+from .path_cache import DATA_DIR
+from .scheduler import ResourceScheduler
+
+AGENT_DIR = os.path.join(DATA_DIR, "agent")
+DEFAULT_PORT = 8765
+TOKEN_HEADER = "X-Agent-Token"
+# Plugin folders that are build products, never sent to an agent
+EXCLUDED_DIRS = {"Binaries", "Intermediate", "Saved", ".git", ".vs"}
+# Longest a log request waits for new lines
+LOG_POLL_SECONDS = 1.0
+# Lines per log response, keeps responses small when a client catches up
+LOG_BATCH_LINES = 5000
+COPY_CHUNK = 1024 * 1024
+# UAT arguments a client may send: -Switch or -Name=Value, values without path separators or spaces
+AGENT_ARG = re.compile(r"-[A-Za-z][A-Za-z0-9_]*(=[A-Za-z0-9_.+,-]*)?")
+# Set by the agent itself
+RESERVED_ARGS = {"plugin", "package", "project"}
+
+
+def check_agent_args(args):
+    """Raise ValueError unless every UAT argument from a client is a plain option the agent may pass on"""
+    for arg in args:
+        if not AGENT_ARG.fullmatch(arg):
+            raise ValueError(f"UAT argument not allowed on an agent: {arg}")
+        if arg[1:].split("=", 1)[0].lower() in RESERVED_ARGS:
+            raise ValueError(f"UAT argument is set by the agent: {arg}")
+    return list(args)
+
+
+def is_loopback(host):
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # A host name, which may well resolve to a public interface
+
+
+def zip_directory(source, archive, exclude_dirs=()):
+    """Write source's files into archive (deflated), skipping folders named in exclude_dirs"""
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for root, dirs, files in os.walk(source):
+            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+            for name in files:
+                path = os.path.join(root, name)
+                zf.write(path, os.path.relpath(path, source))
+
+
+def extract_archive(archive, destination):
+    """Extract a zip, refusing entries that would land outside destination"""
+    destination = os.path.abspath(destination)
+    with zipfile.ZipFile(archive) as zf:
+        for member in zf.namelist():
+            target = os.path.abspath(os.path.join(destination, member))
+            if os.path.commonpath([destination, target]) != destination:
+                raise ValueError(f"Archive entry escapes the destination: {member}")
+        zf.extractall(destination)
+
+
+def _engine_series(engine):
+    """'5.4' for an engine root (patch releases are binary compatible), or engine itself if it's a version"""
+    version = engine_version(engine) if os.path.isdir(engine) else None
+    if version:
+        return f"{version.get('MajorVersion')}.{version.get('MinorVersion')}"
+    return engine
+
+
+class BuildAgent:
+    """Runs builds submitted over HTTP with a local BuildQueue"""
+
+    def __init__(self, work_dir=AGENT_DIR, max_jobs=None, engines=(), token=None):
+        self.work_dir = work_dir
+        self.token = token
+        self.registry = EngineRegistry()
+        self.registry.discover(engines)
+        self.queue = BuildQueue(
+            max_workers=max_jobs or max_parallel_builds(),
+            log_dir=os.path.join(work_dir, "logs"),
+            scheduler=ResourceScheduler(),
+        )
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def status(self):
+        counts = self.queue.counts()
+        return {
+            "host": socket.gethostname(),
+            "engines": sorted({engine.version for engine in self.registry.engines if engine.has_uat and engine.version}),
+            "max_jobs": self.queue.max_workers,
+            "running": counts.get("running", 0),
+            "queued": counts.get("queued", 0),
+            "cores": cpu_count(),
+        }
+
+    def submit(self, archive, engine, plugin, args):
+        """Unpack a plugin archive and queue its build; returns the job"""
+        args = check_agent_args(args)
+        match = self.registry.find(engine)
+        if not match or not match.has_uat:
+            raise LookupError(f"No engine {engine} on this agent")
+        job_dir = tempfile.mkdtemp(prefix="job-", dir=self.work_dir)
+        source = os.path.join(job_dir, "src")
+        extract_archive(archive, source)
+        plugin_path = os.path.abspath(os.path.join(source, plugin))
+        if os.path.commonpath([source, plugin_path]) != source or not os.path.isfile(plugin_path):
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise LookupError(f"Plugin file not in archive: {plugin}")
+        job = self.queue.submit(plugin_path, match.root, os.path.join(job_dir, "package"), extra_args=args)
+        job.work_dir = job_dir
+        with self._lock:
+            self.jobs[job.id] = job
+        return job
+
+    def forget(self, job):
+        with self._lock:
+            self.jobs.pop(job.id, None)
+        self.queue.clear_finished()
+        shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """HTTP server for this agent (call serve_forever on it); refuses to listen beyond loopback without a token"""
+        if not self.token and not is_loopback(host):
+            raise ValueError(f"An agent listening on {host} needs a token, set --token or $UE_PLUGIN_REBUILDER_AGENT_TOKEN")
+        os.makedirs(self.work_dir, exist_ok=True)
+        server = ThreadingHTTPServer((host, port), AgentRequestHandler)
+        server.daemon_threads = True
+        server.agent = self
+        return server
+
+
+def job_status(job):
+    return {
+        "id": job.id,
+        "status": job.status,
+        "returncode": job.returncode,
+        "elapsed": round(job.elapsed, 3),
+        "lines": job.log.total_lines,
+        "errors": job.progress.errors,
+        "warnings": job.progress.warnings,
+        "peak_rss": job.peak_rss,
+        "error": job.error,
+    }
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front of a BuildAgent (self.server.agent)"""
+
+    def log_message(self, format, *args):
+        pass  # Requests are polled constantly; keep the console for errors
+
+    def _send_json(self, data, code=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, message):
+        self._send_json({"error": message}, code)
+
+    def _route(self):
+        """(agent, path parts, query) after checking the token, or None if answered"""
+        agent = self.server.agent
+        if agent.token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), agent.token):
+            self._error(403, "Bad or missing agent token")
+            return None
+        url = urllib.parse.urlsplit(self.path)
+        return agent, [part for part in url.path.split("/") if part], urllib.parse.parse_qs(url.query)
+
+    def _job(self, agent, parts):
+        try:
+            job = agent.jobs.get(int(parts[1]))
+        except (IndexError, ValueError):
+            job = None
+        if not job:
+            self._error(404, "No such job")
+        return job
+
+    def do_GET(self):
+        route = self._route()
+        if not route:
+            return
+        agent, parts, query = route
+        if parts == ["status"]:
+            return self._send_json(agent.status())
+        if not parts or parts[0] != "jobs":
+            return self._error(404, "Not found")
+        job = self._job(agent, parts)
+        if not job:
+            return
+        if len(parts) == 2:
+            return self._send_json(job_status(job))
+        if parts[2] == "log":
+            try:
+                offset = int(query.get("offset", ["0"])[0])
+                wait = float(query.get("wait", ["0"])[0])
+            except ValueError:
+                return self._error(400, "offset and wait must be numbers")
+            return self._send_log(job, max(0, offset), wait)
+        if parts[2] == "output":
+            return self._send_output(job)
+        self._error(404, "Not found")
+
+    def _send_log(self, job, offset, wait):
+        deadline = time.time() + min(wait, LOG_POLL_SECONDS)
+        while job.log.total_lines <= offset and not job.finished and time.time() < deadline:
+            time.sleep(0.05)
+        finished = job.finished  # Read before the lines so none are missed
+        lines, total = job.log.since(offset)
+        batch = lines[:LOG_BATCH_LINES]
+        next_offset = total - len(lines) + len(batch)
+        self._send_json({
+            "lines": batch,
+            "next": next_offset,
+            "finished": finished and next_offset >= total,
+        })
+
+    def _send_output(self, job):
+        if not job.finished:
+            return self._error(409, "Job is still running")
+        if not os.path.isdir(job.package_dir):
+            return self._error(404, "Job produced no output")
+        archive = os.path.join(job.work_dir, "output.zip")
+        if not os.path.exists(archive):
+            zip_directory(job.package_dir, archive + ".tmp")
+            os.replace(archive + ".tmp", archive)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(os.path.getsize(archive)))
+        self.end_headers()
+        with open(archive, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, COPY_CHUNK)
+
+    def do_POST(self):
+        route = self._route()
+        if not route:
+            return
+        agent, parts, query = route
+        if parts != ["jobs"]:
+            return self._error(404, "Not found")
+        engine = query.get("engine", [None])[0]
+        plugin = query.get("plugin", [None])[0]
+        if not engine or not plugin:
+            return self._error(400, "engine and plugin are required")
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            length = -1
+        if length < 0:
+            return self._error(400, "Content-Length must be the size of the plugin archive")
+        with tempfile.TemporaryFile() as archive:
+            remaining = length
+            while remaining:
+                chunk = self.rfile.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    return self._error(400, "Upload ended early")
+                archive.write(chunk)
+                remaining -= len(chunk)
+            archive.seek(0)
+            try:
+                job = agent.submit(archive, engine, plugin, query.get("arg", []))
+            except (LookupError, ValueError, zipfile.BadZipFile) as e:
+                return self._error(400, str(e))
+        self._send_json({"id": job.id}, 201)
+
+    def do_DELETE(self):
+        route = self._route()
+        if not route:
+            return
+        agent, parts, _ = route
+        if len(parts) != 2 or parts[0] != "jobs":
+            return self._error(404, "Not found")
+        job = self._job(agent, parts)
+        if not job:
+            return
+        if job.finished:
+            agent.forget(job)
+        else:
+            agent.queue.cancel(job.id)
+        self._send_json(job_status(job))
+
+
+class AgentClient:
+    """HTTP client for one build agent"""
+
+    def __init__(self, url, token=None, timeout=30):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method, path, data=None, headers=None, timeout=None):
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers=dict(headers or {}))
+        if self.token:
+            request.add_header(TOKEN_HEADER, self.token)
+        try:
+            return urllib.request.urlopen(request, timeout=timeout or self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error")
+            except ValueError:
+                message = None
+            raise RuntimeError(f"Agent {self.url}: {message or e}") from None
+
+    def _json(self, method, path, **kwargs):
+        with self._request(method, path, **kwargs) as response:
+            return json.loads(response.read())
+
+    def status(self, timeout=None):
+        return self._json("GET", "/status", timeout=timeout)
+
+    def submit(self, archive, engine, plugin, args=()):
+        """Upload a plugin zip and queue its build; returns the remote job id"""
+        query = urllib.parse.urlencode([("engine", engine), ("plugin", plugin), *(("arg", arg) for arg in args)])
+        with open(archive, 'rb') as f:
+            headers = {"Content-Type": "application/zip", "Content-Length": str(os.path.getsize(archive))}
+            return self._json("POST", f"/jobs?{query}", data=f, headers=headers)["id"]
+
+    def job(self, job_id):
+        return self._json("GET", f"/jobs/{job_id}")
+
+    def log(self, job_id, offset, wait=LOG_POLL_SECONDS):
+        return self._json("GET", f"/jobs/{job_id}/log?offset={offset}&wait={wait}")
+
+    def download(self, job_id, archive):
+        with self._request("GET", f"/jobs/{job_id}/output") as response, open(archive, 'wb') as f:
+            shutil.copyfileobj(response, f, COPY_CHUNK)
+
+    def delete(self, job_id):
+        return self._json("DELETE", f"/jobs/{job_id}")
+
+
+class AgentPool:
+    """The agents a queue may place builds on"""
+
+    def __init__(self, urls, token=None):
+        self.clients = [AgentClient(url, token) for url in urls]
+        # Why each agent was unreachable at the last check
+        self.errors = {}
+        # Builds placed on an agent that its status may not show yet
+        self._placing = {client.url: 0 for client in self.clients}
+        self._lock = threading.Lock()
+
+    def statuses(self, timeout=3):
+        """{client: status} of every reachable agent, asked in parallel"""
+        def ask(client):
+            try:
+                status = client.status(timeout=timeout)
+            except (OSError, RuntimeError, ValueError) as e:
+                self.errors[client.url] = str(e)
+                return client, None
+            self.errors.pop(client.url, None)
+            return client, status
+
+        with ThreadPoolExecutor(max_workers=len(self.clients) or 1) as pool:
+            return {client: status for client, status in pool.map(ask, self.clients) if status}
+
+    def capacity(self):
+        """Total build slots of the reachable agents"""
+        return sum(status["max_jobs"] for status in self.statuses().values())
+
+    def pick(self, engine):
+        """Least loaded agent that has engine (a version such as 5.4); call placed() once submitted"""
+        candidates = []
+        for client, status in self.statuses().items():
+            if not any(version.split(".")[:len(engine.split("."))] == engine.split(".") for version in status["engines"]):
+                continue
+            candidates.append((client, status))
+        if not candidates:
+            raise RuntimeError(f"No reachable build agent has UE {engine}")
+        with self._lock:
+            client, _ = min(
+                candidates,
+                key=lambda item: (item[1]["running"] + item[1]["queued"] + self._placing[item[0].url]) / max(1, item[1]["max_jobs"]),
+            )
+            self._placing[client.url] += 1
+        return client
+
+    def placed(self, client):
+        with self._lock:
+            self._placing[client.url] -= 1
+
+
+class RemoteBuildJob(BuildJob):
+    """A BuildJob whose UAT run happens on a build agent
+
+    The log is streamed back and parsed locally, so progress, history and the
+    build cache work the same as for local builds.
+    """
+
+    def __init__(self, plugin, engine, package_dir, agents, **kwargs):
+        super().__init__(plugin, engine, package_dir, **kwargs)
+        self.agents = agents
+        self.agent = None
+        self.remote_id = None
+        self.engine_series = _engine_series(engine)
+        self.command = format_command(["BuildPlugin", f"-Plugin={plugin}", *self.extra_args]) + f" on a UE {self.engine_series} agent"
+
+    @property
+    def runs_locally(self):
+        return False
+
+    def cancel(self):
+        # Noticed by the log polling loop within LOG_POLL_SECONDS
+        self.cancel_requested = True
+
+    def _build(self):
+        staging = tempfile.mkdtemp(prefix="remote-build-")
+        try:
+            archive = os.path.join(staging, "plugin.zip")
+            plugin_dir = os.path.dirname(os.path.abspath(self.plugin))
+            zip_directory(plugin_dir, archive, EXCLUDED_DIRS)
+            client = self.agents.pick(self.engine_series)
+            try:
+                self.remote_id = client.submit(archive, self.engine_series, os.path.basename(self.plugin), self.extra_args)
+            finally:
+                self.agents.placed(client)
+            self.agent = client.url
+            self.log.append(f"Building on agent {client.url} (job {self.remote_id}), archive {os.path.getsize(archive) / 1024 ** 2:.1f} MB")
+
+            offset = 0
+            cancel_sent = False
+            while True:
+                if self.cancel_requested and not cancel_sent:
+                    client.delete(self.remote_id)
+                    cancel_sent = True
+                reply = client.log(self.remote_id, offset)
+                for line in reply["lines"]:
+                    self.log.append(line)
+                    self.progress.feed(line)
+                offset = reply["next"]
+                if reply["finished"]:
+                    break
+
+            status = client.job(self.remote_id)
+            self.peak_rss = status.get("peak_rss")
+            if status["status"] not in FINISHED_STATES:
+                raise RuntimeError(f"Agent reported job {self.remote_id} as {status['status']} after its log ended")
+            if status["returncode"] == 0 and not self.cancel_requested:
+                output = os.path.join(staging, "output.zip")
+                client.download(self.remote_id, output)
+                clear_directory(self.package_dir)
+                extract_archive(output, self.package_dir)
+                self.log.append(f"Downloaded packaged plugin ({os.path.getsize(output) / 1024 ** 2:.1f} MB)")
+            client.delete(self.remote_id)
+            return status["returncode"]
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
@@ -0,0 +1,145 @@
+"""Runs build processes on one shared asyncio event loop
+
+Every build's output is read on a single background loop instead of a
+thread per build blocking in readline(). Output is read in large chunks,
+decoded incrementally (undecodable bytes become U+FFFD) and split into
+lines, which are handed to the consumer in batches. The batches go through
+a small bounded queue: when a consumer falls behind, reading pauses, the
+pipe fills up and the build itself is slowed down instead of memory growing
+without limit.
+
+Consumers run on the loop thread, so they must not block (LogBuffer and
+ProgressTracker only take short locks). Everything they do is shared by
+all running builds: a LogBuffer compressing a block into its archive or the
+CLI writing JSON events to a slow pipe holds up output reading for every
+concurrent build until it returns. That cost is small per batch, so it stays
+on the loop rather than paying a thread hop each time; a sink that can stall
+for long must hand its work to a thread of its own.
+"""
+import asyncio
+import codecs
+import locale
+import subprocess
+import threading
+
+from .instrumentation import OUTPUT_BATCHES, OUTPUT_LINES, OUTPUT_READS_PAUSED, metrics
+from .process_tree import kill_tree, popen_group_kwargs
+
+# Bytes per read from a build's stdout
+READ_CHUNK = 64 * 1024
+# Line batches buffered per build before reading pauses
+MAX_PENDING_BATCHES = 32
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """The shared event loop, started on a daemon thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="build-output-loop", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+class ProcessHandle:
+    """Popen-like view of an asyncio subprocess for use from other threads"""
+
+    def __init__(self, process):
+        self._process = process
+        self.pid = process.pid
+
+    @property
+    def returncode(self):
+        return self._process.returncode
+
+    @property
+    def _handle(self):
+        # Windows process handle, used to put the build into a job object
+        return self._process._transport.get_extra_info("subprocess")._handle
+
+    def poll(self):
+        return self._process.returncode
+
+
+class LineSplitter:
+    """Incremental bytes -> lines decoder tolerant of bad bytes and split characters"""
+
+    def __init__(self, encoding=None):
+        self._decoder = codecs.getincrementaldecoder(encoding or locale.getpreferredencoding(False))(errors="replace")
+        self._partial = ""
+
+    def feed(self, data, final=False):
+        """Complete lines (stripped, blank ones dropped) contained in data"""
+        text = self._partial + self._decoder.decode(data, final)
+        lines = text.split("\n")
+        self._partial = "" if final else lines.pop()
+        return [line for line in (line.strip() for line in lines) if line]
+
+
+async def _read_output(stream, queue, encoding):
+    splitter = LineSplitter(encoding)
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        lines = splitter.feed(chunk, final=not chunk)
+        if lines:
+            if queue.full():
+                metrics.count(OUTPUT_READS_PAUSED)
+            await queue.put(lines)  # Waits while the consumer is behind
+        if not chunk:
+            break
+    await queue.put(None)
+
+
+async def _consume(queue, on_lines):
+    while True:
+        lines = await queue.get()
+        if lines is None:
+            break
+        # Consumers only buffer and parse; a thread hop per batch costs more than it saves
+        if metrics.enabled:
+            metrics.count(OUTPUT_BATCHES)
+            metrics.count(OUTPUT_LINES, len(lines))
+            with metrics.timer("output_consume"):
+                on_lines(lines)
+        else:
+            on_lines(lines)
+
+
+async def _run(argv, on_lines, on_started, encoding, popen_kwargs):
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        **popen_kwargs,
+    )
+    reader = None
+    try:
+        on_started(ProcessHandle(process))
+        queue = asyncio.Queue(maxsize=MAX_PENDING_BATCHES)
+        reader = asyncio.ensure_future(_read_output(process.stdout, queue, encoding))
+        await asyncio.gather(reader, _consume(queue, on_lines))
+    except BaseException:
+        # The whole group: UBT, dotnet and the compilers would otherwise outlive RunUAT unreaped
+        kill_tree(process.pid)
+        if reader and not reader.done():
+            # A failed consumer leaves the reader waiting on a full queue for good
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+        raise
+    return await process.wait()
+
+
+def run_command(argv, on_lines, on_started=lambda handle: None, encoding=None):
+    """Run a program (argv list, no shell) on the shared loop, blocking the calling thread until it exits
+
+    on_lines(list of lines) is called with batches of output lines, in order,
+    and on_started(handle) once the process exists. Returns the exit code.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        _run(argv, on_lines, on_started, encoding, popen_group_kwargs()), get_loop()
+    )
+    return future.result()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .file_index import plugin_tree_hash
+from .fileops import COPY, REFLINK, clear_directory, link_tree, tree_size
+from .instrumentation import metrics
+from .path_cache import DATA_DIR, FileLock
+
+# Packaged outputs of successful builds, keyed by their inputs
+CACHE_DIR = os.path.join(DATA_DIR, "build_cache")
+DEFAULT_MAX_SIZE = 20 * 1024 ** 3
+
+INDEX_FILE = "index.json"
+# Restores link files while holding the index lock, which can take a while on a slow disk
+INDEX_LOCK_TIMEOUT = 120
+# Never hardlinks: package folders are written in place by builds and deploys
+# hardlink them into projects, so a shared inode would let any of them change
+# the cached build for every later hit. Reflinks are copy-on-write.
+CACHE_LINK_METHODS = (REFLINK, COPY)
+
+
+def engine_version(engine):
+    """Contents of Engine/Build/Build.version, or None if it can't be read"""
+    try:
+        with open(os.path.join(engine, "Engine", "Build", "Build.version"), 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return None
+
+
+def engine_version_string(engine):
+    """Engine version such as '5.4.2', or None if Build.version is missing"""
+    version = engine_version(engine)
+    if not version:
+        return None
+    return f"{version.get('MajorVersion')}.{version.get('MinorVersion')}.{version.get('PatchVersion')}"
+
+
+def cache_key(plugin, engine, uat_args, tree_hash=None):
+    """Key identifying one build: plugin contents, engine version, UAT arguments and host"""
+    inputs = {
+        "plugin": tree_hash or plugin_tree_hash(plugin),
+        "engine": engine_version(engine) or os.path.normcase(os.path.abspath(engine)),
+        "args": list(uat_args),
+        "host": sys.platform,
+    }
+    return hashlib.blake2b(json.dumps(inputs, sort_keys=True).encode("utf-8"), digest_size=20).hexdigest()
+
+
+class BuildCache:
+    """Directory of packaged plugins with an LRU size limit
+
+    The index is shared with every other instance of the tool using the same
+    folder: each operation takes the file lock and re-reads it first, so an
+    entry evicted or cleared elsewhere is never reported as a hit here.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.root = root
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), 'r') as f:
+                index = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            index = {}
+        # Drop entries whose folder went missing
+        return {key: entry for key, entry in index.items() if os.path.isdir(self._entry_dir(key))}
+
+    @metrics.timed("build_cache_index_save")
+    def _save_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    @contextmanager
+    def _shared_index(self, save=True):
+        """Hold the thread and file locks with self.index reloaded from disk"""
+        with self._lock, FileLock(os.path.join(self.root, INDEX_FILE), timeout=INDEX_LOCK_TIMEOUT):
+            self.index = self._load_index()
+            yield self.index
+            if save:
+                self._save_index()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    @property
+    def total_size(self):
+        return sum(entry["size"] for entry in self.index.values())
+
+    def lookup(self, key):
+        """Cache entry for key, or None"""
+        with self._shared_index(save=False) as index:
+            return index.get(key)
+
+    def restore(self, key, package_dir):
+        """Replace package_dir with the cached output for key; returns {method: file count}
+
+        Returns None on a miss, including an entry whose folder went missing
+        or turned out to be empty.
+        """
+        with self._shared_index() as index:
+            entry = index.get(key)
+            if not entry:
+                return None
+            clear_directory(package_dir)
+            counts = link_tree(self._entry_dir(key), package_dir, CACHE_LINK_METHODS)
+            if not sum(counts.values()):
+                del index[key]
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                return None
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+        return counts
+
+    def store(self, key, package_dir, **metadata):
+        """Add a successful build's package_dir to the cache and evict old entries"""
+        staging = self._entry_dir(key) + f".tmp{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        link_tree(package_dir, staging, CACHE_LINK_METHODS)
+        size = tree_size(staging)
+        with self._shared_index() as index:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            os.replace(staging, self._entry_dir(key))
+            now = time.time()
+            index[key] = {"size": size, "created": now, "last_used": now, "hits": 0, **metadata}
+            self._evict()
+
+    def remove(self, key):
+        with self._shared_index() as index:
+            if index.pop(key, None) is not None:
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def clear(self):
+        with self._shared_index() as index:
+            for key in list(index):
+                del index[key]
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_size"""
+        total = self.total_size
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_size:
+                break
+            total -= entry["size"]
+            del self.index[key]
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
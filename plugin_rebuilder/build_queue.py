@@ -0,0 +1,474 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .async_runner import run_command
+from .build_cache import cache_key, engine_version_string
+from .commands import format_command, uat_command, uat_script
+from .file_index import FileIndex
+from .history import job_record
+from .log_archive import archive_suffix
+from .host import max_parallel_builds
+from .instrumentation import metrics
+from .log_buffer import LogBuffer
+from .process_tree import JobObject, PeakRssSampler, TreeTerminator
+from .scheduler import set_tree_affinity
+from .uat_parser import ProgressTracker, expected_phase_count
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Job objects, affinity and memory samplers are set up here rather than on the output loop, where walking
+# a process tree would hold up every build's reader; one thread keeps budgets applied in order
+_process_setup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="build-process-setup")
+
+
+def plugin_name(plugin):
+    """Plugin name as UAT sees it (the .uplugin file name without extension)"""
+    return os.path.splitext(os.path.basename(plugin))[0]
+
+
+def engine_label(engine):
+    """Short label for an engine root, e.g. UE_5.4"""
+    return os.path.basename(os.path.normpath(engine))
+
+
+def build_command(engine, plugin, package_dir, extra_args=()):
+    """UAT BuildPlugin argv for one plugin/engine pair (run without a shell)"""
+    return uat_command(engine, plugin, package_dir, extra_args)
+
+
+def validate_build_inputs(plugin, engine, destination, local_engine=True, extra_args=()):
+    """Return a list of problems with the given build inputs (empty when valid)
+
+    With local_engine=False the engine may be a version built by a remote agent.
+    extra_args are the UAT arguments; on Windows they and the paths must be
+    safe to pass to RunUAT.bat.
+    """
+    errors = []
+    if not engine:
+        errors.append("Please select a valid UE root folder")
+    elif not os.path.isdir(engine):
+        if local_engine:
+            errors.append(f"UE root folder not found: {engine}")
+    elif not os.path.isfile(uat_script(engine)):
+        errors.append(f"RunUAT not found, is this a UE root folder? {uat_script(engine)}")
+    if not plugin:
+        errors.append("Please select a valid .uplugin file")
+    elif not plugin.lower().endswith(".uplugin") or not os.path.isfile(plugin):
+        errors.append(f"Plugin file not found: {plugin}")
+    if not destination:
+        errors.append("Please select a valid destination folder")
+    if not errors and os.path.isdir(engine):
+        try:
+            build_command(engine, plugin, destination, extra_args)
+        except ValueError as e:
+            errors.append(str(e))
+    return errors
+
+
+class BuildJob:
+    """One plugin/engine build with its own process, log and status"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, plugin, engine, package_dir, log_dir=None, extra_args=(), cache=None, history=None,
+                 deployer=None, notes=()):
+        self.id = next(self._ids)
+        self.plugin = plugin
+        self.engine = engine
+        self.package_dir = package_dir
+        self.extra_args = list(extra_args)
+        self.argv = build_command(engine, plugin, package_dir, self.extra_args)
+        self.command = format_command(self.argv)
+        self.cache = cache
+        self.cache_key = None
+        self.cache_hit = False
+        self.history = history
+        self.deployer = deployer
+        self.deploy_results = None
+        self.history_record = None
+        self.regression = None
+        self.peak_rss = None
+        self.budget = None
+        self.status = QUEUED
+        self.returncode = None
+        self.error = None
+        self.process = None
+        self.cancel_report = None
+        self._job_object = None
+        self._terminator = None
+        self._rss_sampler = None
+        self._setup = None
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.progress = ProgressTracker(expected_phase_count(self.uat_args))
+        log_path = None
+        if log_dir:
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            # Job ids restart in every process, the pid keeps CLI, agent and GUI runs in the same second apart
+            log_path = os.path.join(log_dir, f"{plugin_name(plugin)}-{engine_label(engine)}-{stamp}-{os.getpid()}-{self.id}"
+                                             f"{archive_suffix()}")
+        self.log = LogBuffer(log_path=log_path)
+        # Pre-flight warnings and the like go ahead of everything the build logs
+        self.log.extend(notes)
+
+    @property
+    def label(self):
+        return f"{plugin_name(self.plugin)} @ {engine_label(self.engine)}"
+
+    @property
+    def uat_args(self):
+        """UAT arguments that affect the output (paths excluded)"""
+        return ["BuildPlugin", *self.extra_args]
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def runs_locally(self):
+        return True
+
+    @property
+    def elapsed(self):
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def cancel(self):
+        """Ask the job to stop without blocking
+
+        A running build has its whole process tree (UAT, UBT, compilers, ...)
+        signalled to exit, and force-killed in the background if it doesn't.
+        """
+        self.cancel_requested = True
+        process = self.process
+        if process and process.poll() is None and self._terminator is None:
+            self.log.append("Stopping rebuild...")
+            self._terminator = TreeTerminator(process, self._job_object, on_done=self._tree_stopped).start()
+
+    def _tree_stopped(self, report):
+        if report["error"]:
+            self.log.append(f"Error stopping process: {report['error']}")
+        self.log.append(
+            f"Stopped {report['reaped']} processes that had used {report['cpu_seconds']:.1f}s of CPU time "
+            f"in {report['seconds']:.1f}s" + (" (had to force kill)" if report["forced"] else "")
+        )
+
+    def apply_budget(self, budget):
+        """Limit the build to budget's cores, now if it is running, else once it starts"""
+        previous, self.budget = self.budget, budget
+        if previous is None or previous.cpus != budget.cpus:
+            self.log.append(f"Resource budget: {budget.describe()}")
+        if self.process:
+            _process_setup.submit(self._enforce_budget)
+
+    def _enforce_budget(self):
+        process, budget = self.process, self.budget
+        if not process or not budget or process.poll() is not None:
+            return
+        try:
+            # UBT sizes its executor from the cores it may run on, children inherit the limit
+            set_tree_affinity(process.pid, budget.cpus, self._job_object)
+        except OSError as e:
+            self.log.append(f"Could not apply resource budget: {str(e)}")
+
+    def _restore_from_cache(self):
+        """Restore the packaged output from the build cache; False on a miss"""
+        started = time.time()
+        try:
+            index = FileIndex(self.plugin)
+            tree_hash = index.update()
+            self.cache_key = cache_key(self.plugin, self.engine, self.uat_args, tree_hash=tree_hash)
+        except OSError as e:
+            self.log.append(f"Build cache disabled for this job, can't hash plugin: {str(e)}")
+            return False
+        self.log.append(index.summary())
+        self.log.append(f"Build cache key {self.cache_key}")
+        if self.cache.lookup(self.cache_key) is None:
+            self.log.append("Build cache miss, rebuilding")
+            return False
+        try:
+            counts = self.cache.restore(self.cache_key, self.package_dir)
+        except OSError as e:
+            self.log.append(f"Could not restore from build cache, rebuilding: {str(e)}")
+            return False
+        if counts is None:
+            self.log.append("Build cache entry is gone or empty, rebuilding")
+            return False
+        self.cache_hit = True
+        methods = ", ".join(f"{count} {method}" for method, count in counts.items())
+        self.log.append("=" * 50)
+        self.log.append(f"Success: Restored packaged plugin from build cache in {time.time() - started:.2f}s ({methods})")
+        return True
+
+    def _store_in_cache(self):
+        try:
+            self.cache.store(
+                self.cache_key,
+                self.package_dir,
+                plugin=self.plugin,
+                engine=self.engine,
+                build_seconds=round(self.elapsed, 1),
+            )
+            self.log.append("Packaged output stored in build cache")
+        except OSError as e:
+            self.log.append(f"Could not store packaged output in build cache: {str(e)}")
+
+    def _record_history(self):
+        try:
+            self.history_record = job_record(self, engine_version_string(self.engine))
+            self.regression = self.history.check_regression(self.history_record)
+            self.history.append(self.history_record)
+        except (OSError, ValueError) as e:
+            self.log.append(f"Could not record build timing: {str(e)}")
+            return
+        if self.regression is not None:
+            self.log.append(
+                f"Warning: this build took {self.regression * 100:.0f}% longer than the median of its recent builds"
+            )
+
+    def _process_started(self, process):
+        """Called on the output loop: only records the process, the rest is set up off the loop"""
+        self.process = process
+        self._setup = _process_setup.submit(self._setup_process, process)
+
+    def _setup_process(self, process):
+        self._job_object = JobObject.for_process(process)
+        self._enforce_budget()
+        self._rss_sampler = PeakRssSampler(process.pid).start()
+        if self.cancel_requested:
+            # Cancelled while the process was being spawned
+            self.cancel()
+
+    def _finish_setup(self):
+        """Wait for _setup_process of the last process, so its sampler can be stopped"""
+        setup, self._setup = self._setup, None
+        if setup:
+            try:
+                setup.result()
+            except Exception as e:
+                self.log.append(f"Could not set up build process monitoring: {str(e)}")
+
+    def _output(self, lines):
+        self.log.extend(lines)
+        feed = self.progress.feed
+        for line in lines:
+            feed(line)
+
+    def _build(self):
+        """Run UAT, streaming its output into the log; returns its exit code"""
+        try:
+            returncode = run_command(self.argv, self._output, self._process_started)
+        finally:
+            self._finish_setup()
+            if self._rss_sampler:
+                self.peak_rss = self._rss_sampler.stop()
+        if self._terminator:
+            self.cancel_report = self._terminator.join()
+        return returncode
+
+    def _deploy(self):
+        """Sync the packaged plugin into the deploy targets; a failed deploy doesn't fail the build"""
+        try:
+            self.deploy_results = self.deployer.deploy(self.package_dir, plugin_name(self.plugin), self.engine,
+                                                       self.log.append, source_plugin=self.plugin)
+        except Exception as e:
+            self.log.append(f"Error: Deploy failed: {str(e)}")
+
+    def run(self):
+        """Run the build to completion in the calling thread"""
+        self.status = RUNNING
+        self.started_at = time.time()
+        self.progress.started = self.started_at
+        self.log.append("Starting plugin rebuild...")
+        self.log.append(f"Command: {self.command}")
+        self.log.append("=" * 50)
+        try:
+            if self.cache and self._restore_from_cache():
+                self.returncode = 0
+                self.status = SUCCEEDED
+                if self.deployer:
+                    self._deploy()
+                return
+            self.returncode = self._build()
+
+            self.log.append("=" * 50)
+            self.log.append(f"{self.progress.errors} errors, {self.progress.warnings} warnings")
+            if self.cancel_requested:
+                self.log.append("Rebuild stopped by user")
+                self.status = CANCELLED
+            elif self.returncode == 0:
+                self.log.append("Success: Plugin rebuilt successfully!")
+                self.status = SUCCEEDED
+                if self.cache and self.cache_key:
+                    self._store_in_cache()
+                if self.deployer:
+                    self._deploy()
+            else:
+                self.log.append(f"Error: Rebuild failed with return code: {self.returncode}")
+                self.status = FAILED
+        except Exception as e:
+            self.log.append("=" * 50)
+            self.log.append(f"Error occurred: {str(e)}")
+            self.error = str(e)
+            self.status = FAILED
+        finally:
+            self.finished_at = time.time()
+            self.process = None
+            if self._job_object:
+                self._job_object.close()
+            if self.history:
+                self._record_history()
+            self.log.close_file()
+
+
+class BuildQueue:
+    """FIFO of build jobs executed by a bounded pool of worker threads"""
+
+    def __init__(self, max_workers=None, log_dir=None, on_job_update=None, cache=None, history=None, scheduler=None,
+                 agents=None, deployer=None, workspace=None):
+        self.max_workers = max_workers or max_parallel_builds()
+        self.log_dir = log_dir
+        self.cache = cache
+        self.history = history
+        self.scheduler = scheduler
+        self.agents = agents
+        self.deployer = deployer
+        self.workspace = workspace
+        self.on_job_update = on_job_update
+        self.jobs = []
+        self._pending = []
+        self._running = set()
+        self._lock = threading.Lock()
+        metrics.gauge("build_queue_pending", lambda: len(self._pending))
+        metrics.gauge("build_queue_running", lambda: len(self._running))
+
+    def submit(self, plugin, engine, package_dir, extra_args=(), notes=()):
+        """Queue a single build and return its job (run on a build agent if the queue has agents, in a workspace if it has workspace settings)
+
+        notes are logged before the job's own output, e.g. pre-flight warnings.
+        """
+        kwargs = dict(log_dir=self.log_dir, extra_args=extra_args, cache=self.cache, history=self.history,
+                      deployer=self.deployer, notes=notes)
+        if self.agents:
+            from .agents import RemoteBuildJob  # Imports this module
+            job = RemoteBuildJob(plugin, engine, package_dir, self.agents, **kwargs)
+        elif self.workspace:
+            from .workspace import WorkspaceBuildJob  # Imports this module
+            job = WorkspaceBuildJob(plugin, engine, package_dir, self.workspace, **kwargs)
+        else:
+            job = BuildJob(plugin, engine, package_dir, **kwargs)
+        with self._lock:
+            self.jobs.append(job)
+            self._pending.append(job)
+        self._notify(job)
+        self._start_next()
+        return job
+
+    def submit_matrix(self, plugins, engines, destination, extra_args=(), notes=()):
+        """Queue every plugin against every engine, each into its own package folder
+
+        Raises ValueError, with nothing queued, if any of the commands can't be run safely.
+        """
+        builds = [
+            (plugin, engine, os.path.join(destination, "Migrated", plugin_name(plugin), engine_label(engine)))
+            for plugin in plugins
+            for engine in engines
+        ]
+        for plugin, engine, package_dir in builds:
+            build_command(engine, plugin, package_dir, extra_args)
+        return [self.submit(plugin, engine, package_dir, extra_args, notes) for plugin, engine, package_dir in builds]
+
+    def set_max_workers(self, max_workers):
+        self.max_workers = max(1, int(max_workers))
+        self._start_next()
+
+    def get(self, job_id):
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def cancel(self, job_id):
+        """Cancel one job, whether it is still queued or already running"""
+        job = self.get(job_id)
+        if not job or job.finished:
+            return
+        with self._lock:
+            was_pending = job in self._pending
+            if was_pending:
+                self._pending.remove(job)
+        if was_pending:
+            job.cancel_requested = True
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.log.append("Rebuild cancelled before it started")
+            job.log.close_file()
+            self._notify(job)
+        else:
+            job.cancel()
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            self.cancel(job.id)
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if not job.finished]
+
+    @property
+    def active(self):
+        return bool(self._pending or self._running)
+
+    def counts(self):
+        """Number of jobs per status"""
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def _start_next(self):
+        started = []
+        with self._lock:
+            while self._pending and len(self._running) < self.max_workers:
+                job = self._pending.pop(0)
+                self._running.add(job)
+                started.append(job)
+        for job in started:
+            threading.Thread(target=self._worker, args=(job,), daemon=True).start()
+
+    def _worker(self, job):
+        scheduler = self.scheduler if job.runs_locally else None
+        try:
+            job.status = RUNNING
+            self._notify(job)
+            if scheduler:
+                scheduler.acquire(job)
+            job.run()
+        finally:
+            if scheduler:
+                scheduler.release(job)
+            # Reported before the job leaves _running, so whoever waits on `active` sees its final update
+            self._notify(job)
+            with self._lock:
+                self._running.discard(job)
+            self._start_next()
+
+    def _notify(self, job):
+        if self.on_job_update:
+            try:
+                self.on_job_update(job)
+            except Exception:
+                pass  # UI callbacks must never take a worker down
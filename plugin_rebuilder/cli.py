@@ -0,0 +1,638 @@
+"""Command line entry point
+
+Everything here stays importable without Flet; the GUI is only imported when
+it is actually requested.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from dataclasses import asdict
+
+from .agents import AGENT_DIR, DEFAULT_PORT, AgentPool, BuildAgent
+from .build_cache import CACHE_DIR, DEFAULT_MAX_SIZE, BuildCache
+from .build_queue import FINISHED_STATES, QUEUED, RUNNING, BuildQueue, build_command, engine_label, plugin_name
+from .deploy import INTERMEDIATE_EXCLUDES, Deployer
+from .commands import UatOptions
+from .engines import KNOWN_PLATFORMS, EngineRegistry, plugin_engine_version
+from .history import DEFAULT_REGRESSION_THRESHOLD, DEFAULT_WINDOW, HISTORY_FILE, BuildHistory
+from .instrumentation import METRICS_INTERVAL, MetricsFileWriter, SessionProfiler, enable_metrics, serve_metrics
+from .log_archive import DEFAULT_SEARCH_LIMIT, LogArchive, compile_pattern, list_logs, search_logs
+from .log_buffer import LOG_DIR, LogFlusher
+from .preflight import CHECKS, blocking_issues, run_preflight
+from .scheduler import MIN_CORES_PER_BUILD, ResourceScheduler
+from .uat_parser import ERROR, WARNING, Diagnostic, PhaseStarted
+from .watch import DEBOUNCE_SECONDS, POLL_INTERVAL, WatchSession
+from .workspace import WORKSPACE_DIR, Workspace, WorkspaceBuildJob, WorkspaceSettings, list_workspaces
+
+
+class JsonLinesWriter:
+    """Thread-safe writer of one JSON object per line"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "time": round(time.time(), 3), **fields}
+        with self._lock:
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+
+def is_version(value):
+    return bool(re.match(r"^\d+(\.\d+)*$", value))
+
+
+def resolve_builds(plugins, engines, registry, remote=False):
+    """(plugin, engine root) pairs plus errors
+
+    Engines are UE root folders or versions such as 5.4; without any, each
+    plugin is built with the engine matching its EngineVersion. For remote
+    builds versions without a local install are passed on to the agents.
+    """
+    pairs = []
+    errors = []
+    roots = []
+    for engine in engines:
+        if not is_version(engine):
+            roots.append(engine)
+        elif registry.find(engine):
+            roots.append(registry.find(engine).root)
+        elif remote:
+            roots.append(engine)
+        else:
+            errors.append(f"No installed engine matches version {engine}")
+    for plugin in plugins:
+        if engines:
+            pairs += [(plugin, root) for root in roots]
+            continue
+        match = registry.match(plugin)
+        declared = plugin_engine_version(plugin)
+        if match:
+            pairs.append((plugin, match.root))
+        elif remote and declared:
+            pairs.append((plugin, "%d.%d" % declared))
+        else:
+            errors.append(f"No installed engine matches the EngineVersion of {plugin}, pass --engine")
+    return pairs, errors
+
+
+def package_dirs(pairs, out):
+    """Package folder per plugin/engine pair: out itself for a single build"""
+    if len(pairs) == 1:
+        return [(*pairs[0], out)]
+    return [
+        (plugin, engine, os.path.join(out, plugin_name(plugin), engine_label(engine)))
+        for plugin, engine in pairs
+    ]
+
+
+class BuildReporter:
+    """Reports build jobs as JSON line events (queued, started, phase, log, progress, finished, ...)"""
+
+    def __init__(self, writer, stream_log=True):
+        self.writer = writer
+        self.stream_log = stream_log
+        self._flushers = {}
+        self._reported = {}
+        self._last_progress = {}
+
+    def _event(self, job, event):
+        if isinstance(event, PhaseStarted):
+            self.writer.emit("phase", job=job.id, target=event.target, platform=event.platform,
+                             configuration=event.configuration)
+        elif isinstance(event, Diagnostic):
+            self.writer.emit("diagnostic", job=job.id, severity=event.severity, message=event.message,
+                             code=event.code, category=event.category)
+
+    def _lines(self, job, lines):
+        if self.stream_log:
+            for line in lines:
+                self.writer.emit("log", job=job.id, line=line)
+        progress = job.progress
+        fraction = round(progress.fraction, 3)
+        if job.status == RUNNING and self._last_progress.get(job.id) != fraction:
+            self._last_progress[job.id] = fraction
+            phase = progress.current_phase
+            eta = progress.eta
+            self.writer.emit(
+                "progress",
+                job=job.id,
+                fraction=fraction,
+                eta=round(eta, 1) if eta is not None else None,
+                phase=phase.label if phase else None,
+                errors=progress.errors,
+                warnings=progress.warnings,
+            )
+
+    def job_updated(self, job):
+        if self._reported.get(job.id) == job.status:
+            return
+        self._reported[job.id] = job.status
+        if job.status == QUEUED:
+            self.writer.emit("queued", job=job.id, plugin=job.plugin, engine=job.engine, package_dir=job.package_dir)
+            job.progress.add_listener(lambda event: self._event(job, event))
+            self._flushers[job.id] = LogFlusher(job.log, lambda lines: self._lines(job, lines)).start()
+        elif job.status == RUNNING:
+            self.writer.emit("started", job=job.id, command=job.command)
+        elif job.status in FINISHED_STATES:
+            flusher = self._flushers.pop(job.id, None)
+            if flusher:
+                flusher.stop()
+            self.writer.emit(
+                "finished",
+                job=job.id,
+                status=job.status,
+                returncode=job.returncode,
+                elapsed=round(job.elapsed, 3),
+                log_path=job.log.log_path,
+                cache_hit=job.cache_hit,
+                errors=job.progress.errors,
+                warnings=job.progress.warnings,
+                peak_rss=job.peak_rss,
+                regression=round(job.regression, 3) if job.regression is not None else None,
+                cancel_report=job.cancel_report,
+                error=job.error,
+            )
+            if isinstance(job, WorkspaceBuildJob):
+                self.writer.emit("workspace", job=job.id, path=job.workspace.path, compiled=job.compiled,
+                                 reuse=round(job.reuse, 3) if job.reuse is not None else None)
+            for result in job.deploy_results or []:
+                emit_deployed(self.writer, result, job=job.id)
+
+
+def run_builds(args, writer):
+    """Queue every requested build, stream their progress and wait for them"""
+    remote = bool(args.agent)
+    registry = EngineRegistry()
+    if not args.engine or any(is_version(engine) for engine in args.engine):
+        registry.discover()
+    pairs, errors = resolve_builds(args.plugin, args.engine or [], registry, remote)
+    issues = run_preflight(pairs, args.out, local_engine=not remote, skip=args.skip_check or (),
+                           extra_args=uat_args(args))
+    for issue in issues:
+        writer.emit("preflight", check=issue.check, severity=issue.severity, message=issue.message, fix=issue.fix)
+    agents = AgentPool(args.agent, args.agent_token) if remote else None
+    capacity = agents.capacity() if agents else None
+    if remote and not capacity:
+        errors.append("None of the build agents is reachable: " + "; ".join(f"{url}: {error}" for url, error in agents.errors.items()))
+    if errors or blocking_issues(issues):
+        for error in errors:
+            writer.emit("error", message=error)
+        return 2
+
+    cache = None if args.no_cache else BuildCache(args.cache_dir, int(args.cache_size * 1024 ** 3))
+    history = None if args.no_history else BuildHistory(args.history_file)
+    deployer = make_deployer(args, args.deploy_to) if args.deploy_to else None
+    scheduler = None if args.no_scheduler or remote else ResourceScheduler(min_cores_per_build=args.min_cores_per_build)
+    queue = BuildQueue(
+        max_workers=args.jobs or capacity or (scheduler.max_builds() if scheduler else None),
+        log_dir=args.log_dir,
+        on_job_update=BuildReporter(writer, not args.no_log).job_updated,
+        cache=cache,
+        history=history,
+        scheduler=scheduler,
+        agents=agents,
+        deployer=deployer,
+        workspace=make_workspace_settings(args),
+    )
+    builds = package_dirs(pairs, args.out)
+    for plugin, engine, package_dir in builds:
+        try:
+            # Package folders below --out can add characters the pre-flight check didn't see
+            build_command(engine, plugin, package_dir, uat_args(args))
+        except ValueError as e:
+            writer.emit("error", message=str(e))
+            return 2
+    jobs = [queue.submit(plugin, engine, package_dir, uat_args(args)) for plugin, engine, package_dir in builds]
+
+    while queue.active:
+        try:
+            time.sleep(0.1)
+        except KeyboardInterrupt:
+            writer.emit("interrupted")
+            queue.cancel_all()
+
+    counts = queue.counts()
+    writer.emit("summary", **{status: counts.get(status, 0) for status in FINISHED_STATES})
+    return 0 if all(job.returncode == 0 for job in jobs) else 1
+
+
+def run_watch(args, writer):
+    """Rebuild one plugin every time its sources change, until interrupted"""
+    registry = EngineRegistry()
+    if not args.engine or is_version(args.engine):
+        registry.discover()
+    pairs, errors = resolve_builds([args.plugin], [args.engine] if args.engine else [], registry)
+    issues = run_preflight(pairs, args.out, skip=args.skip_check or (), extra_args=uat_args(args))
+    for issue in issues:
+        writer.emit("preflight", check=issue.check, severity=issue.severity, message=issue.message, fix=issue.fix)
+    if errors or blocking_issues(issues):
+        for error in errors:
+            writer.emit("error", message=error)
+        return 2
+    plugin, engine = pairs[0]
+
+    queue = BuildQueue(
+        max_workers=1,
+        log_dir=args.log_dir,
+        on_job_update=BuildReporter(writer, not args.no_log).job_updated,
+        cache=None if args.no_cache else BuildCache(args.cache_dir),
+        deployer=make_deployer(args, args.deploy_to) if args.deploy_to else None,
+        workspace=make_workspace_settings(args),
+    )
+    session = WatchSession(queue, plugin, engine, args.out, uat_args(args), all_platforms=args.all_platforms,
+                           interval=args.interval, debounce=args.debounce)
+    writer.emit("watching", plugin=plugin, engine=engine, package_dir=args.out, args=session.args)
+    session.start(build_now=not args.no_initial_build)
+    try:
+        while True:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        writer.emit("interrupted")
+        session.stop()
+        queue.cancel_all()
+        while queue.active:
+            time.sleep(0.1)
+    writer.emit("watch_summary", builds=session.builds, restarts=session.restarts)
+    return 0
+
+
+def make_deployer(args, targets):
+    excludes = INTERMEDIATE_EXCLUDES if args.skip_intermediates else ()
+    return Deployer(targets, excludes, use_hash=args.hash, hardlink=not args.no_hardlinks, delete=args.delete)
+
+
+def emit_deployed(writer, result, **fields):
+    writer.emit(
+        "deployed",
+        **fields,
+        target=result.target,
+        written=result.written,
+        unchanged=result.unchanged,
+        deleted=result.deleted,
+        bytes=result.bytes_written,
+        seconds=round(result.seconds, 3),
+        errors=result.errors,
+    )
+
+
+def run_deploy(args, writer):
+    """Sync an already packaged plugin into projects"""
+    if not os.path.isdir(args.source):
+        writer.emit("error", message=f"Package folder not found: {args.source}")
+        return 2
+    uplugins = [name for name in os.listdir(args.source) if name.lower().endswith(".uplugin")]
+    name = args.plugin_name or (plugin_name(uplugins[0]) if uplugins else os.path.basename(os.path.normpath(args.source)))
+    results = make_deployer(args, args.to).deploy(args.source, name, args.engine,
+                                                  lambda text: writer.emit("log", line=text), args.plugin)
+    for result in results:
+        emit_deployed(writer, result)
+    return 0 if all(not result.errors for result in results) else 1
+
+
+def add_deploy_options(parser):
+    parser.add_argument("--skip-intermediates", action="store_true", help="do not deploy Intermediate/ and .pdb files")
+    parser.add_argument("--hash", action="store_true",
+                        help="compare file contents when size matches but modification time doesn't")
+    parser.add_argument("--no-hardlinks", action="store_true", help="always copy, even on the same volume")
+    parser.add_argument("--delete", action="store_true",
+                        help="remove files an earlier deploy wrote that the package no longer has")
+
+
+def uat_args(args):
+    """BuildPlugin arguments from the typed options of add_uat_options"""
+    return UatOptions(
+        target_platforms=args.platform or [],
+        no_host_platform=args.no_host_platform,
+        rocket=args.rocket,
+        strict_includes=args.strict_includes,
+        vs2022=args.vs2022,
+        extra_args=args.uat_arg or [],
+    ).args()
+
+
+def add_uat_options(parser):
+    parser.add_argument("--platform", action="append", choices=KNOWN_PLATFORMS,
+                        help="build only this target platform (repeat for several; default: every platform installed)")
+    parser.add_argument("--no-host-platform", action="store_true",
+                        help="skip the editor build for this machine, e.g. to build one --platform only")
+    parser.add_argument("--rocket", action="store_true", help="pass -Rocket (build as for an installed engine)")
+    parser.add_argument("--strict-includes", action="store_true",
+                        help="pass -StrictIncludes (no PCH/unity, catches missing includes)")
+    parser.add_argument("--vs2022", action="store_true", help="pass -VS2022 (compile with Visual Studio 2022)")
+    parser.add_argument("--uat-arg", action="append",
+                        help="any other BuildPlugin argument, passed on as is, e.g. --uat-arg=-NoXGE (repeat for several)")
+
+
+def make_workspace_settings(args):
+    if not args.workspace:
+        return None
+    return WorkspaceSettings(args.workspace_dir, editor_only=not args.game_targets, ubt_args=args.ubt_arg or ())
+
+
+def add_workspace_options(parser):
+    parser.add_argument("--workspace", action="store_true",
+                        help="build in a persistent workspace with UBT so unchanged files are not recompiled")
+    parser.add_argument("--workspace-dir", default=WORKSPACE_DIR,
+                        help="where workspaces live; point several runs at one folder to share intermediates")
+    parser.add_argument("--game-targets", action="store_true",
+                        help="also build UnrealGame Development and Shipping in the workspace, not only the editor")
+    parser.add_argument("--ubt-arg", action="append",
+                        help="extra UnrealBuildTool argument for workspace builds (repeat for several)")
+
+
+def run_workspaces(args, writer):
+    """List (or delete) build workspaces with how much of each rebuild they saved"""
+    for path, state in list_workspaces(args.workspace_dir):
+        if args.clear:
+            shutil.rmtree(path, ignore_errors=True)
+            writer.emit("workspace_deleted", path=path)
+            continue
+        workspace = Workspace(state["plugin"], state["engine"], state["platform"], args.workspace_dir)
+        hit_rate = workspace.hit_rate()
+        writer.emit(
+            "workspace",
+            path=path,
+            plugin=state["plugin"],
+            engine=state["engine"],
+            platform=state["platform"],
+            builds=state.get("builds", 0),
+            last_build=state.get("last_build"),
+            targets=state.get("targets", {}),
+            hit_rate=round(hit_rate, 3) if hit_rate is not None else None,
+            size=workspace.size(),
+        )
+    return 0
+
+
+def run_cache(args, writer):
+    """List (or clear) the build cache"""
+    cache = BuildCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+    for key, entry in sorted(cache.index.items(), key=lambda item: -item[1]["last_used"]):
+        writer.emit("cache_entry", key=key, **entry)
+    writer.emit("cache_summary", entries=len(cache.index), size=cache.total_size)
+    return 0
+
+
+def run_engines(args, writer):
+    """List installed engines, or the ones a plugin can be built with"""
+    registry = EngineRegistry()
+    registry.discover(args.engine or [])
+    engines = registry.compatible(args.plugin) if args.plugin else registry.engines
+    for engine in engines:
+        writer.emit("engine", label=engine.label, **asdict(engine))
+    return 0 if engines else 1
+
+
+def run_agent(args, writer):
+    """Serve builds to other machines until interrupted"""
+    agent = BuildAgent(args.work_dir, args.jobs, args.engine or [], args.token)
+    try:
+        server = agent.serve(args.host, args.port)
+    except ValueError as e:
+        writer.emit("error", message=str(e))
+        return 2
+    writer.emit("agent_listening", address=args.host, port=server.server_address[1], **agent.status())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        writer.emit("interrupted")
+        agent.queue.cancel_all()
+    finally:
+        server.server_close()
+    return 0
+
+
+def run_logs(args, writer):
+    """List archived build logs, read one by line or error number, or search them"""
+    if not args.log:
+        if args.grep:
+            matches = search_logs(args.log_dir, args.grep, args.regex, args.ignore_case, args.limit)
+            for path, number, text in matches:
+                writer.emit("match", path=path, number=number, text=text)
+            return 0 if matches else 1
+        for entry in list_logs(args.log_dir):
+            writer.emit("log_file", **entry)
+        return 0
+
+    try:
+        archive = LogArchive(args.log)
+    except (OSError, RuntimeError) as e:
+        writer.emit("error", message=f"Can't read {args.log}: {e}")
+        return 2
+    if args.grep:
+        matches = archive.grep(compile_pattern(args.grep, args.regex, args.ignore_case), args.limit)
+        for number, text in matches:
+            writer.emit("match", path=args.log, number=number, text=text)
+        return 0 if matches else 1
+    if args.error or args.warning:
+        severity, n = (ERROR, args.error) if args.error else (WARNING, args.warning)
+        number = archive.diagnostic_line(n, severity)
+        if number is None:
+            count = len(archive.errors if severity == ERROR else archive.warnings)
+            writer.emit("error", message=f"There is no {severity} #{n}, the log has {count}")
+            return 1
+        lines = archive.around(number, args.context)
+    else:
+        lines = archive.lines(args.line or 1, args.count)
+    for number, text in lines:
+        writer.emit("log_line", path=args.log, number=number, text=text)
+    writer.emit("log_info", path=args.log, lines=archive.total_lines, errors=len(archive.errors),
+                warnings=len(archive.warnings))
+    return 0
+
+
+def run_history(args, writer):
+    """Show per plugin/engine build time trends, or export the history as CSV"""
+    history = BuildHistory(args.history_file)
+    if args.csv:
+        if args.csv == "-":
+            history.export_csv(sys.stdout, args.plugin, args.engine_version)
+        else:
+            with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+                history.export_csv(f, args.plugin, args.engine_version)
+        return 0
+    trends = history.trends(args.threshold / 100, args.window, args.plugin, args.engine_version)
+    for trend in trends:
+        writer.emit("trend", **trend)
+    return 1 if args.fail_on_regression and any(trend["regression"] for trend in trends) else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="plugin_rebuilder",
+        description="Rebuild Unreal Engine plugins with UAT. Opens the GUI when no command is given.",
+    )
+    parser.add_argument("--metrics-file", help="append the tool's own counters and timers to this JSON lines file")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL,
+                        help="seconds between snapshots in --metrics-file")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve the tool's counters and timers for Prometheus on this port (/metrics)")
+    parser.add_argument("--profile", help="profile the whole session with cProfile and write the stats to this .prof file")
+    commands = parser.add_subparsers(dest="command")
+
+    build = commands.add_parser("build", help="rebuild plugins headless, reporting progress as JSON lines")
+    build.add_argument("--plugin", action="append", required=True, help=".uplugin file (repeat for several)")
+    build.add_argument("--engine", action="append",
+                       help="UE root folder or installed version like 5.4 (repeat for several; "
+                            "default: the engine matching each plugin's EngineVersion)")
+    build.add_argument("--out", required=True, help="package folder (one sub-folder per plugin/engine pair for several)")
+    build.add_argument("--jobs", type=int, default=None, help="max parallel builds (default: based on cores and RAM)")
+    build.add_argument("--agent", action="append",
+                       help="build on this agent instead of locally, e.g. http://buildbox:8765 (repeat for several)")
+    build.add_argument("--agent-token", default=os.environ.get("UE_PLUGIN_REBUILDER_AGENT_TOKEN"),
+                       help="token the agents expect (default: $UE_PLUGIN_REBUILDER_AGENT_TOKEN)")
+    build.add_argument("--no-scheduler", action="store_true",
+                       help="let every parallel build use all cores instead of splitting them between builds")
+    build.add_argument("--min-cores-per-build", type=int, default=MIN_CORES_PER_BUILD,
+                       help="fewest cores a build gets, which bounds the default --jobs")
+    build.add_argument("--skip-check", action="append", choices=[name for name in CHECKS if name != "inputs"],
+                       help="do not run this pre-flight check (repeat for several)")
+    build.add_argument("--log-dir", default=LOG_DIR, help="where full build logs are written")
+    build.add_argument("--no-log", action="store_true", help="do not stream raw build output lines")
+    build.add_argument("--no-cache", action="store_true", help="always rebuild, never restore from the build cache")
+    build.add_argument("--cache-dir", default=CACHE_DIR, help="build cache folder")
+    build.add_argument("--cache-size", type=float, default=DEFAULT_MAX_SIZE / 1024 ** 3, help="build cache limit in GB")
+
+    build.add_argument("--deploy-to", action="append",
+                       help="after each successful build, sync the plugin into this project (repeat for several)")
+    add_uat_options(build)
+    add_deploy_options(build)
+    add_workspace_options(build)
+    build.add_argument("--history-file", default=HISTORY_FILE, help="build timing history (JSON lines)")
+    build.add_argument("--no-history", action="store_true", help="do not record build timings")
+
+    watch = commands.add_parser("watch", help="rebuild a plugin whenever its sources change")
+    watch.add_argument("--plugin", required=True, help=".uplugin file")
+    watch.add_argument("--engine", help="UE root folder or installed version (default: the plugin's EngineVersion)")
+    watch.add_argument("--out", required=True, help="package folder, reused by every rebuild")
+    watch.add_argument("--all-platforms", action="store_true",
+                       help="build every platform BuildPlugin would, not just this machine's")
+    watch.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                       help="seconds without changes before a rebuild starts")
+    watch.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between scans of the plugin")
+    watch.add_argument("--no-initial-build", action="store_true", help="wait for the first change before building")
+    watch.add_argument("--skip-check", action="append", choices=[name for name in CHECKS if name != "inputs"],
+                       help="do not run this pre-flight check (repeat for several)")
+    watch.add_argument("--deploy-to", action="append",
+                       help="after each successful build, sync the plugin into this project (repeat for several)")
+    add_uat_options(watch)
+    add_deploy_options(watch)
+    add_workspace_options(watch)
+    watch.add_argument("--log-dir", default=LOG_DIR, help="where full build logs are written")
+    watch.add_argument("--no-log", action="store_true", help="do not stream raw build output lines")
+    watch.add_argument("--no-cache", action="store_true", help="always rebuild, never restore from the build cache")
+    watch.add_argument("--cache-dir", default=CACHE_DIR, help="build cache folder")
+
+    history = commands.add_parser("history", help="show build time trends and regressions")
+    history.add_argument("--history-file", default=HISTORY_FILE, help="build timing history (JSON lines)")
+    history.add_argument("--plugin", help="only this plugin (name without .uplugin)")
+    history.add_argument("--engine-version", help="only this engine version, e.g. 5.4.2")
+    history.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD * 100,
+                         help="flag builds this many percent slower than the rolling median")
+    history.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="builds in the rolling median")
+    history.add_argument("--csv", help="export every record to this CSV file ('-' for stdout) instead")
+    history.add_argument("--fail-on-regression", action="store_true", help="exit with 1 if any series regressed")
+
+    cache = commands.add_parser("cache", help="list the build cache")
+    cache.add_argument("--cache-dir", default=CACHE_DIR, help="build cache folder")
+    cache.add_argument("--clear", action="store_true", help="delete every cached build first")
+
+    workspaces = commands.add_parser("workspaces", help="list build workspaces and how much they reused")
+    workspaces.add_argument("--workspace-dir", default=WORKSPACE_DIR, help="where workspaces live")
+    workspaces.add_argument("--clear", action="store_true", help="delete every workspace")
+
+    engines = commands.add_parser("engines", help="list installed engines")
+    engines.add_argument("--plugin", help="only engines matching this .uplugin's EngineVersion, best first")
+    engines.add_argument("--engine", action="append", help="also inspect this UE root folder (repeat for several)")
+
+    agent = commands.add_parser("agent", help="accept builds from other machines over HTTP")
+    agent.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for every interface)")
+    agent.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (0 picks a free one)")
+    agent.add_argument("--jobs", type=int, default=None, help="max parallel builds (default: based on cores and RAM)")
+    agent.add_argument("--engine", action="append", help="UE root folder to offer besides the discovered ones")
+    agent.add_argument("--work-dir", default=AGENT_DIR, help="where uploaded plugins are unpacked and built")
+    agent.add_argument("--token", default=os.environ.get("UE_PLUGIN_REBUILDER_AGENT_TOKEN"),
+                       help="require this token from clients, needed unless --host is loopback "
+                            "(default: $UE_PLUGIN_REBUILDER_AGENT_TOKEN)")
+
+    logs = commands.add_parser("logs", help="list, read and search archived build logs")
+    logs.add_argument("log", nargs="?", help="log to read (default: list every log, or search them all with --grep)")
+    logs.add_argument("--log-dir", default=LOG_DIR, help="where build logs are archived")
+    logs.add_argument("--error", type=int, help="show the Nth error with the lines around it")
+    logs.add_argument("--warning", type=int, help="show the Nth warning with the lines around it")
+    logs.add_argument("--context", type=int, default=5, help="lines shown before and after an error or warning")
+    logs.add_argument("--line", type=int, help="show lines from this line number on")
+    logs.add_argument("--count", type=int, default=100, help="lines shown with --line")
+    logs.add_argument("--grep", help="text to search for")
+    logs.add_argument("--regex", action="store_true", help="--grep is a regular expression")
+    logs.add_argument("-i", "--ignore-case", action="store_true", help="search case-insensitively")
+    logs.add_argument("--limit", type=int, default=DEFAULT_SEARCH_LIMIT, help="stop after this many matches")
+
+    deploy = commands.add_parser("deploy", help="sync a packaged plugin into projects")
+    deploy.add_argument("--from", dest="source", required=True, help="packaged plugin folder")
+    deploy.add_argument("--to", action="append", required=True,
+                        help="project (or Plugins) folder to sync into (repeat for several)")
+    deploy.add_argument("--plugin-name", help="plugin folder name in the projects (default: the packaged .uplugin's name)")
+    deploy.add_argument("--engine", help="UE root the plugin was built with; projects using other versions are skipped")
+    deploy.add_argument("--plugin", help="the plugin's source .uplugin; targets overlapping its folder are refused, "
+                                         "and --delete only works with it")
+    add_deploy_options(deploy)
+
+    commands.add_parser("gui", help="open the GUI")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics_writer = None
+    if args.metrics_file or args.metrics_port is not None:
+        enable_metrics()
+        if args.metrics_file:
+            metrics_writer = MetricsFileWriter(args.metrics_file, args.metrics_interval).start()
+        if args.metrics_port is not None:
+            server = serve_metrics(port=args.metrics_port)
+            print(f"Serving metrics on http://127.0.0.1:{server.server_address[1]}/metrics", file=sys.stderr)
+    profiler = SessionProfiler().start() if args.profile else None
+    try:
+        return dispatch(args)
+    finally:
+        if profiler:
+            profiler.stop(args.profile)
+            print(f"Profile of process {os.getpid()} written to {args.profile}", file=sys.stderr)
+        if metrics_writer:
+            metrics_writer.stop()
+
+
+def dispatch(args):
+    if args.command == "build":
+        return run_builds(args, JsonLinesWriter())
+    if args.command == "cache":
+        return run_cache(args, JsonLinesWriter())
+    if args.command == "history":
+        return run_history(args, JsonLinesWriter())
+    if args.command == "agent":
+        return run_agent(args, JsonLinesWriter())
+    if args.command == "engines":
+        return run_engines(args, JsonLinesWriter())
+    if args.command == "watch":
+        return run_watch(args, JsonLinesWriter())
+    if args.command == "logs":
+        return run_logs(args, JsonLinesWriter())
+    if args.command == "deploy":
+        return run_deploy(args, JsonLinesWriter())
+    if args.command == "workspaces":
+        return run_workspaces(args, JsonLinesWriter())
+
+    # Flet is only loaded when the window is actually wanted
+    from .gui import run
+    run()
+    return 0
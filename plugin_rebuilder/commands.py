@@ -0,0 +1,126 @@
+"""UAT and UBT command lines as argument lists, started without a shell
+
+Paths and options are separate argv entries, so a plugin or engine path
+with spaces, quotes or `&` in it reaches UAT as one argument and nothing
+in it is interpreted by a shell. format_command() turns an argv back into
+a copy-pasteable line for logs.
+
+On Windows the RunUAT/RunUBT .bat is still interpreted by cmd.exe (it is
+what CreateProcess starts for a batch file), so arguments cmd would expand
+even in quotes are refused there instead of being passed on.
+"""
+import os
+import shlex
+import subprocess
+from dataclasses import dataclass, field
+from typing import List
+
+# Characters cmd.exe acts on inside quotes too; never valid in UAT arguments
+BATCH_UNSAFE = ('"', "%", "\r", "\n")
+# Characters cmd.exe acts on outside quotes; list2cmdline only quotes arguments with whitespace
+BATCH_SPECIAL = ("&", "|", "<", ">", "^")
+
+
+def uat_script(engine):
+    """Path to the RunUAT script of an engine root for the host OS"""
+    script = "RunUAT.bat" if os.name == "nt" else "RunUAT.sh"
+    return os.path.join(engine, "Engine", "Build", "BatchFiles", script)
+
+
+def ubt_script(engine):
+    """Path to the RunUBT script of an engine root for the host OS"""
+    script = "RunUBT.bat" if os.name == "nt" else "RunUBT.sh"
+    return os.path.join(engine, "Engine", "Build", "BatchFiles", script)
+
+
+def script_argv(script):
+    """Start of an argv running an engine script directly"""
+    if os.name != "nt" and not os.access(script, os.X_OK):
+        # Engines copied without their permissions (zip downloads, some network shares).
+        # Epic's scripts need bash; sh is dash on Debian and Ubuntu
+        return ["bash", script]
+    return [script]
+
+
+def check_batch_args(argv):
+    """Raise ValueError for arguments cmd.exe would expand when argv starts a .bat"""
+    if os.name != "nt" or not argv or not argv[0].lower().endswith(".bat"):
+        return argv
+    for arg in argv[1:]:
+        unquoted = arg and not any(space in arg for space in " \t")
+        if any(char in arg for char in BATCH_UNSAFE) or (unquoted and any(char in arg for char in BATCH_SPECIAL)):
+            raise ValueError(f"Argument can't be passed to {os.path.basename(argv[0])} safely: {arg}")
+    return argv
+
+
+def uat_command(engine, plugin, package_dir, extra_args=()):
+    """argv of UAT BuildPlugin for one plugin/engine pair"""
+    return check_batch_args([
+        *script_argv(uat_script(engine)),
+        "BuildPlugin",
+        f"-Plugin={plugin}",
+        f"-Package={package_dir}",
+        *extra_args,
+    ])
+
+
+def ubt_command(engine, target, platform, configuration, args=()):
+    """argv of UnrealBuildTool building one target"""
+    return check_batch_args([*script_argv(ubt_script(engine)), target, platform, configuration, *args])
+
+
+def format_command(argv):
+    """argv as a command line for the host's shell, for logs and copy-pasting"""
+    if os.name == "nt":
+        return subprocess.list2cmdline(argv)
+    return shlex.join(argv)
+
+
+@dataclass
+class UatOptions:
+    """Typed BuildPlugin options, turned into UAT arguments by args()
+
+    Leaving target_platforms empty builds every platform the engine has;
+    naming one (with no_host_platform set) builds just that platform.
+    """
+    target_platforms: List[str] = field(default_factory=list)
+    no_host_platform: bool = False
+    rocket: bool = False
+    strict_includes: bool = False
+    vs2022: bool = False
+    extra_args: List[str] = field(default_factory=list)
+
+    def args(self):
+        args = []
+        if self.target_platforms:
+            args.append("-TargetPlatforms=" + "+".join(self.target_platforms))
+        if self.no_host_platform:
+            args.append("-NoHostPlatform")
+        if self.rocket:
+            args.append("-Rocket")
+        if self.strict_includes:
+            args.append("-StrictIncludes")
+        if self.vs2022:
+            args.append("-VS2022")
+        return args + self.extra_args
+
+    @classmethod
+    def from_args(cls, args):
+        """Options parsed back from UAT arguments; ones without a field stay in extra_args"""
+        options = cls()
+        flags = {"-nohostplatform": "no_host_platform", "-rocket": "rocket", "-strictincludes": "strict_includes",
+                 "-vs2022": "vs2022"}
+        for arg in args:
+            lower = arg.lower()
+            if lower.startswith("-targetplatforms="):
+                options.target_platforms = [platform for platform in arg.split("=", 1)[1].split("+") if platform]
+            elif lower in flags:
+                setattr(options, flags[lower], True)
+            else:
+                options.extra_args.append(arg)
+        return options
+
+
+def parse_platforms(text):
+    """Platforms from user input like "Win64+Linux" or "Win64, Android" """
+    return [platform for platform in text.replace(",", "+").replace(" ", "+").split("+") if platform]
@@ -0,0 +1,341 @@
+"""Syncs a packaged plugin into the Plugins folder of several projects
+
+Only files that differ are written: a file is unchanged when size and
+modification time match (or, with hashing on, when the contents do). New
+files are hardlinked when the target is on the same volume as the package
+and copied otherwise, always through a temporary name so a project never
+sees a half-written file. All targets are synced in parallel.
+
+Deploys never delete anything unless asked to. Every deploy records the files
+it wrote in a manifest in the target, and with deletes on only files listed
+there that the package no longer has, and that nobody changed since, are
+removed; whatever else lives in the project's plugin folder (a .git folder,
+local edits, binaries for other platforms) is left alone.
+"""
+import fnmatch
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .build_cache import engine_version
+from .file_index import hash_file
+from .fileops import COPY, HARDLINK, REFLINK, place_file
+
+# Skipped when deploying without build intermediates
+INTERMEDIATE_EXCLUDES = ("Intermediate", "*.pdb")
+DEPLOY_WORKERS = 8
+# Files a deploy wrote into a target, {"files": {relative path: [size, mtime_ns]}}
+DEPLOY_MANIFEST = ".plugin-rebuilder-deploy.json"
+
+
+def plugin_target(path, plugin_name):
+    """<project>/Plugins/<plugin> for a project folder, <path>/<plugin> for anything else"""
+    try:
+        is_project = any(name.lower().endswith(".uproject") for name in os.listdir(path))
+    except OSError:
+        is_project = False
+    if is_project:
+        return os.path.join(path, "Plugins", plugin_name)
+    return os.path.join(path, plugin_name)
+
+
+def project_engine_association(path):
+    """EngineAssociation of the .uproject in path ('5.4', a source build GUID, ...), or None"""
+    try:
+        for name in os.listdir(path):
+            if name.lower().endswith(".uproject"):
+                with open(os.path.join(path, name), 'r', encoding='utf-8-sig') as f:
+                    return json.load(f).get("EngineAssociation") or None
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+    return None
+
+
+def accepts_engine(path, engine):
+    """False only for projects that are associated with a different engine version than engine"""
+    association = project_engine_association(path)
+    version = engine_version(engine) if engine else None
+    if not association or not version or association.count(".") != 1:
+        return True  # Unknown, or a source build GUID
+    return association == f"{version.get('MajorVersion')}.{version.get('MinorVersion')}"
+
+
+def _resolved(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+def overlaps(path, other):
+    """True when path and other are the same folder or one of them is inside the other"""
+    path, other = _resolved(path), _resolved(other)
+    try:
+        common = os.path.commonpath([path, other])
+    except ValueError:
+        return False  # Different drives
+    return common in (path, other)
+
+
+def excluded(relative, excludes):
+    return any(fnmatch.fnmatch(part, pattern) for part in relative.split("/") for pattern in excludes)
+
+
+def _scan(top, excludes):
+    """{relative path: stat} of the files under top, minus excluded ones"""
+    files = {}
+    stack = [(top, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            relative = prefix + entry.name
+            if excluded(entry.name, excludes):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, relative + "/"))
+            elif entry.is_file(follow_symlinks=False):
+                files[relative] = entry.stat(follow_symlinks=False)
+    return files
+
+
+class SyncResult:
+    """What one target sync did"""
+
+    def __init__(self, target):
+        self.target = target
+        self.written = {}
+        self.unchanged = 0
+        self.deleted = 0
+        self.bytes_written = 0
+        self.errors = []
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, method, size):
+        with self._lock:
+            self.written[method] = self.written.get(method, 0) + 1
+            self.bytes_written += size
+
+    def summary(self):
+        written = ", ".join(f"{count} {method}" for method, count in self.written.items()) or "nothing written"
+        text = (
+            f"{self.target}: {written} ({self.bytes_written / 1024 ** 2:.1f} MB), {self.unchanged} unchanged, "
+            f"{self.deleted} deleted in {self.seconds:.2f}s"
+        )
+        if self.errors:
+            text += f", {len(self.errors)} errors (first: {self.errors[0]})"
+        return text
+
+
+def _same_contents(src_path, src_stat, dst_path, dst_stat, use_hash):
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino) and src_stat.st_ino:
+        return True  # Already hardlinked
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(src_path) == hash_file(dst_path):
+        os.utime(dst_path, ns=(dst_stat.st_atime_ns, src_stat.st_mtime_ns))  # Skip hashing next time
+        return True
+    return False
+
+
+def _write(src_path, dst_path, methods):
+    temp = f"{dst_path}.deploy-{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        method = place_file(src_path, temp, methods)
+        os.replace(temp, dst_path)
+        return method
+    except OSError:
+        if os.path.lexists(temp):
+            os.unlink(temp)
+        raise
+
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return {relative: tuple(stamp) for relative, stamp in files.items() if isinstance(stamp, list) and len(stamp) == 2}
+
+
+def _write_manifest(path, files):
+    temp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(temp, 'w') as f:
+        json.dump({"files": {relative: list(stamp) for relative, stamp in sorted(files.items())}}, f, indent=1)
+    os.replace(temp, path)
+
+
+def sync_tree(source, target, excludes=(), use_hash=False, hardlink=True, delete=True, pool=None, manifest=None):
+    """Copy source's changed files into target (excluded files are left alone on both sides); returns a SyncResult
+
+    Without a manifest, delete makes target an exact mirror of source. With
+    manifest (a file name in target) the files synced are recorded there, and
+    delete only removes files an earlier sync recorded that source no longer
+    has and that are unchanged since.
+    """
+    if overlaps(source, target):
+        raise ValueError(f"Refusing to sync {source} into {target}: one is inside the other")
+    started = time.time()
+    result = SyncResult(target)
+    source_files = _scan(source, excludes)
+    os.makedirs(target, exist_ok=True)
+    target_files = _scan(target, excludes)
+    manifest_path = os.path.join(target, manifest) if manifest else None
+    if manifest:
+        source_files.pop(manifest, None)
+        target_files.pop(manifest, None)
+    previous = _read_manifest(manifest_path) if manifest else {}
+    same_volume = os.stat(source).st_dev == os.stat(target).st_dev
+    methods = (REFLINK, HARDLINK, COPY) if same_volume and hardlink else (REFLINK, COPY)
+    synced = set()
+
+    def sync_file(relative):
+        src_path = os.path.join(source, relative)
+        dst_path = os.path.join(target, relative)
+        src_stat = source_files[relative]
+        dst_stat = target_files.get(relative)
+        try:
+            if dst_stat and _same_contents(src_path, src_stat, dst_path, dst_stat, use_hash):
+                with result._lock:
+                    result.unchanged += 1
+                    synced.add(relative)
+                return
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            result.add(_write(src_path, dst_path, methods), src_stat.st_size)
+            with result._lock:
+                synced.add(relative)
+        except OSError as e:
+            with result._lock:
+                result.errors.append(f"{relative}: {e.strerror or e}")
+
+    if pool:
+        list(pool.map(sync_file, source_files))
+    else:
+        for relative in source_files:
+            sync_file(relative)
+
+    if manifest:
+        # Synced files end up with the source's size and modification time
+        files = {relative: (source_files[relative].st_size, source_files[relative].st_mtime_ns) for relative in synced}
+        for relative, stamp in previous.items():
+            if relative in files or relative in source_files:
+                continue
+            dst_stat = target_files.get(relative)
+            if excluded(relative, excludes):
+                files[relative] = stamp  # Not looked at this time, still ours
+            elif not dst_stat or (dst_stat.st_size, dst_stat.st_mtime_ns) != stamp:
+                continue  # Gone, or changed by someone else and theirs now
+            elif delete:
+                try:
+                    os.unlink(os.path.join(target, relative))
+                    result.deleted += 1
+                    _remove_empty_parents(target, relative)
+                except OSError as e:
+                    result.errors.append(f"{relative}: {e.strerror or e}")
+                    files[relative] = stamp
+            else:
+                files[relative] = stamp  # Left in place, a later deploy with deletes removes it
+        try:
+            _write_manifest(manifest_path, files)
+        except OSError as e:
+            result.errors.append(f"{manifest}: {e.strerror or e}")
+    elif delete:
+        for relative in target_files.keys() - source_files.keys():
+            try:
+                os.unlink(os.path.join(target, relative))
+                result.deleted += 1
+            except OSError as e:
+                result.errors.append(f"{relative}: {e.strerror or e}")
+        _remove_empty_dirs(target)
+    result.seconds = time.time() - started
+    return result
+
+
+def _remove_empty_dirs(top):
+    for root, dirs, files in os.walk(top, topdown=False):
+        if root != top and not dirs and not files:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+def _remove_empty_parents(top, relative):
+    """Remove the folders of a deleted file that are now empty, up to top"""
+    parts = relative.split("/")[:-1]
+    while parts:
+        try:
+            os.rmdir(os.path.join(top, *parts))
+        except OSError:
+            return  # Not empty
+        parts.pop()
+
+
+class Deployer:
+    """Deploy settings applied after every successful build"""
+
+    def __init__(self, targets, excludes=(), use_hash=False, hardlink=True, delete=False, max_workers=DEPLOY_WORKERS):
+        self.targets = list(targets)
+        self.excludes = tuple(excludes)
+        self.use_hash = use_hash
+        self.hardlink = hardlink
+        self.delete = delete
+        self.max_workers = max_workers
+
+    def deploy(self, package_dir, plugin_name, engine=None, log=None, source_plugin=None):
+        """Sync package_dir into every target that accepts engine; returns the SyncResults
+
+        source_plugin is the .uplugin the package was built from. Targets that
+        are its folder, inside it or around it are refused. With delete on,
+        files an earlier deploy wrote that the package no longer has are
+        removed, but only when source_plugin is known.
+        """
+        log = log or (lambda text: None)
+        protected = [package_dir]
+        if source_plugin:
+            protected.append(os.path.dirname(os.path.abspath(source_plugin)))
+        elif self.delete:
+            log("Deploying without deleting stale files: the plugin's source folder is not known")
+        delete = self.delete and bool(source_plugin)
+        destinations = []
+        refused = []
+        for path in self.targets:
+            if not accepts_engine(path, engine):
+                log(f"Skipping deploy to {path}: project uses UE {project_engine_association(path)}")
+                continue
+            destination = plugin_target(path, plugin_name)
+            clash = next((folder for folder in protected if overlaps(destination, folder)), None)
+            if clash:
+                result = SyncResult(destination)
+                result.errors.append(f"Refusing to deploy into {destination}, it overlaps {clash}")
+                refused.append(result)
+            else:
+                destinations.append(destination)
+        results = []
+        if destinations:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                # Targets run side by side and share the pool for their files
+                with ThreadPoolExecutor(max_workers=len(destinations)) as target_pool:
+                    results = list(target_pool.map(
+                        lambda destination: self._sync(package_dir, destination, pool, delete),
+                        destinations
+                    ))
+        results += refused
+        for result in results:
+            log(("Deployed " if not result.errors else "Error: Deploy incomplete, ") + result.summary())
+        return results
+
+    def _sync(self, package_dir, destination, pool, delete):
+        try:
+            return sync_tree(package_dir, destination, self.excludes, self.use_hash, self.hardlink, delete, pool,
+                             manifest=DEPLOY_MANIFEST)
+        except (OSError, ValueError) as e:
+            result = SyncResult(destination)
+            result.errors.append(str(e))
+            return result
@@ -0,0 +1,324 @@
+"""Finds installed Unreal Engine versions and matches plugins to them
+
+Engines are discovered from the Epic launcher manifest, the Windows registry
+(source builds registered by UnrealVersionSelector), Install.ini on Linux and
+the usual install folders, all in parallel. What's learned about each engine
+is cached per root and only re-read when Build.version or the installed
+platform folders change, so a lookup normally costs a few stat calls.
+"""
+import configparser
+import glob
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from .build_cache import engine_version
+from .commands import uat_script
+from .path_cache import DATA_DIR
+
+ENGINE_CACHE_FILE = os.path.join(DATA_DIR, "engines.json")
+
+# Folders under Engine/Binaries (or Engine/Platforms) that mean a platform is installed
+KNOWN_PLATFORMS = (
+    "Win64", "Linux", "LinuxArm64", "Mac", "Android", "IOS", "TVOS", "VisionOS",
+)
+
+# Where discovered engines came from
+LAUNCHER = "launcher"
+REGISTRY = "registry"
+INSTALL_INI = "install.ini"
+SCAN = "scan"
+USER = "user"
+
+
+@dataclass
+class EngineInstall:
+    root: str
+    version: Optional[str] = None
+    major: int = 0
+    minor: int = 0
+    patch: int = 0
+    changelist: int = 0
+    branch: Optional[str] = None
+    platforms: List[str] = field(default_factory=list)
+    has_uat: bool = False
+    installed_build: bool = False
+    source: str = SCAN
+    # Problems reading the engine that didn't stop it from being listed
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def label(self):
+        return f"UE {self.version}" if self.version else os.path.basename(os.path.normpath(self.root))
+
+    @property
+    def version_key(self):
+        return self.major, self.minor, self.patch, self.changelist
+
+
+def plugin_engine_version(plugin):
+    """(major, minor) a .uplugin declares in EngineVersion, or None"""
+    try:
+        with open(plugin, 'r', encoding='utf-8-sig') as f:
+            version = json.load(f).get("EngineVersion")
+    except (json.JSONDecodeError, IOError, AttributeError):
+        return None
+    try:
+        parts = [int(part) for part in str(version).split(".")[:2]]
+    except ValueError:
+        return None
+    return tuple(parts) if len(parts) == 2 else None
+
+
+def _launcher_manifest():
+    if os.name == "nt":
+        base = os.environ.get("PROGRAMDATA", r"C:\ProgramData")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.path.expanduser("~/.config")
+    return os.path.join(base, "Epic", "UnrealEngineLauncher", "LauncherInstalled.dat")
+
+
+def _from_launcher():
+    """Engines installed through the Epic Games launcher"""
+    try:
+        with open(_launcher_manifest(), 'r', encoding='utf-8-sig') as f:
+            installations = json.load(f).get("InstallationList", [])
+    except (json.JSONDecodeError, IOError, AttributeError):
+        return []
+    return [
+        entry["InstallLocation"]
+        for entry in installations
+        if str(entry.get("AppName", "")).startswith("UE_") and entry.get("InstallLocation")
+    ]
+
+
+def _from_registry():
+    """Source builds registered with UnrealVersionSelector, and older launcher installs"""
+    if sys.platform != "win32":
+        return []
+    import winreg
+
+    roots = []
+    try:
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Epic Games\Unreal Engine\Builds") as key:
+            index = 0
+            while True:
+                try:
+                    roots.append(winreg.EnumValue(key, index)[1])
+                except OSError:
+                    break
+                index += 1
+    except OSError:
+        pass
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\EpicGames\Unreal Engine") as key:
+            index = 0
+            while True:
+                try:
+                    version = winreg.EnumKey(key, index)
+                except OSError:
+                    break
+                index += 1
+                try:
+                    with winreg.OpenKey(key, version) as subkey:
+                        roots.append(winreg.QueryValueEx(subkey, "InstalledDirectory")[0])
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return roots
+
+
+def _from_install_ini():
+    """Source builds registered on Linux/macOS (~/.config/Epic/UnrealEngine/Install.ini)"""
+    if os.name == "nt":
+        return []
+    parser = configparser.ConfigParser(strict=False, interpolation=None)
+    try:
+        parser.read(os.path.expanduser("~/.config/Epic/UnrealEngine/Install.ini"), encoding="utf-8")
+    except configparser.Error:
+        return []
+    if not parser.has_section("Installations"):
+        return []
+    return [path for _, path in parser.items("Installations")]
+
+
+def _scan_patterns():
+    if os.name == "nt":
+        bases = {os.environ.get(name) for name in ("ProgramFiles", "ProgramW6432")} - {None}
+        bases |= {f"{drive}:\\" for drive in "CDEF"}
+        patterns = []
+        for base in bases:
+            patterns += [os.path.join(base, "Epic Games", "UE_*"), os.path.join(base, "UnrealEngine*")]
+        return patterns
+    home = os.path.expanduser("~")
+    if sys.platform == "darwin":
+        return ["/Users/Shared/Epic Games/UE_*", os.path.join(home, "UnrealEngine*")]
+    return [
+        os.path.join(home, "UnrealEngine*"),
+        os.path.join(home, "UE_*"),
+        os.path.join(home, "Epic Games", "UE_*"),
+        "/opt/UnrealEngine*",
+        "/opt/UE_*",
+    ]
+
+
+def _from_scan():
+    """Engine folders in the usual install locations"""
+    roots = []
+    for pattern in _scan_patterns():
+        roots += [path for path in glob.glob(pattern) if os.path.isdir(os.path.join(path, "Engine"))]
+    return roots
+
+
+SOURCES = ((LAUNCHER, _from_launcher), (REGISTRY, _from_registry), (INSTALL_INI, _from_install_ini), (SCAN, _from_scan))
+
+
+def _stamp(root):
+    """Modification times that change when the engine is updated or platforms are added"""
+    stamp = []
+    for path in (
+        os.path.join(root, "Engine", "Build", "Build.version"),
+        os.path.join(root, "Engine", "Binaries"),
+        os.path.join(root, "Engine", "Platforms"),
+    ):
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return stamp
+
+
+def _version_number(version, name, warnings):
+    """An integer field of Build.version; 0 (unknown) with a warning if it isn't one"""
+    value = version.get(name, 0)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        warnings.append(f"Build.version has an invalid {name} ({value!r}), treated as 0")
+        return 0
+
+
+def inspect_engine(root, source=SCAN):
+    """Read an engine root's version and installed platforms"""
+    engine = EngineInstall(root=root, source=source)
+    version = engine_version(root) or {}
+    if not isinstance(version, dict):
+        engine.warnings.append("Build.version is not a JSON object, version unknown")
+        version = {}
+    if version:
+        engine.major = _version_number(version, "MajorVersion", engine.warnings)
+        engine.minor = _version_number(version, "MinorVersion", engine.warnings)
+        engine.patch = _version_number(version, "PatchVersion", engine.warnings)
+        engine.changelist = _version_number(version, "Changelist", engine.warnings)
+        engine.branch = version.get("BranchName")
+        engine.version = f"{engine.major}.{engine.minor}.{engine.patch}"
+    platforms = set()
+    for folder in ("Binaries", "Platforms"):
+        try:
+            platforms.update(name for name in os.listdir(os.path.join(root, "Engine", folder)) if name in KNOWN_PLATFORMS)
+        except OSError:
+            pass
+    engine.platforms = sorted(platforms)
+    engine.has_uat = os.path.isfile(uat_script(root))
+    engine.installed_build = os.path.isfile(os.path.join(root, "Engine", "Build", "InstalledBuild.txt"))
+    return engine
+
+
+class EngineRegistry:
+    """Installed engines, discovered in parallel and cached per root"""
+
+    def __init__(self, cache_path=ENGINE_CACHE_FILE):
+        self.cache_path = cache_path
+        self.engines = []
+        self._cache = self._load_cache()
+        self._lock = threading.Lock()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _save_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            temp = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temp, 'w') as f:
+                json.dump(self._cache, f, indent=2)
+            os.replace(temp, self.cache_path)
+        except OSError:
+            pass  # Only a cache, everything is re-read next time
+
+    def _engine(self, root, source):
+        """Cached EngineInstall for root, re-read if the engine changed on disk"""
+        key = os.path.normcase(os.path.abspath(root))
+        stamp = _stamp(root)
+        cached = self._cache.get(key)
+        if isinstance(cached, dict) and cached.get("stamp") == stamp:
+            try:
+                engine = EngineInstall(**cached["engine"])
+            except (TypeError, KeyError):
+                engine = None  # Written by a version with other fields, read the engine again
+            if engine:
+                engine.source = source
+                engine.has_uat = os.path.isfile(uat_script(root))
+                return engine
+        engine = inspect_engine(root, source)
+        with self._lock:
+            self._cache[key] = {"stamp": stamp, "engine": asdict(engine)}
+        return engine
+
+    def discover(self, extra_roots=()):
+        """Find every engine (plus extra_roots, e.g. folders the user picked); returns them newest first"""
+        with ThreadPoolExecutor(max_workers=len(SOURCES)) as pool:
+            found = list(pool.map(lambda source: (source[0], source[1]()), SOURCES))
+        candidates = {}
+        for root in extra_roots:
+            candidates.setdefault(os.path.normcase(os.path.abspath(root)), (root, USER))
+        for source, roots in found:
+            for root in roots:
+                candidates.setdefault(os.path.normcase(os.path.abspath(root)), (root, source))
+        existing = [(root, source) for root, source in candidates.values() if os.path.isdir(root)]
+        with ThreadPoolExecutor(max_workers=min(8, len(existing) or 1)) as pool:
+            engines = list(pool.map(lambda item: self._engine(*item), existing))
+        self._save_cache()
+        self.engines = sorted(engines, key=lambda engine: engine.version_key, reverse=True)
+        return self.engines
+
+    def get(self, root):
+        key = os.path.normcase(os.path.abspath(root))
+        for engine in self.engines:
+            if os.path.normcase(os.path.abspath(engine.root)) == key:
+                return engine
+        return self._engine(root, USER) if os.path.isdir(root) else None
+
+    def find(self, version):
+        """Newest engine whose version starts with version, e.g. '5.4' or '5.4.2'"""
+        parts = str(version).split(".")
+        for engine in self.engines:
+            if engine.version and engine.version.split(".")[:len(parts)] == parts:
+                return engine
+        return None
+
+    def compatible(self, plugin):
+        """Engines a plugin can be built with, best match first"""
+        wanted = plugin_engine_version(plugin)
+        usable = [engine for engine in self.engines if engine.has_uat]
+        if wanted is None:
+            return usable
+        return [engine for engine in usable if (engine.major, engine.minor) == wanted]
+
+    def match(self, plugin):
+        """Best engine for the EngineVersion a plugin declares, or None"""
+        if plugin_engine_version(plugin) is None:
+            return None
+        engines = self.compatible(plugin)
+        return engines[0] if engines else None
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .host import cpu_count
+from .instrumentation import metrics
+from .path_cache import DATA_DIR
+
+# Per-plugin file state indexes are kept next to the path cache
+INDEX_DIR = os.path.join(DATA_DIR, "plugin_index")
+
+# Parts of a plugin that end up in (or affect) the packaged output
+PLUGIN_INPUT_DIRS = ("Source", "Resources", "Content", "Config", "Shaders")
+
+# Files at least this big are hashed through a memory map instead of read()
+MMAP_THRESHOLD = 16 * 1024 * 1024
+# Files modified this close to a scan are re-hashed next time as well, since a
+# second write within the same mtime tick would otherwise go unnoticed
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+_hash_pool = ThreadPoolExecutor(max_workers=min(8, cpu_count()), thread_name_prefix="hash")
+_plugin_locks = {}
+_plugin_locks_guard = threading.Lock()
+
+
+def hash_file(path):
+    """blake2b digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                digest.update(data)
+        else:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan_dir(top, relative_top):
+    for entry in os.scandir(top):
+        relative = f"{relative_top}/{entry.name}"
+        if entry.is_dir(follow_symlinks=False):
+            yield from _scan_dir(entry.path, relative)
+        elif entry.is_file():
+            yield relative, entry.path, entry.stat()
+
+
+def scan_plugin_files(plugin):
+    """(relative path, absolute path, stat) of every file that feeds a plugin build"""
+    plugin = os.path.abspath(plugin)
+    plugin_dir = os.path.dirname(plugin)
+    yield os.path.basename(plugin), plugin, os.stat(plugin)
+    for folder in PLUGIN_INPUT_DIRS:
+        top = os.path.join(plugin_dir, folder)
+        if os.path.isdir(top):
+            yield from _scan_dir(top, folder)
+
+
+def _plugin_lock(key):
+    with _plugin_locks_guard:
+        return _plugin_locks.setdefault(key, threading.Lock())
+
+
+class FileIndex:
+    """Persistent path -> (size, mtime, inode, hash) index of one plugin's inputs"""
+
+    def __init__(self, plugin, index_dir=INDEX_DIR):
+        self.plugin = os.path.abspath(plugin)
+        key = hashlib.blake2b(os.path.normcase(self.plugin).encode("utf-8"), digest_size=6).hexdigest()
+        name = os.path.splitext(os.path.basename(plugin))[0]
+        self.path = os.path.join(index_dir, f"{name}-{key}.json")
+        self.files = {}
+        self.stats = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.files = json.load(f).get("files", {})
+        except (json.JSONDecodeError, IOError, AttributeError):
+            self.files = {}
+
+    @metrics.timed("file_index_save")
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            json.dump({"plugin": self.plugin, "files": self.files}, f, separators=(",", ":"))
+        os.replace(temp, self.path)
+
+    def update(self):
+        """Re-hash only files whose stat changed since the last scan; returns the tree hash"""
+        with _plugin_lock(self.path):
+            started = time.time()
+            scan_started_ns = time.time_ns()
+            self.load()
+            previous_count = len(self.files)
+            files = {}
+            changed = []
+            for relative, path, st in scan_plugin_files(self.plugin):
+                state = [st.st_size, st.st_mtime_ns, st.st_ino]
+                known = self.files.get(relative)
+                if known and known[:3] == state and known[3]:
+                    files[relative] = known
+                else:
+                    files[relative] = state + [None]
+                    changed.append((relative, path))
+
+            hashed_bytes = 0
+            for (relative, path), digest in zip(changed, _hash_pool.map(lambda item: hash_file(item[1]), changed)):
+                files[relative][3] = digest
+                hashed_bytes += files[relative][0]
+
+            tree_hash = self._tree_hash(files)
+            # Keep racy entries out of the saved index so they are hashed again
+            self.files = {
+                relative: state if scan_started_ns - state[1] > RACY_WINDOW_NS else state[:3] + [None]
+                for relative, state in files.items()
+            }
+            if changed or len(files) != previous_count or not os.path.exists(self.path):
+                self.save()
+            self.stats = {
+                "files": len(files),
+                "hashed": len(changed),
+                "hashed_bytes": hashed_bytes,
+                "seconds": time.time() - started,
+            }
+            return tree_hash
+
+    @staticmethod
+    def _tree_hash(files):
+        digest = hashlib.blake2b(digest_size=20)
+        for relative in sorted(files):
+            digest.update(relative.encode("utf-8") + b"\0")
+            digest.update(bytes.fromhex(files[relative][3]))
+        return digest.hexdigest()
+
+    def summary(self):
+        stats = self.stats
+        return (
+            f"Scanned {stats['files']} plugin files, re-hashed {stats['hashed']} "
+            f"({stats['hashed_bytes'] / 1024 ** 2:.1f} MB) in {stats['seconds']:.2f}s"
+        )
+
+
+def plugin_tree_hash(plugin, index_dir=INDEX_DIR):
+    """Hash of the .uplugin and every file in the plugin's input folders"""
+    return FileIndex(plugin, index_dir).update()
@@ -0,0 +1,106 @@
+import ctypes
+import ctypes.util
+import os
+import shutil
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Linux ioctl that shares extents between two files (btrfs, xfs, bcachefs, ...)
+FICLONE = 0x40049409
+
+REFLINK = "reflink"
+HARDLINK = "hardlink"
+COPY = "copy"
+
+_libc = None
+
+
+def _clonefile(src, dst):
+    """macOS copy-on-write clone (APFS)"""
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if _libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), dst)
+
+
+def reflink(src, dst):
+    """Copy-on-write copy of src to dst; raises OSError where unsupported"""
+    if sys.platform == "darwin":
+        _clonefile(src, dst)
+    elif fcntl and sys.platform.startswith("linux"):
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                os.unlink(dst)
+                raise
+        shutil.copystat(src, dst)
+    else:
+        raise OSError(f"reflinks are not supported on {sys.platform}")
+
+
+def place_file(src, dst, methods=(REFLINK, HARDLINK, COPY)):
+    """Put a copy of src at dst using the first method that works; returns it"""
+    for method in methods:
+        try:
+            if method == REFLINK:
+                reflink(src, dst)
+            elif method == HARDLINK:
+                os.link(src, dst)
+            else:
+                shutil.copy2(src, dst)
+            return method
+        except OSError:
+            if method == methods[-1]:
+                raise
+    return None
+
+
+def link_tree(src_dir, dst_dir, methods=(REFLINK, HARDLINK, COPY)):
+    """Recreate src_dir at dst_dir file by file; returns {method: file count}
+
+    The first method that works is tried first for the remaining files, so a
+    filesystem without reflink support only pays for one failed attempt.
+    """
+    counts = {}
+    preferred = list(methods)
+    for root, dirs, files in os.walk(src_dir):
+        target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            method = place_file(os.path.join(root, name), os.path.join(target_root, name), preferred)
+            counts[method] = counts.get(method, 0) + 1
+            if method != preferred[0]:
+                preferred = preferred[preferred.index(method):]
+    return counts
+
+
+def tree_size(path):
+    """Total size in bytes of all files under path"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def clear_directory(path):
+    """Delete the contents of path, creating it if it does not exist"""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        return
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
@@ -0,0 +1,998 @@
+import flet as ft
+import os
+import threading
+import time
+
+from .agents import AgentPool
+from .build_cache import BuildCache
+from .build_queue import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, BuildQueue
+from .deploy import INTERMEDIATE_EXCLUDES, Deployer
+from .commands import UatOptions, parse_platforms
+from .engines import KNOWN_PLATFORMS, EngineRegistry
+from .history import BuildHistory
+from .instrumentation import UI_UPDATES, instrument_method, metrics
+from .log_archive import LogArchive, search_logs
+from .log_buffer import LOG_DIR, LogBuffer, LogFlusher
+from .path_cache import PathCacheStore
+from .preflight import CHECKS, blocking_issues, run_preflight
+from .scheduler import ResourceScheduler
+from .uat_parser import format_duration
+from .watch import WatchSession
+from .workspace import WorkspaceSettings
+
+# Number of lines rendered in the terminal view
+TERMINAL_VIEW_LINES = 1000
+# How often running jobs are redrawn
+PROGRESS_REFRESH_SECONDS = 0.5
+# Lines shown around an error picked from an archived log
+ERROR_CONTEXT_LINES = 10
+# Matches shown for a search across archived logs
+SEARCH_RESULT_LINES = 500
+
+def main(page: ft.Page):
+    if metrics.enabled:
+        instrument_method(ft.Control, "update", "flet_update", UI_UPDATES)
+        instrument_method(ft.Page, "update", "flet_update", UI_UPDATES)
+    page.title = "unreal plugin rebuilder"
+    page.window_resizable = True
+    page.window.width = 800
+    page.window.height = 860
+    page.window.frameless = True
+    page.padding = 20
+    page.spacing = 15
+    page.scroll = ft.ScrollMode.AUTO
+    page.update()
+
+    engine_registry = EngineRegistry()
+
+    def engine_options():
+        options = [ft.dropdown.Option(path) for path in path_cache["ue_paths"]]
+        for engine in engine_registry.engines:
+            if engine.root not in path_cache["ue_paths"]:
+                options.append(ft.dropdown.Option(key=engine.root, text=f"{engine.root} ({engine.label}, {engine.source})"))
+        return options
+
+    # Pre-select the engine matching a plugin's EngineVersion if none is chosen yet
+    def suggest_engine(plugin):
+        if not plugin or selected_path(ue_dropdown, "No UE root"):
+            return
+        engine = engine_registry.match(plugin)
+        if engine:
+            ue_dropdown.value = engine.root
+            ue_dropdown.disabled = False
+            if ue_dropdown.page:
+                ue_dropdown.update()
+            update_terminal_output(f"Matched {engine.label} at {engine.root} to the plugin's EngineVersion")
+
+    # Terminal output components; the log exists first so path cache errors during start-up have somewhere to go
+    terminal_log = LogBuffer()
+
+    # Load cached paths
+    def path_cache_error(e):
+        terminal_log.append(f"Error: Could not save recent paths: {str(e)}")
+
+    path_cache = PathCacheStore(on_error=path_cache_error)
+
+    terminal_view = ft.ListView(
+        controls=[ft.Text("Ready to rebuild plugin...", selectable=True, size=12, color=ft.Colors.WHITE)],
+        spacing=0,
+        auto_scroll=True,
+    )
+    terminal_container = ft.Container(
+        content=terminal_view,
+        bgcolor=ft.Colors.BLACK,
+        padding=10,
+        border_radius=8,
+        height=200,
+        width=page.window.width - 40,
+    )
+
+    terminal_output = ft.Column(
+        [
+            ft.Text("Terminal Output:", size=16, weight=ft.FontWeight.BOLD),
+            terminal_container,
+        ],
+        scroll=ft.ScrollMode.AUTO,
+    )
+
+    # Progress indicator
+    progress_bar = ft.ProgressBar(visible=False, width=400)
+    progress_text = ft.Text("", size=12)
+    
+    # Create buttons
+    migration_button = ft.ElevatedButton(
+        "Begin Rebuild",
+        icon=ft.Icons.PLAY_ARROW,
+        on_click=lambda _: plugin_migration(),
+        width=200,
+    )
+    
+    stop_button = ft.ElevatedButton(
+        "Stop All",
+        icon=ft.Icons.STOP,
+        on_click=lambda _: stop_migration(),
+        width=200,
+        visible=False,
+    )
+
+    # Render a batch of new log lines, keeping only the visible tail in the view
+    @metrics.timed("terminal_flush")
+    def flush_terminal_lines(lines):
+        terminal_view.controls.extend(
+            ft.Text(line, selectable=True, size=12, color=ft.Colors.WHITE) for line in lines[-TERMINAL_VIEW_LINES:]
+        )
+        del terminal_view.controls[:-TERMINAL_VIEW_LINES]
+        terminal_view.update()
+
+    terminal_flusher = LogFlusher(terminal_log, flush_terminal_lines).start()
+
+    # Function to update terminal output
+    @metrics.timed("update_terminal_output")
+    def update_terminal_output(text, append=True):
+        if not append:
+            clear_terminal_output()
+        terminal_log.append(text)
+
+    # Function to clear terminal output; a job's log on screen is swapped for the (emptied) general log
+    def clear_terminal_output():
+        terminal_log.clear()
+        show_log(terminal_log)
+
+    # Show another log (the general one or a job's) in the terminal view
+    def show_log(buffer):
+        def render(lines):
+            terminal_view.controls = [
+                ft.Text(line, selectable=True, size=12, color=ft.Colors.WHITE) for line in lines[-TERMINAL_VIEW_LINES:]
+            ]
+            terminal_view.update()
+
+        terminal_flusher.switch(buffer, render)
+
+    # Build queue and job list
+    status_icons = {
+        QUEUED: (ft.Icons.SCHEDULE, ft.Colors.ON_SURFACE_VARIANT),
+        RUNNING: (ft.Icons.AUTORENEW, ft.Colors.PRIMARY),
+        SUCCEEDED: (ft.Icons.CHECK_CIRCLE, ft.Colors.GREEN),
+        FAILED: (ft.Icons.ERROR, ft.Colors.ERROR),
+        CANCELLED: (ft.Icons.CANCEL, ft.Colors.ON_SURFACE_VARIANT),
+    }
+    jobs_view = ft.Column(spacing=0)
+    jobs_lock = threading.Lock()
+
+    def phases_text(progress):
+        return "  |  ".join(
+            f"{phase.label} {'done ' + format_duration(phase.duration) if phase.finished else f'{phase.fraction * 100:.0f}%'}"
+            for phase in progress.phases
+        )
+
+    def job_row(job):
+        icon, color = status_icons[job.status]
+        progress = job.progress
+        details = []
+        if job.status == RUNNING:
+            details.append(ft.ProgressBar(value=progress.fraction, height=3))
+            details.append(ft.Text(progress.summary(), size=11, color=ft.Colors.ON_SURFACE_VARIANT))
+        elif job.finished and (progress.errors or progress.warnings):
+            details.append(
+                ft.Text(f"{progress.errors} errors, {progress.warnings} warnings", size=11, color=ft.Colors.ON_SURFACE_VARIANT)
+            )
+        if job.regression is not None:
+            details.append(
+                ft.Text(f"{job.regression * 100:.0f}% slower than the median of recent builds", size=11, color=ft.Colors.ERROR)
+            )
+        if progress.phases:
+            details.append(ft.Text(phases_text(progress), size=11, color=ft.Colors.ON_SURFACE_VARIANT))
+        row = ft.Row(
+            [
+                ft.Icon(icon, color=color, size=18),
+                ft.Text(job.label, size=12, expand=True),
+                ft.Text(f"{job.status} {format_duration(job.elapsed)}" if job.started_at else job.status, size=12),
+                ft.IconButton(
+                    icon=ft.Icons.ARTICLE,
+                    tooltip="Show log",
+                    on_click=lambda _, job=job: show_log(job.log),
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.ERROR_OUTLINE,
+                    tooltip="Jump to next error",
+                    visible=bool(job.finished and job.log.log_path and progress.errors),
+                    on_click=lambda _, job=job: show_next_error(job),
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.STOP,
+                    tooltip="Cancel job",
+                    disabled=job.finished,
+                    on_click=lambda _, job=job: build_queue.cancel(job.id),
+                ),
+            ],
+            spacing=5,
+        )
+        return ft.Column([row, *details], spacing=2)
+
+    @metrics.timed("refresh_jobs")
+    def refresh_jobs(job=None):
+        with jobs_lock:
+            jobs = list(build_queue.jobs)
+            jobs_view.controls = [job_row(j) for j in jobs]
+            counts = build_queue.counts()
+            active = build_queue.active
+            progress_bar.visible = active
+            stop_button.visible = active
+            if jobs:
+                progress_bar.value = sum(1.0 if j.finished else j.progress.fraction for j in jobs) / len(jobs)
+            running = [j for j in jobs if j.status == RUNNING]
+            progress_text.value = ", ".join(
+                f"{counts[status]} {status}"
+                for status in (RUNNING, QUEUED, SUCCEEDED, FAILED, CANCELLED)
+                if counts.get(status)
+            )
+            if len(running) == 1:
+                progress_text.value += f" - {running[0].progress.summary()}"
+            jobs_view.update()
+            progress_bar.update()
+            progress_text.update()
+            stop_button.update()
+
+    # Redraw running jobs so progress, ETA and counters keep moving
+    def refresh_progress_loop():
+        while True:
+            time.sleep(PROGRESS_REFRESH_SECONDS)
+            if build_queue.active:
+                try:
+                    refresh_jobs()
+                except Exception:
+                    pass
+
+    threading.Thread(target=refresh_progress_loop, daemon=True).start()
+
+    build_cache = BuildCache()
+    build_history = BuildHistory()
+    scheduler = ResourceScheduler()
+    build_queue = BuildQueue(
+        log_dir=LOG_DIR, on_job_update=refresh_jobs, cache=build_cache, history=build_history, scheduler=scheduler
+    )
+
+    def use_cache_changed(e):
+        build_queue.cache = build_cache if e.control.value else None
+
+    use_cache_checkbox = ft.Checkbox(
+        label="Reuse unchanged builds from cache",
+        value=True,
+        on_change=use_cache_changed,
+    )
+
+    def share_cores_changed(e):
+        build_queue.scheduler = scheduler if e.control.value else None
+
+    def workspace_changed(e):
+        build_queue.workspace = WorkspaceSettings() if e.control.value else None
+
+    workspace_checkbox = ft.Checkbox(
+        label="Reuse intermediates between builds",
+        value=False,
+        tooltip="Build the editor target in a persistent workspace with UBT, so only changed files are recompiled",
+        on_change=workspace_changed,
+    )
+
+    share_cores_checkbox = ft.Checkbox(
+        label="Split cores between parallel builds",
+        value=True,
+        on_change=share_cores_changed,
+    )
+
+    # BuildPlugin options passed to every build queued from here
+    target_platforms_field = ft.TextField(
+        label="Target platforms (optional)",
+        hint_text="Win64+Linux, empty for all installed",
+        tooltip="-TargetPlatforms; with \"No host platform\" a single platform is built on its own",
+        width=260,
+    )
+    no_host_platform_checkbox = ft.Checkbox(label="No host platform", value=False,
+                                            tooltip="-NoHostPlatform: skip the editor build for this machine")
+    rocket_checkbox = ft.Checkbox(label="Rocket", value=False, tooltip="-Rocket: build as for an installed engine")
+    strict_includes_checkbox = ft.Checkbox(label="Strict includes", value=False,
+                                           tooltip="-StrictIncludes: no PCH/unity builds, catches missing includes")
+    vs2022_checkbox = ft.Checkbox(label="VS2022", value=False, tooltip="-VS2022: compile with Visual Studio 2022")
+
+    def uat_args():
+        """BuildPlugin arguments from the options row, or None (after showing why) when they are invalid"""
+        platforms = parse_platforms(target_platforms_field.value or "")
+        unknown = [platform for platform in platforms if platform not in KNOWN_PLATFORMS]
+        if unknown:
+            update_terminal_output(f"Error: Unknown target platform {', '.join(unknown)} "
+                                   f"(known: {', '.join(KNOWN_PLATFORMS)})", append=False)
+            return None
+        return UatOptions(
+            target_platforms=platforms,
+            no_host_platform=no_host_platform_checkbox.value,
+            rocket=rocket_checkbox.value,
+            strict_includes=strict_includes_checkbox.value,
+            vs2022=vs2022_checkbox.value,
+        ).args()
+
+    # Comma separated agent URLs; builds go to the agents instead of this machine
+    def agents_changed(e):
+        urls = [url.strip() for url in (e.control.value or "").split(",") if url.strip()]
+        build_queue.agents = AgentPool(urls, os.environ.get("UE_PLUGIN_REBUILDER_AGENT_TOKEN")) if urls else None
+
+    agents_field = ft.TextField(
+        label="Build agents (optional)",
+        hint_text="http://buildbox:8765, ...",
+        on_blur=agents_changed,
+        on_submit=agents_changed,
+        expand=True,
+    )
+
+    def max_workers_changed(e):
+        try:
+            build_queue.set_max_workers(int(e.control.value))
+        except ValueError:
+            pass
+
+    max_workers_field = ft.TextField(
+        label="Max parallel builds",
+        value=str(build_queue.max_workers),
+        keyboard_type=ft.KeyboardType.NUMBER,
+        on_change=max_workers_changed,
+        width=180,
+    )
+
+    def clear_finished_jobs(e):
+        build_queue.clear_finished()
+        refresh_jobs()
+
+    # Print build time trends per plugin/engine into the terminal
+    def show_trends(e):
+        trends = build_history.trends()
+        show_log(terminal_log)
+        clear_terminal_output()
+        if not trends:
+            update_terminal_output("No build history yet")
+            return
+        update_terminal_output("Build time trends (latest vs rolling median of recent builds):")
+        for trend in trends:
+            change = f"{trend['change'] * 100:+.0f}%" if trend["change"] is not None else "n/a"
+            median = format_duration(trend["median"]) if trend["median"] else "n/a"
+            flag = "  <-- REGRESSION" if trend["regression"] else ""
+            update_terminal_output(
+                f"{trend['plugin']} @ {trend['engine']}: {trend['builds']} builds, median {median}, "
+                f"latest {format_duration(trend['latest'])} ({change}){flag}"
+            )
+
+    # Archived logs: step through a finished job's errors, or search every past build
+    error_cursors = {}
+
+    def show_next_error(job):
+        try:
+            archive = LogArchive(job.log.log_path)
+        except (OSError, RuntimeError) as error:
+            update_terminal_output(f"Error: Could not open {job.log.log_path}: {str(error)}")
+            return
+        if not archive.errors:
+            return
+        n = error_cursors.get(job.id, 0) % len(archive.errors) + 1
+        error_cursors[job.id] = n
+        number = archive.diagnostic_line(n)
+        show_log(terminal_log)
+        clear_terminal_output()
+        update_terminal_output(f"{job.label}: error {n} of {len(archive.errors)}, line {number} of {archive.total_lines}")
+        terminal_log.extend(
+            f"{'>' if line_number == number else ' '}{line_number:>8}  {text}"
+            for line_number, text in archive.around(number, ERROR_CONTEXT_LINES)
+        )
+
+    def search_archived_logs(e):
+        pattern = (log_search_field.value or "").strip()
+        if not pattern:
+            return
+        show_log(terminal_log)
+        clear_terminal_output()
+        update_terminal_output(f"Searching build logs for '{pattern}'...")
+
+        def search():
+            matches = search_logs(LOG_DIR, pattern, ignore_case=True, limit=SEARCH_RESULT_LINES)
+            update_terminal_output(f"{len(matches)} matches{' (stopped at the limit)' if len(matches) >= SEARCH_RESULT_LINES else ''}")
+            terminal_log.extend(f"{os.path.basename(path)}:{number}: {text}" for path, number, text in matches)
+
+        threading.Thread(target=search, daemon=True).start()
+
+    log_search_field = ft.TextField(
+        label="Search build logs",
+        on_submit=search_archived_logs,
+        dense=True,
+        width=250,
+    )
+
+    def export_history_result(e: ft.FilePickerResultEvent):
+        if e.path:
+            try:
+                with open(e.path, 'w', newline='', encoding='utf-8') as f:
+                    build_history.export_csv(f)
+                update_terminal_output(f"Build history exported to {e.path}")
+            except IOError as error:
+                update_terminal_output(f"Error: Could not export build history: {str(error)}")
+
+    export_history_dialog = ft.FilePicker(on_result=export_history_result)
+
+    # Function to stop every queued and running build (returns immediately,
+    # process trees are shut down in the background)
+    def stop_migration():
+        update_terminal_output("Stopping all rebuilds...")
+        if watch_switch.value:
+            watch_switch.value = False
+            watch_switch.update()
+            stop_watching()
+        build_queue.cancel_all()
+
+    # Theme selector
+    def theme_changed(e):
+        page.theme_mode = (
+            ft.ThemeMode.LIGHT
+            if page.theme_mode == ft.ThemeMode.DARK
+            else ft.ThemeMode.DARK
+        )
+        page.update()
+
+    page.theme_mode = ft.ThemeMode.DARK
+    page.theme = ft.Theme(font_family="Arial")
+
+    # UPlugin file dropdown and picker
+    def pick_files_result(e: ft.FilePickerResultEvent):
+        if e.files:
+            file_path = e.files[0].path
+            uplugin_dropdown.value = file_path
+            path_cache.add("uplugin_paths", file_path)
+            suggest_engine(file_path)
+            uplugin_dropdown.options = [ft.dropdown.Option(path) for path in path_cache["uplugin_paths"]]
+            uplugin_dropdown.disabled = False
+            refresh_matrix_options()
+            if hasattr(uplugin_dropdown, 'empty_text'):
+                uplugin_dropdown.empty_text.visible = False
+                uplugin_dropdown.empty_text.update()
+        else:
+            uplugin_dropdown.value = "No *.uplugin file was selected!"
+        uplugin_dropdown.update()
+
+    def uplugin_dropdown_changed(e):
+        if uplugin_dropdown.value and uplugin_dropdown.value != "No *.uplugin file was selected!":
+            path_cache.add("uplugin_paths", uplugin_dropdown.value)
+            suggest_engine(uplugin_dropdown.value)
+
+    def delete_uplugin_cache(e):
+        if uplugin_dropdown.value and uplugin_dropdown.value != "No *.uplugin file was selected!":
+            path_cache.remove("uplugin_paths", uplugin_dropdown.value)
+            refresh_matrix_options()
+            if path_cache["uplugin_paths"]:
+                uplugin_dropdown.options = [ft.dropdown.Option(path) for path in path_cache["uplugin_paths"]]
+                uplugin_dropdown.value = None
+            else:
+                uplugin_dropdown.options = []
+                uplugin_dropdown.value = None
+                uplugin_dropdown.disabled = True
+                if hasattr(uplugin_dropdown, 'empty_text'):
+                    uplugin_dropdown.empty_text.visible = True
+                    uplugin_dropdown.empty_text.update()
+            uplugin_dropdown.update()
+
+    pick_files_dialog = ft.FilePicker(on_result=pick_files_result)
+    uplugin_dropdown = ft.Dropdown(
+        label="Select .uplugin file",
+        options=[ft.dropdown.Option(path) for path in path_cache["uplugin_paths"]] if path_cache["uplugin_paths"] else [],
+        on_change=uplugin_dropdown_changed,
+        width=400,
+        expand=True,
+        disabled=not path_cache["uplugin_paths"]
+    )
+
+    # Save directory dropdown and picker
+    def save_directory_result(e: ft.FilePickerResultEvent):
+        if e.path:
+            save_dropdown.value = e.path
+            path_cache.add("save_paths", e.path)
+            save_dropdown.options = [ft.dropdown.Option(path) for path in path_cache["save_paths"]]
+            save_dropdown.disabled = False
+            refresh_deploy_targets()
+            if hasattr(save_dropdown, 'empty_text'):
+                save_dropdown.empty_text.visible = False
+                save_dropdown.empty_text.update()
+        else:
+            save_dropdown.value = "No save directory was selected!"
+        save_dropdown.update()
+
+    def save_dropdown_changed(e):
+        if save_dropdown.value and save_dropdown.value != "No save directory was selected!":
+            path_cache.add("save_paths", save_dropdown.value)
+
+    def delete_save_cache(e):
+        if save_dropdown.value and save_dropdown.value != "No save directory was selected!":
+            path_cache.remove("save_paths", save_dropdown.value)
+            refresh_deploy_targets()
+            if path_cache["save_paths"]:
+                save_dropdown.options = [ft.dropdown.Option(path) for path in path_cache["save_paths"]]
+                save_dropdown.value = None
+            else:
+                save_dropdown.options = []
+                save_dropdown.value = None
+                save_dropdown.disabled = True
+                if hasattr(save_dropdown, 'empty_text'):
+                    save_dropdown.empty_text.visible = True
+                    save_dropdown.empty_text.update()
+            save_dropdown.update()
+
+    save_directory_dialog = ft.FilePicker(on_result=save_directory_result)
+    save_dropdown = ft.Dropdown(
+        label="Plugin destination folder",
+        options=[ft.dropdown.Option(path) for path in path_cache["save_paths"]] if path_cache["save_paths"] else [],
+        on_change=save_dropdown_changed,
+        width=400,
+        expand=True,
+        disabled=not path_cache["save_paths"]
+    )
+
+    # UE directory dropdown and picker
+    def ue_get_directory_result(e: ft.FilePickerResultEvent):
+        if e.path:
+            ue_dropdown.value = e.path
+            path_cache.add("ue_paths", e.path)
+            ue_dropdown.options = engine_options()
+            ue_dropdown.disabled = False
+            refresh_matrix_options()
+            if hasattr(ue_dropdown, 'empty_text'):
+                ue_dropdown.empty_text.visible = False
+                ue_dropdown.empty_text.update()
+        else:
+            ue_dropdown.value = 'No UE root folder was selected! (Example "C:\\Program Files\\Epic Games\\UE_5.3)"'
+        ue_dropdown.update()
+
+    def ue_dropdown_changed(e):
+        if ue_dropdown.value and ue_dropdown.value != 'No UE root folder was selected! (Example "C:\\Program Files\\Epic Games\\UE_5.3)"':
+            path_cache.add("ue_paths", ue_dropdown.value)
+
+    def delete_ue_cache(e):
+        if ue_dropdown.value and ue_dropdown.value != 'No UE root folder was selected! (Example "C:\\Program Files\\Epic Games\\UE_5.3)"':
+            path_cache.remove("ue_paths", ue_dropdown.value)
+            refresh_matrix_options()
+            if engine_options():
+                ue_dropdown.options = engine_options()
+                ue_dropdown.value = None
+            else:
+                ue_dropdown.options = []
+                ue_dropdown.value = None
+                ue_dropdown.disabled = True
+                if hasattr(ue_dropdown, 'empty_text'):
+                    ue_dropdown.empty_text.visible = True
+                    ue_dropdown.empty_text.update()
+            ue_dropdown.update()
+
+    get_directory_dialog = ft.FilePicker(on_result=ue_get_directory_result)
+    ue_dropdown = ft.Dropdown(
+        label="Select UE root folder",
+        options=engine_options(),
+        on_change=ue_dropdown_changed,
+        width=400,
+        expand=True,
+        disabled=not path_cache["ue_paths"]
+    )
+
+    # Installed engines show up next to the folders picked by hand
+    def engines_discovered():
+        ue_dropdown.options = engine_options()
+        if ue_dropdown.options:
+            ue_dropdown.disabled = False
+        refresh_matrix_options()
+        if ue_dropdown.page:
+            ue_dropdown.update()
+        suggest_engine(selected_path(uplugin_dropdown, "No *.uplugin"))
+
+    def discover_engines():
+        try:
+            engine_registry.discover(path_cache["ue_paths"])
+        except Exception as e:
+            update_terminal_output(f"Error: Could not look for installed engines: {str(e)}")
+            return
+        engines_discovered()
+
+    # Hide all dialogs in overlay
+    page.overlay.extend(
+        [pick_files_dialog, save_directory_dialog, get_directory_dialog, export_history_dialog]
+    )
+
+    # Dropdown value, or None while it shows a "No ... selected" placeholder
+    def selected_path(dropdown, placeholder_prefix):
+        if not dropdown.value or str(dropdown.value).startswith(placeholder_prefix):
+            return None
+        return dropdown.value
+
+    # Build matrix: every checked plugin against every checked engine
+    matrix_plugins = ft.Column(spacing=0)
+    matrix_engines = ft.Column(spacing=0)
+
+    def refresh_matrix_options():
+        checked = {c.label for c in matrix_plugins.controls + matrix_engines.controls if c.value}
+        matrix_plugins.controls = [ft.Checkbox(label=path, value=path in checked) for path in path_cache["uplugin_paths"]]
+        engines = list(path_cache["ue_paths"]) + [e.root for e in engine_registry.engines if e.root not in path_cache["ue_paths"]]
+        matrix_engines.controls = [ft.Checkbox(label=path, value=path in checked) for path in engines]
+        if matrix_plugins.page:
+            matrix_plugins.update()
+            matrix_engines.update()
+
+    # Deploy after build: checked destination folders get every successful build synced into them
+    deploy_targets = ft.Column(spacing=0)
+
+    def deploy_settings_changed(e=None):
+        targets = [c.label for c in deploy_targets.controls if c.value]
+        excludes = INTERMEDIATE_EXCLUDES if skip_intermediates_checkbox.value else ()
+        build_queue.deployer = Deployer(targets, excludes, delete=delete_stale_checkbox.value) if targets else None
+
+    def refresh_deploy_targets():
+        checked = {c.label for c in deploy_targets.controls if c.value}
+        deploy_targets.controls = [
+            ft.Checkbox(label=path, value=path in checked, on_change=deploy_settings_changed)
+            for path in path_cache["save_paths"]
+        ]
+        deploy_settings_changed()
+        if deploy_targets.page:
+            deploy_targets.update()
+
+    skip_intermediates_checkbox = ft.Checkbox(
+        label="Skip Intermediate/ and .pdb files",
+        value=True,
+        on_change=deploy_settings_changed,
+    )
+
+    delete_stale_checkbox = ft.Checkbox(
+        label="Remove files an earlier deploy wrote that the build no longer has",
+        value=False,
+        on_change=deploy_settings_changed,
+    )
+
+    refresh_matrix_options()
+    refresh_deploy_targets()
+    threading.Thread(target=discover_engines, daemon=True).start()
+
+    preflight_checkbox = ft.Checkbox(
+        label="Run pre-flight checks",
+        value=True,
+        tooltip="Catch broken .uplugin files, missing modules, VisualStudioTools and low disk space before UAT starts",
+    )
+
+    # Runs the pre-flight checks; shows them and returns None when the build must not start, else the warnings
+    def preflight(pairs, destination, args):
+        skip = () if preflight_checkbox.value else [name for name in CHECKS if name != "inputs"]
+        issues = run_preflight(pairs, destination, skip=skip, extra_args=args)
+        if blocking_issues(issues):
+            update_terminal_output("\n".join(issue.describe() for issue in issues), append=False)
+            return None
+        return [issue.describe() for issue in issues]
+
+    def queue_matrix(e):
+        plugins = [c.label for c in matrix_plugins.controls if c.value]
+        engines = [c.label for c in matrix_engines.controls if c.value]
+        if not plugins or not engines:
+            update_terminal_output("Error: Check at least one plugin and one engine to queue", append=False)
+            return
+        destination = selected_path(save_dropdown, "No save")
+        args = uat_args()
+        if args is None:
+            return
+        warnings = preflight([(plugin, engine) for plugin in plugins for engine in engines], destination, args)
+        if warnings is None:
+            return
+        try:
+            jobs = build_queue.submit_matrix(plugins, engines, save_dropdown.value, args, notes=warnings)
+        except ValueError as e:
+            update_terminal_output(f"Error: {str(e)}", append=False)
+            return
+        show_log(jobs[0].log)
+
+    # Plugin migration function: queues the selected plugin/engine pair
+    def plugin_migration():
+        engine = selected_path(ue_dropdown, "No UE")
+        plugin = selected_path(uplugin_dropdown, "No *.uplugin")
+        destination = selected_path(save_dropdown, "No save")
+        args = uat_args()
+        if args is None:
+            return
+
+        warnings = preflight([(plugin, engine)], destination, args)
+        if warnings is None:
+            return
+
+        try:
+            job = build_queue.submit(plugin, engine, os.path.join(destination, "Migrated"), args, notes=warnings)
+        except ValueError as e:
+            update_terminal_output(f"Error: {str(e)}", append=False)
+            return
+        show_log(job.log)
+
+    # Watch mode: rebuild the selected plugin/engine pair whenever the plugin's sources change
+    watch_session = None
+
+    def stop_watching():
+        nonlocal watch_session
+        if watch_session:
+            watch_session.stop()
+            watch_session = None
+            update_terminal_output("Stopped watching")
+
+    def watch_changed(e):
+        nonlocal watch_session
+        stop_watching()
+        if not e.control.value:
+            return
+        engine = selected_path(ue_dropdown, "No UE")
+        plugin = selected_path(uplugin_dropdown, "No *.uplugin")
+        destination = selected_path(save_dropdown, "No save")
+        args = uat_args()
+        warnings = None if args is None else preflight([(plugin, engine)], destination, args)
+        if warnings is not None:
+            try:
+                watch_session = WatchSession(
+                    build_queue, plugin, engine, os.path.join(destination, "Migrated"), args,
+                    on_build=lambda job: show_log(job.log), notes=warnings
+                ).start()
+            except ValueError as error:
+                update_terminal_output(f"Error: {str(error)}", append=False)
+                warnings = None
+        if warnings is None:
+            e.control.value = False
+            e.control.update()
+            return
+
+    watch_switch = ft.Switch(
+        label="Rebuild on save",
+        value=False,
+        tooltip="Watch the selected plugin and rebuild it (for this machine's platform unless target platforms are set) whenever its sources change",
+        on_change=watch_changed,
+    )
+
+    # Helper to create input sections with consistent styling
+    def create_input_section(title, button_text, button_icon, dropdown, delete_func, browse_func, empty_message):
+        empty_text = ft.Text(
+            empty_message,
+            size=12,
+            color=ft.Colors.ON_SURFACE_VARIANT,
+            visible=dropdown.disabled,
+        )
+        
+        # Store reference to empty_text for later updates
+        dropdown.empty_text = empty_text
+        
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text(title, size=14, weight=ft.FontWeight.BOLD, color=ft.Colors.PRIMARY),
+                    empty_text,
+                    ft.Row(
+                        [
+                            ft.ElevatedButton(
+                                button_text,
+                                icon=button_icon,
+                                on_click=browse_func,
+                                disabled=page.web,
+                            ),
+                            ft.Container(dropdown, expand=True),
+                            ft.IconButton(
+                                icon=ft.Icons.DELETE,
+                                tooltip="Delete selected path from cache",
+                                on_click=delete_func,
+                            ),
+                        ],
+                        spacing=10,
+                    ),
+                ],
+                spacing=5,
+            ),
+            padding=15,
+            border_radius=0,
+            bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.PRIMARY_CONTAINER),
+            border=ft.border.all(0, ft.Colors.OUTLINE),
+        )
+
+    # Build input sections
+    uplugin_section = create_input_section(
+        "Plugin File (.uplugin)",
+        "Browse",
+        ft.Icons.UPLOAD_FILE,
+        uplugin_dropdown,
+        delete_uplugin_cache,
+        lambda _: pick_files_dialog.pick_files(allowed_extensions=["uplugin"]),
+        "No cached files - use Browse button first",
+    )
+
+    save_section = create_input_section(
+        "Destination Folder",
+        "Browse",
+        ft.Icons.SAVE,
+        save_dropdown,
+        delete_save_cache,
+        lambda _: save_directory_dialog.get_directory_path(),
+        "No cached folders - use Browse button first",
+    )
+
+    ue_section = create_input_section(
+        "Unreal Engine Root",
+        "Browse",
+        ft.Icons.FOLDER_OPEN,
+        ue_dropdown,
+        delete_ue_cache,
+        lambda _: get_directory_dialog.get_directory_path(),
+        "No cached UE folders - use Browse button first",
+    )
+
+    # App layout
+    page.add(
+        # Header
+        ft.WindowDragArea(
+            content=ft.Container(
+                content=ft.Row(
+                    [
+                        ft.Container(expand=True),  # Add an expandable container to center the content
+                        ft.GestureDetector(
+                            content=ft.Text(
+                                "unreal plugin rebuilder",
+                                size=24,
+                                weight=ft.FontWeight.BOLD,
+                                font_family="Arial",
+                                color=ft.Colors.PRIMARY,
+                            ),
+                            on_tap=theme_changed,
+                        ),
+                        ft.Container(expand=True),  # Add an expandable container to center the content
+                        ft.IconButton(
+                            icon=ft.Icons.CLOSE,
+                            tooltip="Close",
+                            on_click=lambda _: page.window.close(),
+                            style=ft.ButtonStyle(
+                                color=ft.Colors.ON_ERROR_CONTAINER,
+                            ),
+                        ),
+                    ]
+                ),
+                padding=ft.Padding(0, 0, 0, 20),
+            ),
+        ),
+
+        # Inputs
+        ft.Container(
+            content=ft.Column(
+                [
+                    uplugin_section,
+                    save_section,
+                    ue_section,
+                ],
+                spacing=15,
+            ),
+            padding=ft.Padding(0, 0, 0, 20),
+        ),
+
+        # Build matrix
+        ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text("Build Matrix", size=14, weight=ft.FontWeight.BOLD, color=ft.Colors.PRIMARY),
+                    ft.Row(
+                        [
+                            ft.Column([ft.Text("Plugins", size=12), matrix_plugins], expand=True),
+                            ft.Column([ft.Text("Engines", size=12), matrix_engines], expand=True),
+                        ],
+                        vertical_alignment=ft.CrossAxisAlignment.START,
+                    ),
+                    ft.Row(
+                        [
+                            use_cache_checkbox,
+                            workspace_checkbox,
+                            share_cores_checkbox,
+                            preflight_checkbox,
+                            max_workers_field,
+                            ft.ElevatedButton(
+                                "Queue Matrix",
+                                icon=ft.Icons.QUEUE,
+                                on_click=queue_matrix,
+                            ),
+                        ],
+                        spacing=10,
+                    ),
+                    ft.Row(
+                        [
+                            target_platforms_field,
+                            no_host_platform_checkbox,
+                            rocket_checkbox,
+                            strict_includes_checkbox,
+                            vs2022_checkbox,
+                        ],
+                        spacing=10,
+                    ),
+                    ft.Row([agents_field]),
+                ],
+                spacing=5,
+            ),
+            padding=15,
+            bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.PRIMARY_CONTAINER),
+        ),
+
+        # Deploy after build
+        ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text("Deploy After Build", size=14, weight=ft.FontWeight.BOLD, color=ft.Colors.PRIMARY),
+                    ft.Text("Sync each successful build into these projects", size=12),
+                    deploy_targets,
+                    skip_intermediates_checkbox,
+                    delete_stale_checkbox,
+                ],
+                spacing=5,
+            ),
+            padding=15,
+            bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.PRIMARY_CONTAINER),
+        ),
+
+        # Action + progress
+        ft.Container(
+            content=ft.Column(
+                [
+                    ft.Row(
+                        [
+                            ft.Container(
+                                content=migration_button,
+                                alignment=ft.alignment.center,
+                            ),
+                            ft.Container(
+                                content=stop_button,
+                                alignment=ft.alignment.center,
+                            ),
+                            watch_switch,
+                        ],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                        spacing=20,
+                    ),
+                    ft.Container(
+                        content=ft.Column(
+                            [progress_bar, progress_text],
+                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                        ),
+                        padding=10,
+                    ),
+                    ft.Row(
+                        [
+                            ft.Text("Jobs", size=16, weight=ft.FontWeight.BOLD),
+                            ft.IconButton(
+                                icon=ft.Icons.CLEAR_ALL,
+                                tooltip="Remove finished jobs",
+                                on_click=clear_finished_jobs,
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.INSIGHTS,
+                                tooltip="Show build time trends",
+                                on_click=show_trends,
+                            ),
+                            ft.IconButton(
+                                icon=ft.Icons.DOWNLOAD,
+                                tooltip="Export build history as CSV",
+                                on_click=lambda _: export_history_dialog.save_file(
+                                    file_name="build_history.csv", allowed_extensions=["csv"]
+                                ),
+                                disabled=page.web,
+                            ),
+                            log_search_field,
+                        ],
+                    ),
+                    jobs_view,
+                ],
+                spacing=10,
+            ),
+            padding=ft.Padding(0, 0, 0, 20),
+        ),
+
+        # Terminal output
+        ft.Container(
+            content=terminal_output,
+            padding=ft.Padding(0, 0, 0, 0),
+        ),
+    )
+
+
+
+def run():
+    """Open the rebuilder window"""
+    ft.app(target=main)
@@ -0,0 +1,142 @@
+import csv
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+
+from .instrumentation import metrics
+from .path_cache import DATA_DIR
+
+# Append-only build timing history, one JSON record per line
+HISTORY_FILE = os.path.join(DATA_DIR, "build_history.jsonl")
+
+# Builds this much slower than the rolling median are flagged
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+DEFAULT_WINDOW = 10
+
+CSV_FIELDS = [
+    "time", "plugin", "engine", "engine_version", "host", "status", "exit_code",
+    "wall_time", "peak_rss", "cache_hit", "errors", "warnings", "phases",
+]
+
+
+def job_record(job, engine_version=None):
+    """History record for a finished build job"""
+    return {
+        "time": round(job.started_at or job.queued_at, 3),
+        "plugin": os.path.splitext(os.path.basename(job.plugin))[0],
+        "plugin_path": job.plugin,
+        "engine": job.engine,
+        "engine_version": engine_version,
+        "host": socket.gethostname(),
+        "status": job.status,
+        "exit_code": job.returncode,
+        "wall_time": round(job.elapsed, 3),
+        "phases": [{"name": phase.label, "seconds": round(phase.duration, 3)} for phase in job.progress.phases],
+        "peak_rss": job.peak_rss,
+        "cache_hit": job.cache_hit,
+        "errors": job.progress.errors,
+        "warnings": job.progress.warnings,
+    }
+
+
+def series_key(record):
+    """Builds of the same plugin against the same engine version are comparable"""
+    return record["plugin"], record.get("engine_version") or record["engine"]
+
+
+def comparable(record):
+    """Only full, successful builds say anything about compile times"""
+    return record.get("status") == "succeeded" and not record.get("cache_hit")
+
+
+class BuildHistory:
+    """Append-only JSONL store of build timings"""
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @metrics.timed("history_append")
+    def append(self, record):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            # One write call per record keeps concurrent appenders from interleaving
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def records(self, plugin=None, engine_version=None):
+        """All stored records, oldest first, optionally filtered"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crashed instance
+                if plugin and record.get("plugin") != plugin:
+                    continue
+                if engine_version and engine_version not in (record.get("engine_version"), record.get("engine")):
+                    continue
+                records.append(record)
+        return records
+
+    def rolling_median(self, record, window=DEFAULT_WINDOW, records=None):
+        """Median wall time of the previous comparable builds of the same series"""
+        key = series_key(record)
+        previous = [
+            r["wall_time"]
+            for r in (records if records is not None else self.records())
+            if series_key(r) == key and comparable(r) and r["time"] < record["time"]
+        ][-window:]
+        return statistics.median(previous) if previous else None
+
+    def check_regression(self, record, threshold=DEFAULT_REGRESSION_THRESHOLD, window=DEFAULT_WINDOW, records=None):
+        """Relative slowdown versus the rolling median if it exceeds threshold, else None"""
+        if not comparable(record):
+            return None
+        median = self.rolling_median(record, window, records)
+        if not median:
+            return None
+        change = record["wall_time"] / median - 1
+        return change if change > threshold else None
+
+    def trends(self, threshold=DEFAULT_REGRESSION_THRESHOLD, window=DEFAULT_WINDOW, plugin=None, engine_version=None):
+        """Per plugin/engine series: build count, median, latest build and its change vs the median"""
+        records = self.records(plugin, engine_version)
+        series = {}
+        for record in records:
+            if comparable(record):
+                series.setdefault(series_key(record), []).append(record)
+        trends = []
+        for (plugin_name, engine), builds in sorted(series.items()):
+            latest = builds[-1]
+            median = self.rolling_median(latest, window, records)
+            change = latest["wall_time"] / median - 1 if median else None
+            trends.append({
+                "plugin": plugin_name,
+                "engine": engine,
+                "builds": len(builds),
+                "median": median,
+                "latest": latest["wall_time"],
+                "change": change,
+                "regression": change is not None and change > threshold,
+                "peak_rss": latest.get("peak_rss"),
+            })
+        return trends
+
+    def export_csv(self, stream, plugin=None, engine_version=None):
+        writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in self.records(plugin, engine_version):
+            row = dict(record)
+            row["time"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["time"]))
+            row["phases"] = "; ".join(f"{p['name']}={p['seconds']}" for p in record.get("phases", []))
+            writer.writerow(row)
@@ -0,0 +1,85 @@
+import ctypes
+import os
+import subprocess
+import sys
+
+try:
+    import psutil  # Optional, only used for more accurate memory numbers
+except ImportError:
+    psutil = None
+
+# Rough resources one UAT BuildPlugin run needs to not starve its compiler
+CORES_PER_BUILD = 4
+MEMORY_PER_BUILD = 8 * 1024 ** 3
+
+
+def cpu_count():
+    """Number of logical cores usable by this process"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def available_memory():
+    """Bytes of physical memory currently available, or None if unknown"""
+    if psutil:
+        return psutil.virtual_memory().available
+    if sys.platform == "win32":
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, ValueError):
+        pass
+    if sys.platform == "darwin":
+        try:
+            output = subprocess.run(["vm_stat"], capture_output=True, text=True, timeout=2).stdout
+            page_size = os.sysconf("SC_PAGE_SIZE")
+            free_pages = 0
+            for line in output.splitlines():
+                if line.startswith(("Pages free", "Pages inactive", "Pages speculative")):
+                    free_pages += int(line.split(":")[1].strip().rstrip("."))
+            return free_pages * page_size
+        except (OSError, ValueError, subprocess.SubprocessError):
+            pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def max_parallel_builds(cores_per_build=CORES_PER_BUILD, memory_per_build=MEMORY_PER_BUILD):
+    """How many builds this machine can run side by side, capped by cores and RAM"""
+    limit = max(1, cpu_count() // cores_per_build)
+    memory = available_memory()
+    if memory is not None:
+        limit = min(limit, max(1, memory // memory_per_build))
+    return limit
+
+
+def host_platform():
+    """UBT name of the platform this machine builds for natively"""
+    if sys.platform == "win32":
+        return "Win64"
+    if sys.platform == "darwin":
+        return "Mac"
+    return "Linux"
@@ -0,0 +1,293 @@
+"""Opt-in timers and counters for the rebuilder's own overhead
+
+Tells wrapper slowness (reading output, redrawing the UI, writing JSON
+files) apart from UAT's. Everything records into the process-wide `metrics`
+object, which does nothing until enable_metrics() is called, so the hooks
+left in hot paths cost a single attribute check when metrics are off.
+
+Snapshots can be appended to a JSON lines file every few seconds (with
+per-second rates) or served in the Prometheus text format. A session can
+also be profiled with cProfile across all of its threads.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds between snapshots written to the metrics file
+METRICS_INTERVAL = 5.0
+# Port commonly used by exporters; the agent uses 8765
+DEFAULT_METRICS_PORT = 9464
+METRIC_PREFIX = "plugin_rebuilder_"
+# cProfile runs on the process-wide sys.monitoring from 3.12: one profiler sees every thread and a
+# second one can't be enabled, before that each thread needs a profiler of its own
+PROFILE_PER_THREAD = sys.version_info < (3, 12)
+
+# Counters the hooks in this package feed
+OUTPUT_LINES = "output_lines"
+OUTPUT_BATCHES = "output_batches"
+OUTPUT_READS_PAUSED = "output_reads_paused"
+DROPPED_LINES = "dropped_lines"
+UI_UPDATES = "ui_updates"
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+_NO_TIMER = nullcontext()
+
+
+class Metrics:
+    """Named counters, timers (count, total and max seconds) and gauges"""
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.time()
+        self.counters = {}
+        self.timers = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            with self._lock:
+                timer = self.timers.get(name)
+                if timer is None:
+                    self.timers[name] = [1, seconds, seconds]
+                else:
+                    timer[0] += 1
+                    timer[1] += seconds
+                    if seconds > timer[2]:
+                        timer[2] = seconds
+
+    def timer(self, name):
+        """Context manager timing its block into name"""
+        return _Timer(self, name) if self.enabled else _NO_TIMER
+
+    def timed(self, name):
+        """Decorator timing every call into name"""
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started)
+            return wrapper
+        return decorate
+
+    def gauge(self, name, read):
+        """Report read() as the current value of name in every snapshot"""
+        with self._lock:
+            self.gauges[name] = read
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            timers = {
+                name: {"count": count, "seconds": round(total, 6), "max": round(longest, 6)}
+                for name, (count, total, longest) in self.timers.items()
+            }
+            gauges = dict(self.gauges)
+        values = {}
+        for name, read in gauges.items():
+            try:
+                values[name] = read()
+            except Exception:
+                pass  # The object behind the gauge is gone or mid-update
+        return {"time": round(time.time(), 3), "counters": counters, "timers": timers, "gauges": values}
+
+    def prometheus_text(self):
+        """Current values in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines += [f"# TYPE {METRIC_PREFIX}{name}_total counter", f"{METRIC_PREFIX}{name}_total {value}"]
+        for name, timer in sorted(snapshot["timers"].items()):
+            metric = f"{METRIC_PREFIX}{name}_seconds"
+            lines += [
+                f"# TYPE {metric} summary",
+                f"{metric}_count {timer['count']}",
+                f"{metric}_sum {timer['seconds']}",
+                f"# TYPE {metric}_max gauge",
+                f"{metric}_max {timer['max']}",
+            ]
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines += [f"# TYPE {METRIC_PREFIX}{name} gauge", f"{METRIC_PREFIX}{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def enable_metrics():
+    metrics.enabled = True
+    metrics.started = time.time()
+    return metrics
+
+
+def instrument_method(cls, name, timer_name, counter=None):
+    """Time every call of cls.name (e.g. a UI toolkit's update()), counting them into counter as well"""
+    original = getattr(cls, name)
+    if getattr(original, "_instrumented", False):
+        return
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        if counter:
+            metrics.count(counter)
+        with metrics.timer(timer_name):
+            return original(*args, **kwargs)
+
+    wrapper._instrumented = True
+    setattr(cls, name, wrapper)
+
+
+class MetricsFileWriter:
+    """Appends a snapshot with per-second counter rates to a JSON lines file every interval"""
+
+    def __init__(self, path, interval=METRICS_INTERVAL, source=metrics):
+        self.path = path
+        self.interval = interval
+        self.source = source
+        self._previous = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop after writing one last snapshot"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def write(self):
+        snapshot = self.source.snapshot()
+        previous = self._previous or {"time": self.source.started, "counters": {}}
+        elapsed = max(snapshot["time"] - previous["time"], 1e-6)
+        snapshot["rates"] = {
+            f"{name}_per_second": round((value - previous["counters"].get(name, 0)) / elapsed, 2)
+            for name, value in snapshot["counters"].items()
+        }
+        self._previous = snapshot
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+        self.write()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.source.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scraped every few seconds, not worth a line each
+
+
+def serve_metrics(host="127.0.0.1", port=DEFAULT_METRICS_PORT, source=metrics):
+    """Serve /metrics for Prometheus on a daemon thread; returns the server (server_address has the port)"""
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.source = source
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+class SessionProfiler:
+    """cProfile over the calling thread and every thread started while it runs
+
+    The result is a standard .prof (pstats) file: open it with
+    `python -m pstats`, snakeviz, or turn it into a flame graph with
+    flameprof/gprof2dot. For a sampling profile of a session that is already
+    running, attach py-spy to the pid instead.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._per_thread = False
+
+    def _new_profile(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def _thread_started(self, frame, event, arg):
+        # Runs once as the profile hook of each new thread, then hands it to cProfile
+        try:
+            self._new_profile()
+        except ValueError:
+            pass  # Another profiler owns this thread (or the whole process); leave it unprofiled
+
+    def start(self):
+        self._new_profile()
+        if PROFILE_PER_THREAD:
+            self._per_thread = True
+            threading.setprofile(self._thread_started)
+        return self
+
+    def stop(self, path):
+        """Stop profiling and write the merged stats of every thread to path"""
+        if self._per_thread:
+            threading.setprofile(None)
+        with self._lock:
+            profiles = list(self._profiles)
+        profiles[0].disable()
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass  # Thread that never ran a profiled call
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        stats.dump_stats(path)
+        return stats
@@ -0,0 +1,326 @@
+"""Compressed build logs that can be read back without unpacking them
+
+A log is written as a series of independently compressed blocks (gzip
+members, or zstd frames when the zstandard package is installed), so the
+file is still a normal .gz/.zst that zcat/zstdcat can print. Next to it a
+.idx file gets one JSON line per block: where the block starts, its first
+line number and the line numbers of the errors and warnings in it. Readers
+load the small index and decompress only the blocks they actually need.
+"""
+import bisect
+import gzip
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .uat_parser import ERROR, Diagnostic, parse_line
+
+try:
+    import zstandard  # Optional, smaller and faster than gzip
+except ImportError:
+    zstandard = None
+
+# Uncompressed bytes per block; a random read decompresses at most this much
+BLOCK_SIZE = 256 * 1024
+# A partial block is written out on flush once it is this old, so a crash loses little
+MAX_BLOCK_AGE = 5.0
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+INDEX_SUFFIX = ".idx"
+# Matches returned per search unless asked for more
+DEFAULT_SEARCH_LIMIT = 1000
+
+PLAIN = "plain"
+GZIP = "gzip"
+ZSTD = "zstd"
+SUFFIXES = {ZSTD: ".log.zst", GZIP: ".log.gz", PLAIN: ".log"}
+
+
+def archive_suffix():
+    """File suffix new build logs get"""
+    return SUFFIXES[ZSTD] if zstandard else SUFFIXES[GZIP]
+
+
+def log_format(path):
+    for format, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return format
+    return PLAIN
+
+
+def is_log_file(name):
+    return any(name.endswith(suffix) for suffix in SUFFIXES.values())
+
+
+def _decompress(format, data):
+    if format == GZIP:
+        return gzip.decompress(data)
+    if format == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Reading .zst logs needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class PlainLogWriter:
+    """Uncompressed log file, one line per line"""
+
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8', errors='replace')
+
+    def write_lines(self, lines):
+        for line in lines:
+            self._file.write(line)
+            self._file.write("\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class LogArchiveWriter:
+    """Appends lines to a block-compressed log and its index"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = log_format(path)
+        if self.format == ZSTD and zstandard is None:
+            raise RuntimeError("Writing .zst logs needs the zstandard package (pip install zstandard)")
+        self.total_lines = _indexed_lines(path + INDEX_SUFFIX)
+        self._data = open(path, 'ab')
+        self._index = open(path + INDEX_SUFFIX, 'a', encoding='utf-8')
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if self.format == ZSTD else None
+        self._start_block()
+
+    def _start_block(self):
+        self._block = []
+        self._block_bytes = 0
+        self._block_errors = []
+        self._block_warnings = []
+        self._block_started = time.time()
+
+    def write_lines(self, lines):
+        for line in lines:
+            self.total_lines += 1
+            if "rror" in line or "arning" in line or line[:1] in "EW":
+                event = parse_line(line)
+                if type(event) is Diagnostic:
+                    (self._block_errors if event.severity == ERROR else self._block_warnings).append(self.total_lines)
+            data = line.encode('utf-8', errors='replace') + b"\n"
+            self._block.append(data)
+            self._block_bytes += len(data)
+            if self._block_bytes >= BLOCK_SIZE:
+                self._write_block()
+
+    def _write_block(self):
+        if not self._block:
+            return
+        data = b"".join(self._block)
+        if self._compressor:
+            compressed = self._compressor.compress(data)
+        else:
+            compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        offset = self._data.tell()
+        self._data.write(compressed)
+        # Data first, so the index never points past the end of the file
+        self._data.flush()
+        record = {
+            "offset": offset,
+            "size": len(compressed),
+            "first": self.total_lines - len(self._block) + 1,
+            "lines": len(self._block),
+            "errors": self._block_errors,
+            "warnings": self._block_warnings,
+        }
+        self._index.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._index.flush()
+        self._start_block()
+
+    def flush(self):
+        if self._block and time.time() - self._block_started >= MAX_BLOCK_AGE:
+            self._write_block()
+
+    def close(self):
+        self._write_block()
+        self._data.close()
+        self._index.close()
+
+
+def open_log_writer(path):
+    """Writer for path: block-compressed for .log.gz/.log.zst, plain text otherwise"""
+    return PlainLogWriter(path) if log_format(path) == PLAIN else LogArchiveWriter(path)
+
+
+def _read_index(index_path):
+    records = []
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # Torn last record of a crashed build
+    except OSError:
+        pass
+    return records
+
+
+def _indexed_lines(index_path):
+    records = _read_index(index_path)
+    return records[-1]["first"] + records[-1]["lines"] - 1 if records else 0
+
+
+class LogArchive:
+    """Random access to a build log by line number, error number or pattern
+
+    Compressed logs are read through their index; plain .log files are
+    indexed with one pass over the file when opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = log_format(path)
+        self.blocks = []  # (offset, size, first line, line count)
+        self.errors = []
+        self.warnings = []
+        if self.format == PLAIN:
+            self._index_plain()
+        else:
+            for record in _read_index(path + INDEX_SUFFIX):
+                self.blocks.append((record["offset"], record["size"], record["first"], record["lines"]))
+                self.errors += record["errors"]
+                self.warnings += record["warnings"]
+        self._firsts = [block[2] for block in self.blocks]
+
+    def _index_plain(self):
+        offset = 0
+        number = 0
+        block_offset, block_first, block_bytes = 0, 1, 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                number += 1
+                offset += len(raw)
+                block_bytes += len(raw)
+                line = raw.decode('utf-8', errors='replace').strip()
+                event = parse_line(line) if "rror" in line or "arning" in line or line[:1] in "EW" else None
+                if type(event) is Diagnostic:
+                    (self.errors if event.severity == ERROR else self.warnings).append(number)
+                if block_bytes >= BLOCK_SIZE:
+                    self.blocks.append((block_offset, block_bytes, block_first, number - block_first + 1))
+                    block_offset, block_first, block_bytes = offset, number + 1, 0
+        if block_bytes:
+            self.blocks.append((block_offset, block_bytes, block_first, number - block_first + 1))
+
+    @property
+    def total_lines(self):
+        if not self.blocks:
+            return 0
+        return self.blocks[-1][2] + self.blocks[-1][3] - 1
+
+    def _block_text(self, f, block):
+        offset, size = block[0], block[1]
+        f.seek(offset)
+        return _decompress(self.format, f.read(size)).decode('utf-8', errors='replace')
+
+    def _block_lines(self, f, block):
+        return self._block_text(f, block).split("\n")[:block[3]]
+
+    def lines(self, first, count):
+        """[(line number, line)] for count lines from line number first (1-based)"""
+        first = max(1, first)
+        last = min(self.total_lines, first + count - 1)
+        result = []
+        if last < first:
+            return result
+        with open(self.path, 'rb') as f:
+            index = bisect.bisect_right(self._firsts, first) - 1
+            while index < len(self.blocks) and self.blocks[index][2] <= last:
+                block = self.blocks[index]
+                for number, line in enumerate(self._block_lines(f, block), block[2]):
+                    if first <= number <= last:
+                        result.append((number, line.rstrip("\r")))
+                index += 1
+        return result
+
+    def around(self, number, context=5):
+        return self.lines(number - context, 2 * context + 1)
+
+    def diagnostic_line(self, n, severity=ERROR):
+        """Line number of the nth (1-based) error or warning, or None"""
+        numbers = self.errors if severity == ERROR else self.warnings
+        return numbers[n - 1] if 1 <= n <= len(numbers) else None
+
+    def grep(self, pattern, limit=DEFAULT_SEARCH_LIMIT):
+        """[(line number, line)] matching a compiled regex, one block in memory at a time"""
+        matches = []
+        # ^ and $ must match at every line of a block, not only at its ends
+        block_pattern = re.compile(pattern.pattern, pattern.flags | re.MULTILINE)
+        with open(self.path, 'rb') as f:
+            for block in self.blocks:
+                text = self._block_text(f, block)
+                if "\r" in text:
+                    text = text.replace("\r\n", "\n")
+                if not block_pattern.search(text):
+                    continue  # Most blocks don't match at all, skip splitting them
+                for number, line in enumerate(text.split("\n")[:block[3]], block[2]):
+                    if pattern.search(line):
+                        matches.append((number, line))
+                        if len(matches) >= limit:
+                            return matches
+        return matches
+
+
+def compile_pattern(pattern, regex=False, ignore_case=False):
+    return re.compile(pattern if regex else re.escape(pattern), re.IGNORECASE if ignore_case else 0)
+
+
+def list_logs(log_dir):
+    """Build logs in log_dir, newest first, with line and diagnostic counts for indexed ones"""
+    try:
+        names = [name for name in os.listdir(log_dir) if is_log_file(name)]
+    except OSError:
+        return []
+    logs = []
+    for name in names:
+        path = os.path.join(log_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entry = {"path": path, "size": stat.st_size, "modified": stat.st_mtime,
+                 "lines": None, "errors": None, "warnings": None}
+        if log_format(path) != PLAIN:
+            records = _read_index(path + INDEX_SUFFIX)
+            entry["lines"] = _indexed_lines(path + INDEX_SUFFIX)
+            entry["errors"] = sum(len(record["errors"]) for record in records)
+            entry["warnings"] = sum(len(record["warnings"]) for record in records)
+        logs.append(entry)
+    return sorted(logs, key=lambda entry: -entry["modified"])
+
+
+def search_logs(log_dir, pattern, regex=False, ignore_case=False, limit=DEFAULT_SEARCH_LIMIT, paths=None):
+    """[(path, line number, line)] across every log (or paths), newest log first
+
+    Logs are searched in parallel; zlib and zstd decompress without holding
+    the GIL.
+    """
+    compiled = compile_pattern(pattern, regex, ignore_case)
+    paths = paths or [entry["path"] for entry in list_logs(log_dir)]
+
+    def search(path):
+        try:
+            return [(path, number, line) for number, line in LogArchive(path).grep(compiled, limit)]
+        except Exception:
+            return []  # Unreadable or half-written log
+
+    matches = []
+    with ThreadPoolExecutor(max_workers=min(8, len(paths) or 1)) as pool:
+        for found in pool.map(search, paths):
+            matches += found[:limit - len(matches)]
+            if len(matches) >= limit:
+                break
+    return matches
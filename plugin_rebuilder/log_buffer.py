@@ -0,0 +1,157 @@
+import itertools
+import os
+import threading
+from collections import deque
+
+from .instrumentation import DROPPED_LINES, metrics
+from .log_archive import open_log_writer
+from .path_cache import DATA_DIR
+
+# Full build logs are written here; the UI only keeps the tail
+LOG_DIR = os.path.join(DATA_DIR, "logs")
+# Lines kept in memory per log; everything else only lives in the log file
+DEFAULT_CAPACITY = 5000
+# How often the flusher pushes new lines to the UI
+DEFAULT_FLUSH_INTERVAL_MS = 100
+
+
+class LogBuffer:
+    """Bounded ring buffer of log lines, mirrored in full to a file on disk
+
+    The file is block-compressed and indexed for .log.gz/.log.zst paths (see
+    log_archive), plain text otherwise.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, log_path=None):
+        self.capacity = capacity
+        self.lines = deque(maxlen=capacity)
+        self.total_lines = 0
+        self.dropped_lines = 0
+        self.log_path = None
+        self._pending = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._file = None
+        if log_path:
+            self.open_file(log_path)
+
+    def open_file(self, log_path):
+        """Start mirroring every appended line to log_path"""
+        self.close_file()
+        directory = os.path.dirname(log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._file = open_log_writer(log_path)
+            self.log_path = log_path
+
+    def close_file(self):
+        """Flush and close the log file, if one is open"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def append(self, text):
+        """Add one or more lines (text may contain newlines)"""
+        self.extend(str(text).split("\n"))
+
+    def extend(self, new_lines):
+        """Add a batch of lines under a single lock acquisition"""
+        new_lines = list(new_lines)  # Iterated twice, a generator would leave the file empty
+        with self._lock:
+            dropped = self.dropped_lines
+            for line in new_lines:
+                if len(self.lines) == self.capacity:
+                    self.dropped_lines += 1
+                self.lines.append(line)
+                self._pending.append(line)
+                self.total_lines += 1
+            if self._file:
+                self._file.write_lines(new_lines)
+        metrics.count(DROPPED_LINES, self.dropped_lines - dropped)
+
+    def drain(self):
+        """Return the lines added since the last drain (at most capacity of them)"""
+        with self._lock:
+            if not self._pending:
+                return []
+            pending = list(self._pending)
+            self._pending.clear()
+            if self._file:
+                self._file.flush()
+            return pending
+
+    def snapshot(self, reset_pending=False):
+        """Return a copy of the lines currently held in memory
+
+        With reset_pending the returned lines also count as drained, so a view
+        can switch to this buffer without rendering any line twice.
+        """
+        with self._lock:
+            if reset_pending:
+                self._pending.clear()
+            return list(self.lines)
+
+    def since(self, offset):
+        """Lines from line number offset on that are still in memory, and the next offset
+
+        Readers that fall more than capacity lines behind skip what was dropped.
+        """
+        with self._lock:
+            first = self.total_lines - len(self.lines)
+            start = max(offset, first) - first
+            return list(itertools.islice(self.lines, start, None)), self.total_lines
+
+    def clear(self):
+        """Forget buffered lines; the log file is left untouched"""
+        with self._lock:
+            self.lines.clear()
+            self._pending.clear()
+            self.total_lines = 0
+            self.dropped_lines = 0
+
+
+class LogFlusher:
+    """Background thread that batches new buffer lines into periodic callbacks"""
+
+    def __init__(self, buffer, on_flush, interval_ms=DEFAULT_FLUSH_INTERVAL_MS):
+        self.buffer = buffer
+        self.on_flush = on_flush
+        self.interval = interval_ms / 1000
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread after one final flush"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines = self.buffer.drain()
+            if lines:
+                self.on_flush(lines)
+
+    def switch(self, buffer, on_snapshot):
+        """Follow another buffer, handing its current contents to on_snapshot first"""
+        with self._lock:
+            self.buffer = buffer
+            on_snapshot(buffer.snapshot(reset_pending=True))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                pass  # A failed UI update must not kill the flusher
@@ -0,0 +1,212 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from .instrumentation import metrics
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def user_data_dir():
+    """Per-user folder for the tool's files (overridable with UE_PLUGIN_REBUILDER_HOME)"""
+    override = os.environ.get("UE_PLUGIN_REBUILDER_HOME")
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Roaming")
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "unreal-plugin-rebuilder")
+
+
+# Everything the tool keeps between runs lives here, whatever the working directory
+DATA_DIR = user_data_dir()
+
+# Database file path
+DB_FILE = os.path.join(DATA_DIR, "path_cache.json")
+# Where older versions kept it (relative to the working directory)
+LEGACY_DB_FILE = "path_cache.json"
+
+PATH_TYPES = ("uplugin_paths", "save_paths", "ue_paths")
+MAX_ENTRIES = 10
+# Dropdown changes within this many seconds are written in one go
+SAVE_DELAY = 0.5
+# A failed save is tried again after this many seconds
+RETRY_DELAY = 5.0
+
+
+def empty_path_cache():
+    return {path_type: [] for path_type in PATH_TYPES}
+
+
+def load_path_cache(path=DB_FILE):
+    """Load cached paths from JSON file"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return empty_path_cache()
+    cache_data = empty_path_cache()
+    if isinstance(data, dict):
+        for path_type in PATH_TYPES:
+            cache_data[path_type] = [p for p in data.get(path_type, []) if isinstance(p, str)][:MAX_ENTRIES]
+    return cache_data
+
+
+def _add(cache_data, path_type, path):
+    entries = [p for p in cache_data[path_type] if p != path]
+    cache_data[path_type] = [path, *entries][:MAX_ENTRIES]  # Most recent first
+
+
+def _remove(cache_data, path_type, path):
+    cache_data[path_type] = [p for p in cache_data[path_type] if p != path]
+
+
+class FileLock:
+    """Exclusive lock on path + '.lock', shared by every instance of the tool"""
+
+    def __init__(self, path, timeout=10):
+        self.path = path + ".lock"
+        self.timeout = timeout
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                if os.name == "nt":
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except OSError:
+                if time.time() > deadline:
+                    self._file.close()
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+
+
+class PathCacheStore:
+    """Recently used paths, kept in memory and saved in the background
+
+    Changes are recorded as add/remove operations and written after SAVE_DELAY
+    of quiet. A save takes the file lock, re-reads the file, replays the
+    pending operations on top of whatever other instances wrote meanwhile and
+    atomically replaces it, so concurrent instances never lose each other's
+    entries.
+    """
+
+    def __init__(self, path=DB_FILE, delay=SAVE_DELAY, on_error=None):
+        self.path = path
+        self.delay = delay
+        self.on_error = on_error
+        self.last_error = None
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._migrate_legacy_file()
+        self.data = load_path_cache(path)
+        atexit.register(self.flush)
+
+    def __getitem__(self, path_type):
+        return self.data[path_type]
+
+    def add(self, path_type, path):
+        """Add a path to the front of its list if it's valid"""
+        if path:
+            self._change(_add, path_type, path)
+
+    def remove(self, path_type, path):
+        if path in self.data[path_type]:
+            self._change(_remove, path_type, path)
+
+    def _change(self, operation, path_type, path):
+        with self._lock:
+            operation(self.data, path_type, path)
+            self._pending.append((operation, path_type, path))
+            self._schedule(self.delay)
+
+    def _schedule(self, delay):
+        """(Re)start the save timer; call with _lock held"""
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @metrics.timed("path_cache_save")
+    def flush(self):
+        """Write pending changes now, merged with the file's current contents"""
+        # One save at a time keeps the operations in order; _lock is only held for the in-memory part,
+        # so add()/remove() on the UI thread never wait for another instance's file lock
+        with self._flush_lock:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._pending:
+                    return True
+                pending, self._pending = self._pending, []
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with FileLock(self.path):
+                    merged = load_path_cache(self.path)
+                    for operation, path_type, path in pending:
+                        operation(merged, path_type, path)
+                    self._write(merged)
+            except (OSError, TimeoutError) as e:
+                with self._lock:
+                    # Keep the changes for the next attempt, unless a change made meanwhile already set one up
+                    self._pending = pending + self._pending
+                    if not self._timer:
+                        self._schedule(RETRY_DELAY)
+                self.last_error = str(e)
+                if self.on_error:
+                    self.on_error(e)
+                return False
+            with self._lock:
+                # Other instances' entries come in with the merge, changes made meanwhile stay on top
+                for operation, path_type, path in self._pending:
+                    operation(merged, path_type, path)
+                self.data = merged
+            self.last_error = None
+            return True
+
+    def _write(self, cache_data):
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(cache_data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def _migrate_legacy_file(self):
+        """Import the working directory's path_cache.json from older versions once"""
+        if os.path.exists(self.path) or self.path != DB_FILE or not os.path.isfile(LEGACY_DB_FILE):
+            return
+        legacy = load_path_cache(LEGACY_DB_FILE)
+        for path_type in PATH_TYPES:
+            for path in reversed(legacy[path_type]):
+                self._pending.append((_add, path_type, path))
+        self.flush()
@@ -0,0 +1,245 @@
+"""Checks that catch doomed builds before UAT spends minutes starting up
+
+Every check is a function registered with @preflight_check, declaring which
+build inputs it looks at. A batch of builds runs each check once per distinct
+input (a plugin's JSON is read once however many engines it's queued for), all
+of them in parallel, so the whole stage normally takes a few milliseconds.
+Errors block the build, warnings are only shown.
+"""
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional
+
+from .build_queue import validate_build_inputs
+from .uat_parser import ERROR
+
+# Checks still running after this long block the build, as whatever they guard went unchecked
+PREFLIGHT_TIMEOUT = 2.0
+# Module rules files, <Module>.Build.cs
+BUILD_RULES_SUFFIX = ".Build.cs"
+# Free space the package folder needs for the host project, intermediates and binaries
+MIN_FREE_SPACE = 3 * 1024 ** 3
+# Where the launcher and the README put the plugin that breaks UAT since 5.3
+VISUAL_STUDIO_TOOLS_DIRS = (
+    os.path.join("Engine", "Plugins", "VisualStudioTools"),
+    os.path.join("Engine", "Plugins", "Marketplace", "VisualStudioTools"),
+)
+
+# name -> (check, inputs it takes)
+CHECKS = {}
+
+
+@dataclass
+class PreflightIssue:
+    check: str
+    severity: str
+    message: str
+    fix: Optional[str] = None
+
+    @property
+    def blocking(self):
+        return self.severity == ERROR
+
+    def describe(self):
+        text = f"{'Error' if self.blocking else 'Warning'}: {self.message}"
+        return f"{text} ({self.fix})" if self.fix else text
+
+
+def preflight_check(name, uses):
+    """Register check(*inputs) -> [(severity, message, fix), ...]; uses names the inputs
+
+    Inputs are plugin, engine (a UE root, or a version for remote builds),
+    destination, local_engine and extra_args (the UAT arguments, a tuple).
+    """
+    def register(check):
+        CHECKS[name] = (check, tuple(uses))
+        return check
+    return register
+
+
+def local_engine_root(engine):
+    return engine if engine and os.path.isdir(engine) else None
+
+
+_uplugin_cache = {}
+_uplugin_lock = threading.Lock()
+
+
+def read_uplugin(plugin):
+    """Parsed .uplugin, re-read only when the file changes; raises ValueError/OSError"""
+    stat = os.stat(plugin)
+    key = (os.path.abspath(plugin), stat.st_mtime_ns, stat.st_size)
+    with _uplugin_lock:
+        if key in _uplugin_cache:
+            return _uplugin_cache[key]
+    with open(plugin, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    with _uplugin_lock:
+        _uplugin_cache[key] = data
+    return data
+
+
+@preflight_check("inputs", uses=("plugin", "engine", "destination", "local_engine", "extra_args"))
+def check_inputs(plugin, engine, destination, local_engine, extra_args):
+    return [(ERROR, error, None)
+            for error in validate_build_inputs(plugin, engine, destination, local_engine, extra_args)]
+
+
+@preflight_check("visual_studio_tools", uses=("engine",))
+def check_visual_studio_tools(engine):
+    root = local_engine_root(engine)
+    if not root:
+        return []
+    return [
+        (
+            ERROR,
+            f"VisualStudioTools is installed in this engine: {os.path.join(root, folder)}",
+            "UAT fails with 'ArgumentNullException: Value cannot be null. (Parameter 'element')' while it is, "
+            "move the folder out of the engine and try again",
+        )
+        for folder in VISUAL_STUDIO_TOOLS_DIRS
+        if os.path.isdir(os.path.join(root, folder))
+    ]
+
+
+@preflight_check("uplugin", uses=("plugin",))
+def check_uplugin(plugin):
+    if not plugin or not os.path.isfile(plugin):
+        return []  # Reported by the inputs check
+    try:
+        data = read_uplugin(plugin)
+    except json.JSONDecodeError as e:
+        return [(ERROR, f"{os.path.basename(plugin)} is not valid JSON: {e.msg} at line {e.lineno}, column {e.colno}",
+                 "fix the file in a text editor, a trailing comma is the usual culprit")]
+    except (OSError, UnicodeDecodeError) as e:
+        return [(ERROR, f"Can't read {plugin}: {e}", None)]
+    if not isinstance(data, dict):
+        return [(ERROR, f"{os.path.basename(plugin)} must contain a JSON object", None)]
+    if not isinstance(data.get("Modules", []), list):
+        return [(ERROR, f"'Modules' in {os.path.basename(plugin)} must be a list", None)]
+    return []
+
+
+@preflight_check("modules", uses=("plugin",))
+def check_modules(plugin):
+    if not plugin:
+        return []
+    try:
+        modules = read_uplugin(plugin).get("Modules", [])
+    except (OSError, ValueError, AttributeError):
+        return []  # Reported by the uplugin check
+    if not isinstance(modules, list):
+        return []
+    plugin_dir = os.path.dirname(os.path.abspath(plugin))
+    file = os.path.basename(plugin)
+    # UBT finds rules files anywhere under Source (Source/Runtime/<Name>/ is common), named after the module
+    rules = {}
+    for root, _, files in os.walk(os.path.join(plugin_dir, "Source")):
+        for name in files:
+            if name.lower().endswith(BUILD_RULES_SUFFIX.lower()):
+                relative = os.path.relpath(os.path.join(root, name), plugin_dir).replace(os.sep, "/")
+                rules.setdefault(name[:-len(BUILD_RULES_SUFFIX)], relative)
+    issues = []
+    for index, module in enumerate(modules):
+        name = module.get("Name") if isinstance(module, dict) else None
+        if not name:
+            issues.append((ERROR, f"Modules[{index}] in {file} has no Name", None))
+            continue
+        if name in rules:
+            continue
+        other_case = [found for found in rules if found.lower() == name.lower()]
+        if other_case:
+            fix = f"rename {rules[other_case[0]]} to {name}{BUILD_RULES_SUFFIX}, UBT matches module names case-sensitively"
+        elif not rules:
+            fix = "BuildPlugin needs the plugin's source code, this looks like a binary-only plugin"
+        else:
+            fix = f"fix the Name in {file} or add the rules file, Source has rules for {', '.join(sorted(rules))}"
+        issues.append((ERROR, f"Module '{name}' has no {name}{BUILD_RULES_SUFFIX} under Source", fix))
+    return issues
+
+
+@preflight_check("destination", uses=("plugin", "destination"))
+def check_destination(plugin, destination):
+    if not plugin or not destination or not os.path.isfile(plugin):
+        return []
+    plugin_dir = os.path.realpath(os.path.dirname(os.path.abspath(plugin)))
+    target = os.path.realpath(destination)
+    try:
+        inside = os.path.normcase(os.path.commonpath([plugin_dir, target])) == os.path.normcase(plugin_dir)
+    except ValueError:
+        inside = False  # Different drives
+    if not inside:
+        return []
+    return [(
+        ERROR,
+        f"Destination {destination} is inside the plugin folder",
+        f"UAT copies the whole plugin folder into the package, pick a folder outside {plugin_dir}",
+    )]
+
+
+def existing_parent(path):
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return path
+
+
+@preflight_check("disk_space", uses=("destination",))
+def check_disk_space(destination):
+    if not destination:
+        return []
+    try:
+        free = shutil.disk_usage(existing_parent(destination)).free
+    except OSError:
+        return []
+    if free >= MIN_FREE_SPACE:
+        return []
+    return [(
+        ERROR,
+        f"Only {free / 1024 ** 3:.1f} GB free for {destination}, a plugin build needs about "
+        f"{MIN_FREE_SPACE / 1024 ** 3:.0f} GB",
+        "free up space or pick a destination on another drive",
+    )]
+
+
+def run_preflight(pairs, destination, local_engine=True, skip=(), timeout=PREFLIGHT_TIMEOUT, extra_args=()):
+    """Issues found by the registered checks for (plugin, engine) pairs, errors first"""
+    tasks = {}
+    for plugin, engine in pairs:
+        inputs = {"plugin": plugin, "engine": engine, "destination": destination, "local_engine": local_engine,
+                  "extra_args": tuple(extra_args)}
+        for name, (check, uses) in CHECKS.items():
+            if name not in skip:
+                tasks.setdefault((name,) + tuple(inputs[use] for use in uses), (name, check))
+    if not tasks:
+        return []
+    pool = ThreadPoolExecutor(max_workers=min(16, len(tasks)), thread_name_prefix="preflight")
+    futures = {pool.submit(check, *key[1:]): (key, name) for key, (name, check) in tasks.items()}
+    done, not_done = wait(futures, timeout=timeout)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    issues = []
+    for future, (key, name) in futures.items():
+        fix = None if name == "inputs" else f"skip it with --skip-check {name}, or untick pre-flight checks in the GUI, to build anyway"
+        if future in not_done:
+            issues.append(PreflightIssue(name, ERROR, f"Check '{name}' took longer than {timeout:g}s", fix))
+            continue
+        try:
+            found = future.result()
+        except Exception as e:
+            issues.append(PreflightIssue(name, ERROR, f"Check '{name}' failed: {e}", fix))
+            continue
+        for severity, message, fix in found:
+            issue = PreflightIssue(name, severity, message, fix)
+            if issue not in issues:
+                issues.append(issue)
+    order = list(CHECKS)
+    return sorted(issues, key=lambda issue: (not issue.blocking, order.index(issue.check)))
+
+
+def blocking_issues(issues):
+    return [issue for issue in issues if issue.blocking]
@@ -0,0 +1,412 @@
+import ctypes
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import psutil  # Optional, needed for process trees on Windows
+except ImportError:
+    psutil = None
+
+# Cancellation escalation: graceful signal, then force after these timeouts
+GRACEFUL_TIMEOUT = 5.0
+FORCE_TIMEOUT = 5.0
+
+
+def _parse_ps_time(value):
+    """[[dd-]hh:]mm:ss as printed by ps, in seconds"""
+    days = 0
+    if "-" in value:
+        days, value = value.split("-", 1)
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    return int(days) * 86400 + seconds
+
+
+def _proc_table():
+    """{pid: (ppid, rss bytes, cpu seconds)} for every process, without psutil"""
+    table = {}
+    if os.path.isdir("/proc"):
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        ticks = os.sysconf("SC_CLK_TCK")
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", 'rb') as f:
+                    stat = f.read().decode("utf-8", "replace")
+                # The command name may contain spaces, fields after it are fixed
+                fields = stat[stat.rindex(")") + 2:].split()
+                cpu = (int(fields[11]) + int(fields[12])) / ticks
+                table[int(name)] = (int(fields[1]), int(fields[21]) * page_size, cpu)
+            except (OSError, ValueError, IndexError):
+                continue
+    elif sys.platform != "win32":
+        try:
+            output = subprocess.run(
+                ["ps", "-A", "-o", "pid=,ppid=,rss=,time="], capture_output=True, text=True, timeout=5
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return table
+        for line in output.splitlines():
+            try:
+                pid, ppid, rss, cpu = line.split()
+                table[int(pid)] = (int(ppid), int(rss) * 1024, _parse_ps_time(cpu))
+            except ValueError:
+                continue
+    return table
+
+
+def _descendants(pid, table):
+    children = {}
+    for child, (parent, *_) in table.items():
+        children.setdefault(parent, []).append(child)
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def descendants(pid):
+    """Pids of every process below pid (children, grandchildren, ...)"""
+    if psutil:
+        try:
+            return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    return _descendants(pid, _proc_table())
+
+
+def tree_rss(pid):
+    """Resident memory of pid and all its descendants in bytes, or None if unknown"""
+    if psutil:
+        try:
+            root = psutil.Process(pid)
+            total = 0
+            for process in [root, *root.children(recursive=True)]:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+    table = _proc_table()
+    if pid not in table:
+        return None
+    return sum(table[p][1] for p in [pid, *_descendants(pid, table)] if p in table)
+
+
+def tree_cpu_times(pid):
+    """{pid: cpu seconds used so far} for pid and all its descendants"""
+    if psutil:
+        times = {}
+        try:
+            root = psutil.Process(pid)
+            processes = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return times
+        for process in processes:
+            try:
+                cpu = process.cpu_times()
+                times[process.pid] = cpu.user + cpu.system
+            except psutil.Error:
+                pass
+        return times
+    table = _proc_table()
+    if pid not in table:
+        return {}
+    return {p: table[p][2] for p in [pid, *_descendants(pid, table)] if p in table}
+
+
+def pid_alive(pid):
+    if psutil:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    if sys.platform == "win32":
+        return False  # Only reachable without psutil, where job objects do the counting
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            stat = f.read()
+        return stat[stat.rindex(b")") + 2:][:1] != b"Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def popen_group_kwargs():
+    """Popen arguments that put the child (and everything it spawns) in its own group"""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+if sys.platform == "win32":
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+    JOB_OBJECT_LIMIT_AFFINITY = 0x10
+    JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE = 0x2000
+    JobObjectBasicAccountingInformation = 1
+    JobObjectExtendedLimitInformation = 9
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount",
+        )]
+
+    class JOBOBJECT_BASIC_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("PerProcessUserTimeLimit", ctypes.c_int64),
+            ("PerJobUserTimeLimit", ctypes.c_int64),
+            ("LimitFlags", wintypes.DWORD),
+            ("MinimumWorkingSetSize", ctypes.c_size_t),
+            ("MaximumWorkingSetSize", ctypes.c_size_t),
+            ("ActiveProcessLimit", wintypes.DWORD),
+            ("Affinity", ctypes.c_size_t),
+            ("PriorityClass", wintypes.DWORD),
+            ("SchedulingClass", wintypes.DWORD),
+        ]
+
+    class JOBOBJECT_EXTENDED_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("BasicLimitInformation", JOBOBJECT_BASIC_LIMIT_INFORMATION),
+            ("IoInfo", IO_COUNTERS),
+            ("ProcessMemoryLimit", ctypes.c_size_t),
+            ("JobMemoryLimit", ctypes.c_size_t),
+            ("PeakProcessMemoryUsed", ctypes.c_size_t),
+            ("PeakJobMemoryUsed", ctypes.c_size_t),
+        ]
+
+    class JOBOBJECT_BASIC_ACCOUNTING_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("TotalUserTime", ctypes.c_int64),
+            ("TotalKernelTime", ctypes.c_int64),
+            ("ThisPeriodTotalUserTime", ctypes.c_int64),
+            ("ThisPeriodTotalKernelTime", ctypes.c_int64),
+            ("TotalPageFaultCount", wintypes.DWORD),
+            ("TotalProcesses", wintypes.DWORD),
+            ("ActiveProcesses", wintypes.DWORD),
+            ("TotalTerminatedProcesses", wintypes.DWORD),
+        ]
+
+
+class JobObject:
+    """Windows job object holding a build's whole process tree"""
+
+    def __init__(self):
+        self.handle = _kernel32.CreateJobObjectW(None, None)
+        if not self.handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        # Closing the handle (e.g. the tool crashing) takes the build down with it
+        info = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+        info.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE
+        _kernel32.SetInformationJobObject(
+            self.handle, JobObjectExtendedLimitInformation, ctypes.byref(info), ctypes.sizeof(info)
+        )
+
+    @classmethod
+    def for_process(cls, process):
+        """Job object containing process, or None where job objects are unavailable"""
+        if sys.platform != "win32":
+            return None
+        try:
+            job = cls()
+            if not _kernel32.AssignProcessToJobObject(job.handle, wintypes.HANDLE(int(process._handle))):
+                job.close()
+                return None
+            return job
+        except OSError:
+            return None
+
+    def accounting(self):
+        """(active process count, cpu seconds used by every process ever in the job)"""
+        info = JOBOBJECT_BASIC_ACCOUNTING_INFORMATION()
+        _kernel32.QueryInformationJobObject(
+            self.handle, JobObjectBasicAccountingInformation, ctypes.byref(info), ctypes.sizeof(info), None
+        )
+        return info.ActiveProcesses, (info.TotalUserTime + info.TotalKernelTime) / 1e7
+
+    def set_affinity(self, cpus):
+        """Pin every process in the job (current and future) to the given cpu ids"""
+        info = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+        info.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE | JOB_OBJECT_LIMIT_AFFINITY
+        info.BasicLimitInformation.Affinity = sum(1 << cpu for cpu in cpus)
+        return bool(_kernel32.SetInformationJobObject(
+            self.handle, JobObjectExtendedLimitInformation, ctypes.byref(info), ctypes.sizeof(info)
+        ))
+
+    def terminate(self, exit_code=1):
+        _kernel32.TerminateJobObject(self.handle, exit_code)
+
+    def close(self):
+        if self.handle:
+            _kernel32.CloseHandle(self.handle)
+            self.handle = None
+
+
+def kill_tree(pid):
+    """Force-kill a process started with popen_group_kwargs() and everything in its group, without waiting"""
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True)
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class TreeTerminator:
+    """Stops a process tree in the background: graceful signal, wait, then force
+
+    The report (filled in when done) holds how many processes were reaped, how
+    much CPU time they had used and whether force was needed.
+    """
+
+    def __init__(self, process, job_object=None, graceful_timeout=GRACEFUL_TIMEOUT,
+                 force_timeout=FORCE_TIMEOUT, on_done=None):
+        self.process = process
+        self.job_object = job_object
+        self.graceful_timeout = graceful_timeout
+        self.force_timeout = force_timeout
+        self.on_done = on_done
+        self.report = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+        return self.report
+
+    def _snapshot(self):
+        if self.job_object:
+            active, cpu = self.job_object.accounting()
+            return {"active": active, "cpu": cpu}
+        return tree_cpu_times(self.process.pid)
+
+    def _signal_group(self, force):
+        pid = self.process.pid
+        if sys.platform == "win32":
+            if force:
+                if self.job_object:
+                    self.job_object.terminate()
+                else:
+                    subprocess.run(["taskkill", "/T", "/F", "/PID", str(pid)], capture_output=True)
+            else:
+                os.kill(pid, signal.CTRL_BREAK_EVENT)
+            return
+        try:
+            os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _tree_gone(self, members):
+        if self.process.poll() is None:
+            return False
+        if self.job_object:
+            return self.job_object.accounting()[0] == 0
+        return not any(pid_alive(pid) for pid in members)
+
+    def _wait(self, members, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._tree_gone(members):
+                return True
+            time.sleep(0.1)
+        return self._tree_gone(members)
+
+    def _run(self):
+        started = time.time()
+        forced = False
+        error = None
+        before = self._snapshot()
+        members = set() if self.job_object else set(before)
+        try:
+            self._signal_group(force=False)
+            if not self._wait(members, self.graceful_timeout):
+                # Pick up anything spawned since the first snapshot before forcing
+                if not self.job_object:
+                    latest = self._snapshot()
+                    members |= set(latest)
+                    before.update(latest)
+                else:
+                    before = self._snapshot()
+                forced = True
+                self._signal_group(force=True)
+                # Stragglers that left the process group still get killed one by one
+                if not self.job_object and sys.platform != "win32":
+                    for pid in members:
+                        try:
+                            os.kill(pid, signal.SIGKILL)
+                        except (ProcessLookupError, PermissionError):
+                            pass
+                self._wait(members, self.force_timeout)
+        except OSError as e:
+            error = str(e)
+
+        if self.job_object:
+            active_after, cpu_after = self.job_object.accounting()
+            reaped = max(0, before["active"] - active_after)
+            cpu = cpu_after
+        else:
+            reaped = sum(1 for pid in members if not pid_alive(pid))
+            cpu = sum(before.values())
+        self.report = {
+            "reaped": reaped,
+            "cpu_seconds": round(cpu, 2),
+            "forced": forced,
+            "seconds": round(time.time() - started, 2),
+            "error": error,
+        }
+        if self.on_done:
+            self.on_done(self.report)
+
+
+class PeakRssSampler:
+    """Background sampler of the peak resident memory of a process tree"""
+
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.peak
+
+    def _run(self):
+        while True:
+            rss = tree_rss(self.pid)
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            if self._stop.wait(self.interval):
+                break
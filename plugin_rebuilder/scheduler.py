@@ -0,0 +1,135 @@
+"""Splits the host's cores and memory between concurrently running builds
+
+UAT's BuildPlugin has no switch that reaches UnrealBuildTool's
+-MaxParallelActions, so a build's budget is enforced by pinning its whole
+process tree to its share of the cores: UBT and the compilers it spawns can
+then only ever use that many. Builds that call UBT directly also get the
+matching -MaxParallelActions argument from Budget.ubt_args().
+"""
+import os
+import threading
+
+from .host import available_memory, cpu_count
+from .process_tree import descendants
+
+# Below this a build spends more time in serial steps (UHT, linking) than it gains
+MIN_CORES_PER_BUILD = 2
+# Rough peak memory of one compile action (UBT itself assumes ~1.5 GB)
+MEMORY_PER_ACTION = 1.5 * 1024 ** 3
+
+
+def available_cpus():
+    """Ids of the cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(cpu_count()))
+
+
+class Budget:
+    """Cores and memory a single build may use"""
+
+    def __init__(self, cpus, memory=None):
+        self.cpus = list(cpus)
+        self.memory = memory
+
+    @property
+    def cores(self):
+        return len(self.cpus)
+
+    @property
+    def parallel_actions(self):
+        actions = self.cores
+        if self.memory:
+            actions = min(actions, int(self.memory // MEMORY_PER_ACTION))
+        return max(1, actions)
+
+    def ubt_args(self):
+        """UnrealBuildTool arguments that keep a build inside this budget"""
+        return [f"-MaxParallelActions={self.parallel_actions}"]
+
+    def describe(self):
+        memory = f", {self.memory / 1024 ** 3:.1f} GB" if self.memory else ""
+        return f"{self.cores} cores{memory}, up to {self.parallel_actions} parallel actions"
+
+
+def set_tree_affinity(pid, cpus, job_object=None):
+    """Restrict pid and all its descendants (every thread) to cpus; False where unsupported"""
+    if job_object:
+        return job_object.set_affinity(cpus)
+    if not hasattr(os, "sched_setaffinity"):
+        return False  # macOS has no affinity API
+    applied = False
+    for process in [pid, *descendants(pid)]:
+        try:
+            threads = [int(tid) for tid in os.listdir(f"/proc/{process}/task")]
+        except OSError:
+            threads = [process]
+        for thread in threads:
+            try:
+                os.sched_setaffinity(thread, cpus)
+                applied = True
+            except OSError:
+                pass  # Exited meanwhile
+    return applied
+
+
+class ResourceScheduler:
+    """Hands every running build an equal, non-overlapping slice of the machine
+
+    Slices are recomputed whenever a build starts or finishes; running builds
+    are told about their new slice through their apply_budget() method.
+    """
+
+    def __init__(self, cpus=None, memory=None, min_cores_per_build=MIN_CORES_PER_BUILD):
+        self.cpus = list(cpus) if cpus else available_cpus()
+        self.memory = memory
+        self.min_cores_per_build = min_cores_per_build
+        self.running = []
+        self._lock = threading.Lock()
+
+    def max_builds(self):
+        """How many builds fit side by side without starving each other"""
+        limit = max(1, len(self.cpus) // self.min_cores_per_build)
+        memory = self.memory if self.memory is not None else available_memory()
+        if memory:
+            limit = min(limit, max(1, int(memory // (self.min_cores_per_build * MEMORY_PER_ACTION))))
+        return limit
+
+    def acquire(self, job):
+        """Add job to the running set and rebalance; returns its budget"""
+        with self._lock:
+            self.running.append(job)
+            budgets = self._rebalance()
+            # Applied under the lock, an older set of slices must never land after a newer one
+            self._apply(budgets)
+        return budgets[job]
+
+    def release(self, job):
+        with self._lock:
+            if job in self.running:
+                self.running.remove(job)
+            self._apply(self._rebalance())
+
+    def _rebalance(self):
+        count = len(self.running)
+        if not count:
+            return {}
+        memory = self.memory if self.memory is not None else available_memory()
+        cpus = self.cpus
+        budgets = {}
+        # Contiguous slices; the first len(cpus) % count builds get one extra core
+        share, extra = divmod(len(cpus), count)
+        start = 0
+        for index, job in enumerate(self.running):
+            size = max(1, share + (1 if index < extra else 0))
+            slice_cpus = cpus[start:start + size] or cpus[-size:]
+            start += size
+            budgets[job] = Budget(slice_cpus, memory // count if memory else None)
+        return budgets
+
+    @staticmethod
+    def _apply(budgets):
+        for job, budget in budgets.items():
+            apply_budget = getattr(job, "apply_budget", None)
+            if apply_budget:
+                apply_budget(budget)
@@ -0,0 +1,317 @@
+"""Fake Unreal Engine installs whose RunUAT replays a build log
+
+create_fake_engine() writes an engine root (Build.version, a Binaries
+folder, RunUAT and RunUBT scripts) that the rest of the package accepts as a
+real install. Its scripts run replay(), which prints a recorded UAT log (or
+a synthetic one) at a given rate and volume, keeps a tree of child processes
+alive like UBT's compilers, writes a packaged plugin and exits with a chosen
+code. Benchmarks and CI use it to measure the wrapper without UE.
+
+    python -m plugin_rebuilder.simulator create /tmp/UE_5.4 --lines 1000000 --children 4
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+
+from .host import host_platform
+from .log_archive import GZIP, ZSTD, log_format
+from .process_tree import descendants
+
+SIMULATOR_CONFIG = "simulator.json"
+# Printed every mark_every lines with the time it was written, to measure display latency
+MARK_PREFIX = "Simulator mark "
+# Lines written per pipe write when printing as fast as possible
+WRITE_BATCH = 2000
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CONFIG = {
+    "log": None,             # Recorded UAT log (.log, .log.gz, .log.zst); None for a synthetic one
+    "lines": None,           # Lines to print, the recorded log is looped; None prints it once
+    "rate": 0,               # Lines per second, 0 for as fast as the reader takes them
+    "startup": 0.0,          # Seconds before the first line, like UAT compiling its scripts
+    "exit_code": 0,
+    "children": 0,           # Child processes per level of the process tree
+    "child_depth": 1,        # Levels of children below the replay process
+    "ignore_sigterm": False,  # Children only go away when killed
+    "mark_every": 0,         # Print a timestamped mark every this many lines, 0 for none
+    "write_package": True,   # Create the -Package folder with the .uplugin and a binary
+}
+
+# Keeps its own children alive until killed; well-behaved ones also leave once their parent is gone
+CHILD_SCRIPT = r'''
+import os, signal, subprocess, sys, time
+width, depth, stubborn = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3] == "1"
+if stubborn:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+children = [subprocess.Popen([sys.executable, "-c", sys.argv[4], str(width), str(depth - 1), sys.argv[3], sys.argv[4]])
+            for _ in range(width if depth > 0 else 0)]
+parent = os.getppid()
+while stubborn or os.getppid() == parent:
+    time.sleep(0.1)
+for child in children:
+    child.kill()
+'''
+
+
+def synthetic_log(actions=400, platform=None, warning_every=50, errors=0):
+    """Lines shaped like a BuildPlugin run: editor plus Development and Shipping game targets"""
+    platform = platform or host_platform()
+    yield "Running AutomationTool..."
+    yield "Parsing command line: BuildPlugin -Plugin=Simulated.uplugin -Package=Out"
+    yield "********** BUILD COMMAND STARTED **********"
+    for target, configuration in (("UnrealEditor", "Development"), ("UnrealGame", "Development"),
+                                  ("UnrealGame", "Shipping")):
+        yield (f'Running: /Engine/Binaries/ThirdParty/DotNet/dotnet "/Engine/Binaries/DotNET/UnrealBuildTool/'
+               f'UnrealBuildTool.dll" {target} {platform} {configuration} -Project=HostProject.uproject')
+        yield f"Building {actions} actions with 16 processes..."
+        for action in range(1, actions + 1):
+            if action == actions:
+                yield f"[{action}/{actions}] Link [x64] {target}-Simulated.so"
+            else:
+                yield f"[{action}/{actions}] Compile [x64] Module.Simulated.{action}.cpp"
+            if warning_every and action % warning_every == 0:
+                yield (f"/Plugin/Source/Simulated/Private/File{action}.cpp(12): warning C4996: "
+                       f"'Foo': was declared deprecated")
+        for error in range(errors):
+            yield f"/Plugin/Source/Simulated/Private/Broken{error}.cpp(3): error C2065: 'x': undeclared identifier"
+        yield "Total execution time: 12.34 seconds"
+    yield "BUILD SUCCESSFUL" if not errors else "BUILD FAILED"
+
+
+def read_recorded_log(path):
+    """Lines of a recorded log, compressed archives included"""
+    format = log_format(path)
+    if format == GZIP:
+        f = gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    elif format == ZSTD:
+        import zstandard
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8',
+                             errors='replace')
+    else:
+        f = open(path, 'r', encoding='utf-8', errors='replace')
+    with f:
+        return [line.rstrip("\r\n") for line in f]
+
+
+def _source_lines(config):
+    if config["log"]:
+        lines = read_recorded_log(config["log"])
+    else:
+        lines = list(synthetic_log())
+    total = config["lines"] or len(lines)
+    if not lines:
+        return
+    produced = 0
+    while produced < total:
+        for line in lines[:total - produced]:
+            yield line
+        produced += min(len(lines), total - produced)
+
+
+def _spawn_children(config):
+    if not config["children"] or config["child_depth"] < 1:
+        return []
+    stubborn = "1" if config["ignore_sigterm"] and os.name != "nt" else "0"
+    return [
+        subprocess.Popen([sys.executable, "-c", CHILD_SCRIPT, str(config["children"]),
+                          str(config["child_depth"] - 1), stubborn, CHILD_SCRIPT])
+        for _ in range(config["children"])
+    ]
+
+
+def _option(argv, name):
+    prefix = f"-{name.lower()}="
+    for arg in argv:
+        if arg.lower().startswith(prefix):
+            return arg[len(prefix):].strip('"')
+    return None
+
+
+def _write_package(argv):
+    """Create what a build leaves behind: the packaged plugin, or binaries next to a UBT -Plugin"""
+    plugin = _option(argv, "Plugin")
+    package = _option(argv, "Package")
+    if not plugin:
+        return
+    name = os.path.splitext(os.path.basename(plugin))[0]
+    target = package or os.path.dirname(plugin)
+    binaries = os.path.join(target, "Binaries", host_platform())
+    os.makedirs(binaries, exist_ok=True)
+    suffix = ".dll" if os.name == "nt" else ".so"
+    with open(os.path.join(binaries, f"UnrealEditor-{name}{suffix}"), 'wb') as f:
+        f.write(b"\0" * 4096)
+    if package and os.path.isfile(plugin):
+        with open(plugin, 'rb') as src, open(os.path.join(package, os.path.basename(plugin)), 'wb') as dst:
+            dst.write(src.read())
+
+
+def replay(config, argv=()):
+    """Act as RunUAT/RunUBT: print the configured log and return the configured exit code"""
+    config = {**DEFAULT_CONFIG, **config}
+    out = sys.stdout.buffer
+    out.write(f"Simulated build: {' '.join(argv)}\n".encode())
+    out.flush()
+    if config["startup"]:
+        time.sleep(config["startup"])
+    children = _spawn_children(config)
+    try:
+        rate = config["rate"]
+        mark_every = config["mark_every"]
+        started = time.time()
+        written = 0
+        batch = []
+        for line in _source_lines(config):
+            batch.append(line)
+            written += 1
+            if mark_every and written % mark_every == 0:
+                batch.append(f"{MARK_PREFIX}{time.time():.6f}")
+            if rate:
+                if written < int((time.time() - started) * rate):
+                    continue  # Behind schedule, keep batching
+                out.write(("\n".join(batch) + "\n").encode('utf-8'))
+                out.flush()
+                batch = []
+                ahead = written / rate - (time.time() - started)
+                if ahead > 0.001:
+                    time.sleep(ahead)
+            elif len(batch) >= WRITE_BATCH:
+                out.write(("\n".join(batch) + "\n").encode('utf-8'))
+                batch = []
+        if batch:
+            out.write(("\n".join(batch) + "\n").encode('utf-8'))
+        out.flush()
+        if config["write_package"] and config["exit_code"] == 0:
+            _write_package(argv)
+    except BrokenPipeError:
+        pass  # Reader went away (cancelled)
+    finally:
+        # The whole tree, stubborn grandchildren don't leave on their own
+        for pid in descendants(os.getpid()):
+            try:
+                os.kill(pid, signal.SIGKILL if os.name != "nt" else signal.SIGTERM)
+            except OSError:
+                pass
+        for child in children:
+            child.wait()
+    return config["exit_code"]
+
+
+def _script_contents(windows):
+    # The config is found next to the script, so engine paths with spaces or shell characters stay out of it
+    python = sys.executable
+    if windows:
+        return (
+            "@echo off\r\n"
+            f'set "PYTHONPATH={PACKAGE_ROOT};%PYTHONPATH%"\r\n'
+            f'"{python}" -m plugin_rebuilder.simulator replay "%~dp0{SIMULATOR_CONFIG}" %*\r\n'
+            "exit /b %ERRORLEVEL%\r\n"
+        )
+    return (
+        "#!/bin/sh\n"
+        f'PYTHONPATH={shlex.quote(PACKAGE_ROOT)}"${{PYTHONPATH:+:$PYTHONPATH}}"\n'
+        "export PYTHONPATH\n"
+        f'exec {shlex.quote(python)} -m plugin_rebuilder.simulator replay "$(dirname "$0")/{SIMULATOR_CONFIG}" "$@"\n'
+    )
+
+
+def create_fake_engine(root, version=(5, 4, 0), **config):
+    """Write a fake engine root whose RunUAT/RunUBT replay a log as configured (see DEFAULT_CONFIG)"""
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise TypeError(f"Unknown simulator options: {', '.join(sorted(unknown))}")
+    batch_files = os.path.join(root, "Engine", "Build", "BatchFiles")
+    os.makedirs(batch_files, exist_ok=True)
+    os.makedirs(os.path.join(root, "Engine", "Binaries", host_platform()), exist_ok=True)
+    major, minor, patch = version
+    with open(os.path.join(root, "Engine", "Build", "Build.version"), 'w') as f:
+        json.dump({"MajorVersion": major, "MinorVersion": minor, "PatchVersion": patch, "Changelist": 0,
+                   "BranchName": "++Simulator"}, f, indent=2)
+    config_path = os.path.join(batch_files, SIMULATOR_CONFIG)
+    with open(config_path, 'w') as f:
+        json.dump({**DEFAULT_CONFIG, **config}, f, indent=2)
+    for tool in ("RunUAT", "RunUBT"):
+        for windows in (False, True):
+            path = os.path.join(batch_files, tool + (".bat" if windows else ".sh"))
+            with open(path, 'w', newline="") as f:
+                f.write(_script_contents(windows))
+            if not windows:
+                os.chmod(path, 0o755)
+    return root
+
+
+def configure_fake_engine(root, **config):
+    """Change the replay settings of an engine made by create_fake_engine"""
+    config_path = os.path.join(root, "Engine", "Build", "BatchFiles", SIMULATOR_CONFIG)
+    with open(config_path, 'r') as f:
+        current = json.load(f)
+    current.update(config)
+    with open(config_path, 'w') as f:
+        json.dump(current, f, indent=2)
+
+
+def create_fake_plugin(folder, name="Simulated"):
+    """Minimal plugin with one module that passes the pre-flight checks; returns its .uplugin"""
+    module = os.path.join(folder, name, "Source", name)
+    os.makedirs(os.path.join(module, "Private"), exist_ok=True)
+    uplugin = os.path.join(folder, name, f"{name}.uplugin")
+    with open(uplugin, 'w') as f:
+        json.dump({"FileVersion": 3, "FriendlyName": name, "EngineVersion": "5.4.0",
+                   "Modules": [{"Name": name, "Type": "Runtime", "LoadingPhase": "Default"}]}, f, indent=4)
+    with open(os.path.join(module, f"{name}.Build.cs"), 'w') as f:
+        f.write(f"public class {name} : ModuleRules {{ public {name}(ReadOnlyTargetRules Target) : base(Target) {{}} }}\n")
+    with open(os.path.join(module, "Private", f"{name}.cpp"), 'w') as f:
+        f.write("int Simulated = 0;\n")
+    return uplugin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plugin_rebuilder.simulator", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="write a fake engine root")
+    create.add_argument("root", help="folder to create, e.g. /tmp/UE_5.4")
+    create.add_argument("--version", default="5.4.0", help="engine version in Build.version")
+    create.add_argument("--log", help="recorded UAT log to replay (default: a synthetic BuildPlugin log)")
+    create.add_argument("--lines", type=int, help="lines to print, looping the log (default: the log once)")
+    create.add_argument("--rate", type=int, default=0, help="lines per second (default: as fast as possible)")
+    create.add_argument("--startup", type=float, default=0.0, help="seconds before the first line")
+    create.add_argument("--exit-code", type=int, default=0, help="exit code of every build")
+    create.add_argument("--children", type=int, default=0, help="child processes per level of the process tree")
+    create.add_argument("--child-depth", type=int, default=1, help="levels of child processes")
+    create.add_argument("--ignore-sigterm", action="store_true", help="children ignore SIGTERM and must be killed")
+    create.add_argument("--mark-every", type=int, default=0, help="print a timestamped mark every N lines")
+    create.add_argument("--plugin", help="also create a matching fake plugin in this folder")
+
+    run = commands.add_parser("replay", help="what the fake RunUAT/RunUBT scripts run")
+    run.add_argument("config", help=SIMULATOR_CONFIG + " of the fake engine")
+    run.add_argument("args", nargs=argparse.REMAINDER, help="UAT/UBT arguments")
+
+    args = parser.parse_args(argv)
+    if args.command == "replay":
+        with open(args.config, 'r') as f:
+            config = json.load(f)
+        if os.name != "nt":
+            signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+        return replay(config, args.args)
+
+    version = tuple(int(part) for part in (args.version.split(".") + ["0", "0"])[:3])
+    create_fake_engine(
+        args.root, version, log=args.log, lines=args.lines, rate=args.rate, startup=args.startup,
+        exit_code=args.exit_code, children=args.children, child_depth=args.child_depth,
+        ignore_sigterm=args.ignore_sigterm, mark_every=args.mark_every,
+    )
+    print(f"Fake engine written to {args.root}")
+    if args.plugin:
+        print(f"Fake plugin written to {create_fake_plugin(args.plugin)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""Streaming parser that turns UAT/UBT output lines into typed events
+
+The parser runs on the reader thread for every line a build prints, so each
+pattern is guarded by a cheap prefix or substring test and the regexes only
+run on lines that can actually match.
+"""
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+# Running: ...dotnet.exe "...UnrealBuildTool.dll" UnrealGame Win64 Shipping -Project=...
+RUNNING_UBT = re.compile(r'^Running:?\s.*?UnrealBuildTool(?:\.exe|\.dll|\.sh|\.bat)?"?\s+(.*)$', re.IGNORECASE)
+UBT_TARGET = re.compile(r'-Target="?([^"\s]+)\s+([^"\s]+)\s+([^"\s]+)', re.IGNORECASE)
+# [12/340] Compile [x64] Module.Foo.cpp
+ACTION = re.compile(r'^\[(\d+)/(\d+)\]\s+(\S+)\s*(.*)$')
+# Building 340 actions with 16 processes...
+BUILDING_ACTIONS = re.compile(r'^Building (\d+) actions?\b')
+# foo.cpp(12): error C2065: 'x': undeclared identifier
+MSVC_DIAGNOSTIC = re.compile(r'\b(fatal error|error|warning)\s+([A-Z]{1,3}\d{3,5})\s*:\s*(.*)$')
+# foo.cpp:12:3: error: use of undeclared identifier 'x'
+CLANG_DIAGNOSTIC = re.compile(r':\s*(fatal error|error|warning):\s*(.*)$')
+# LogPluginManager: Error: Unable to load plugin
+LOG_DIAGNOSTIC = re.compile(r'^(?:\[[^\]]*\])*\s*(Log\w+):\s*(Error|Warning):\s*(.*)$')
+# ERROR: Unable to find plugin / WARNING: ...
+UAT_DIAGNOSTIC = re.compile(r'^(ERROR|WARNING):\s*(.*)$')
+# Total execution time: 45.23 seconds / Total time in Parallel executor: 40.11 seconds
+TOTAL_TIME = re.compile(r'^Total (?:execution )?time(?: in [^:]+)?:\s*([\d.]+)\s*seconds', re.IGNORECASE)
+
+ERROR = "error"
+WARNING = "warning"
+
+
+@dataclass
+class PhaseStarted:
+    target: str
+    platform: str
+    configuration: str
+
+
+@dataclass
+class ActionProgress:
+    current: int
+    total: int
+    action: str
+    detail: str
+
+
+@dataclass
+class ActionCount:
+    total: int
+
+
+@dataclass
+class TargetUpToDate:
+    pass
+
+
+@dataclass
+class Diagnostic:
+    severity: str
+    message: str
+    code: Optional[str] = None
+    category: Optional[str] = None
+
+
+@dataclass
+class TotalTime:
+    seconds: float
+
+
+@dataclass
+class BuildResult:
+    success: bool
+
+
+def _ubt_target(arguments):
+    match = UBT_TARGET.search(arguments)
+    if match:
+        return match.groups()
+    tokens = [token.strip('"') for token in arguments.split() if not token.startswith(("-", '"-'))]
+    if len(tokens) >= 3:
+        return tokens[0], tokens[1], tokens[2]
+    return None
+
+
+def parse_line(line):
+    """Parse a single stripped output line into an event, or None"""
+    first = line[:1]
+    if first == "[":
+        match = ACTION.match(line)
+        if match:
+            return ActionProgress(int(match.group(1)), int(match.group(2)), match.group(3), match.group(4))
+    elif first == "R" and line.startswith("Running"):
+        match = RUNNING_UBT.match(line)
+        if match:
+            target = _ubt_target(match.group(1))
+            if target:
+                return PhaseStarted(*target)
+        return None
+    elif first == "B":
+        if line.startswith("BUILD SUCCESSFUL"):
+            return BuildResult(True)
+        if line.startswith("BUILD FAILED"):
+            return BuildResult(False)
+        match = BUILDING_ACTIONS.match(line)
+        if match:
+            return ActionCount(int(match.group(1)))
+    elif first == "T":
+        if line.startswith("Target is up to date"):
+            return TargetUpToDate()
+        if line.startswith("Total"):
+            match = TOTAL_TIME.match(line)
+            if match:
+                return TotalTime(float(match.group(1)))
+    elif first == "E" or first == "W":
+        match = UAT_DIAGNOSTIC.match(line)
+        if match:
+            return Diagnostic(match.group(1).lower(), match.group(2), category="UAT")
+
+    if "rror" in line or "arning" in line:
+        match = LOG_DIAGNOSTIC.match(line) if first == "L" or first == "[" else None
+        if match:
+            return Diagnostic(match.group(2).lower(), match.group(3), category=match.group(1))
+        match = MSVC_DIAGNOSTIC.search(line)
+        if match:
+            severity = WARNING if match.group(1) == "warning" else ERROR
+            return Diagnostic(severity, line, code=match.group(2))
+        match = CLANG_DIAGNOSTIC.search(line)
+        if match:
+            severity = WARNING if match.group(1) == "warning" else ERROR
+            return Diagnostic(severity, line)
+    return None
+
+
+@dataclass
+class Phase:
+    """One UnrealBuildTool invocation (target, platform, configuration)"""
+    target: str
+    platform: str
+    configuration: str
+    started: float
+    finished: Optional[float] = None
+    actions_done: int = 0
+    actions_total: int = 0
+
+    @property
+    def label(self):
+        return f"{self.target} {self.platform} {self.configuration}"
+
+    @property
+    def fraction(self):
+        if self.finished:
+            return 1.0
+        if self.actions_total:
+            return min(1.0, self.actions_done / self.actions_total)
+        return 0.0
+
+    @property
+    def duration(self):
+        return (self.finished or time.time()) - self.started
+
+
+def expected_phase_count(uat_args):
+    """Best guess at how many UBT runs BuildPlugin will make for these arguments"""
+    host = 0 if any(arg.lower() == "-nohostplatform" for arg in uat_args) else 1
+    targets = 1
+    for arg in uat_args:
+        if arg.lower().startswith("-targetplatforms="):
+            targets = len([p for p in arg.split("=", 1)[1].split("+") if p])
+    # Editor (Development) on the host, Development + Shipping game per target platform
+    return host + 2 * targets
+
+
+class ProgressTracker:
+    """Folds parser events into build progress, ETA, phases and diagnostics counts"""
+
+    def __init__(self, expected_phases=3, keep_diagnostics=200):
+        self.expected_phases = expected_phases
+        self.started = time.time()
+        self.phases = []
+        self.errors = 0
+        self.warnings = 0
+        self.diagnostics = deque(maxlen=keep_diagnostics)
+        self.result = None
+        self.total_time = 0.0
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Call listener(event) for every parsed event"""
+        self.listeners.append(listener)
+
+    def feed(self, line):
+        event = parse_line(line)
+        if event is not None:
+            self.apply(event)
+        return event
+
+    def apply(self, event):
+        with self._lock:
+            now = time.time()
+            current = self.current_phase
+            kind = type(event)
+            if kind is ActionProgress:
+                if current:
+                    current.actions_done = max(current.actions_done, event.current)
+                    current.actions_total = max(current.actions_total, event.total)
+            elif kind is Diagnostic:
+                if event.severity == ERROR:
+                    self.errors += 1
+                else:
+                    self.warnings += 1
+                self.diagnostics.append(event)
+            elif kind is PhaseStarted:
+                if current:
+                    current.finished = now
+                self.phases.append(Phase(event.target, event.platform, event.configuration, now))
+            elif kind is ActionCount:
+                if current:
+                    current.actions_total = event.total
+            elif kind is TargetUpToDate or kind is TotalTime:
+                if current and not current.finished:
+                    current.finished = now
+                if kind is TotalTime:
+                    self.total_time += event.seconds
+            elif kind is BuildResult:
+                self.result = event.success
+                if current and not current.finished:
+                    current.finished = now
+        for listener in self.listeners:
+            listener(event)
+
+    @property
+    def current_phase(self):
+        if self.phases and not self.phases[-1].finished:
+            return self.phases[-1]
+        return None
+
+    @property
+    def fraction(self):
+        """Estimated fraction of the build that is done (0..1)"""
+        if self.result is not None:
+            return 1.0
+        phases = self.phases
+        if not phases:
+            return 0.0
+        expected = max(self.expected_phases, len(phases))
+        done = sum(phase.fraction for phase in phases)
+        return min(0.99, done / expected)
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    @property
+    def eta(self):
+        """Estimated seconds left, or None while there's too little to go on"""
+        fraction = self.fraction
+        if fraction < 0.02 or fraction >= 1.0:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+    def summary(self):
+        """One line status such as 'UnrealGame Win64 Shipping [12/340] 41% ETA 3m 10s, 0 errors, 2 warnings'"""
+        parts = []
+        phase = self.current_phase
+        if phase:
+            parts.append(phase.label)
+            if phase.actions_total:
+                parts.append(f"[{phase.actions_done}/{phase.actions_total}]")
+        parts.append(f"{self.fraction * 100:.0f}%")
+        eta = self.eta
+        if eta is not None:
+            parts.append(f"ETA {format_duration(eta)}")
+        return " ".join(parts) + f", {self.errors} errors, {self.warnings} warnings"
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds}s"
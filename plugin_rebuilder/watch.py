@@ -0,0 +1,156 @@
+"""Watch mode: rebuild a plugin whenever its sources change
+
+The plugin's inputs (the .uplugin plus Source/, Resources/, Content/,
+Config/ and Shaders/, so never Intermediate/ or Binaries/) are polled with
+a stat-only scan. A burst of saves is coalesced into one rebuild once the
+tree has been quiet for the debounce time; a build still running when newer
+changes settle is cancelled and restarted, always into the same package
+folder.
+"""
+import fnmatch
+import threading
+import time
+
+from .file_index import scan_plugin_files
+from .host import host_platform
+
+# How often the plugin tree is scanned
+POLL_INTERVAL = 0.5
+# Quiet time after the last change before a rebuild starts
+DEBOUNCE_SECONDS = 1.0
+# How long a cancelled build may take to stop before the next one is queued anyway
+CANCEL_WAIT_SECONDS = 30.0
+# Editor swap, backup and temp files that never affect a build
+TEMP_FILE_PATTERNS = ("*~", "*.tmp", "*.TMP", "*.swp", "*.swo", "*.swx", ".#*", "#*#", "~$*", "4913", "*.orig")
+
+
+def is_temp_file(relative):
+    name = relative.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in TEMP_FILE_PATTERNS)
+
+
+def watch_args(extra_args=(), all_platforms=False):
+    """UAT arguments for quick edit/rebuild loops: only the host platform unless asked otherwise"""
+    args = list(extra_args)
+    if not all_platforms and not any(arg.lower().startswith("-targetplatforms=") for arg in args):
+        args.append(f"-TargetPlatforms={host_platform()}")
+    return args
+
+
+def plugin_snapshot(plugin):
+    """{relative path: (mtime, size)} of a plugin's build inputs, minus temp files"""
+    return {
+        relative: (stat.st_mtime_ns, stat.st_size)
+        for relative, _, stat in scan_plugin_files(plugin)
+        if not is_temp_file(relative)
+    }
+
+
+class PluginWatcher:
+    """Polls a plugin's inputs and calls on_change(paths) once a burst of changes settles"""
+
+    def __init__(self, plugin, on_change, interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS):
+        self.plugin = plugin
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="plugin-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _scan(self):
+        try:
+            return plugin_snapshot(self.plugin)
+        except OSError:
+            return None  # Mid-save (file replaced, folder renamed), try again next round
+
+    def _run(self):
+        snapshot = self._scan() or {}
+        pending = set()
+        last_change = 0.0
+        while not self._stop.wait(self.interval):
+            current = self._scan()
+            if current is None:
+                last_change = time.time()
+                continue
+            changed = {path for path in current.keys() | snapshot.keys() if current.get(path) != snapshot.get(path)}
+            snapshot = current
+            if changed:
+                pending |= changed
+                last_change = time.time()
+            elif pending and time.time() - last_change >= self.debounce:
+                paths, pending = sorted(pending), set()
+                try:
+                    self.on_change(paths)
+                except Exception:
+                    pass  # A failed rebuild must not stop the watcher
+
+
+def describe_changes(paths, shown=3):
+    text = ", ".join(paths[:shown])
+    return text + (f" (+{len(paths) - shown} more)" if len(paths) > shown else "")
+
+
+class WatchSession:
+    """Rebuilds one plugin/engine pair through a BuildQueue whenever the plugin changes"""
+
+    def __init__(self, queue, plugin, engine, package_dir, extra_args=(), all_platforms=False,
+                 interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS, on_build=None, notes=()):
+        self.queue = queue
+        self.plugin = plugin
+        self.engine = engine
+        self.package_dir = package_dir
+        self.args = watch_args(extra_args, all_platforms)
+        self.on_build = on_build or (lambda job: None)
+        self.job = None
+        self.builds = 0
+        self.restarts = 0
+        # Logged at the top of the first build only
+        self._notes = list(notes)
+        self.watcher = PluginWatcher(plugin, self._changed, interval, debounce)
+        self._lock = threading.Lock()
+
+    def start(self, build_now=True):
+        """Start watching, with a first build right away unless build_now is False"""
+        if build_now:
+            self._rebuild("Initial build")
+        self.watcher.start()
+        return self
+
+    def stop(self, cancel=True):
+        self.watcher.stop()
+        job = self.job
+        if cancel and job and not job.finished:
+            self.queue.cancel(job.id)
+
+    def _changed(self, paths):
+        job = self.job
+        if job and not job.finished:
+            # Newer sources make the running build pointless; let it stop before reusing its package folder
+            job.log.append(f"Newer changes ({describe_changes(paths)}), restarting the build")
+            self.queue.cancel(job.id)
+            self.restarts += 1
+            deadline = time.time() + CANCEL_WAIT_SECONDS
+            while not job.finished and time.time() < deadline:
+                time.sleep(0.05)
+        self._rebuild(f"Changed: {describe_changes(paths)}")
+
+    def _rebuild(self, reason):
+        with self._lock:
+            self.job = self.queue.submit(self.plugin, self.engine, self.package_dir, self.args, self._notes)
+            self._notes = []
+            self.builds += 1
+        self.job.log.append(f"Watch mode build #{self.builds}. {reason}")
+        self.on_build(self.job)
@@ -0,0 +1,289 @@
+"""Persistent build workspaces that keep UBT's intermediates between rebuilds
+
+BuildPlugin copies the plugin into a new host project and compiles it from
+scratch every time. A workspace is a host project that stays around per
+plugin, engine and platform: the plugin's sources are synced into it (only
+changed files are written, modification times are kept), UnrealBuildTool is
+run on it directly with its makefiles enabled, and the built plugin is then
+synced into the package folder. After a one-file change UBT only recompiles
+that file and relinks.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .async_runner import run_command
+from .build_queue import BuildJob, engine_label, plugin_name
+from .commands import UatOptions, format_command, ubt_command
+from .deploy import sync_tree
+from .host import host_platform
+from .path_cache import DATA_DIR, FileLock
+from .uat_parser import ActionProgress, PhaseStarted
+
+WORKSPACE_DIR = os.path.join(DATA_DIR, "workspaces")
+HOST_PROJECT = "HostProject"
+STATE_FILE = "workspace.json"
+# Never copied into a workspace; Intermediate and Binaries there belong to UBT
+SOURCE_EXCLUDES = ("Intermediate", "Binaries", "Saved", "DerivedDataCache", ".git", ".vs", ".idea")
+# Left out of the package folder
+PACKAGE_EXCLUDES = ("Intermediate",)
+# Another build of the same workspace may hold it this long
+WORKSPACE_LOCK_TIMEOUT = 6 * 3600
+# How often a job waiting for the workspace checks whether it was cancelled
+WORKSPACE_LOCK_POLL = 0.5
+
+
+def workspace_targets(uat_args=(), editor_only=True):
+    """(target, platform, configuration) UBT runs: the editor on this machine, plus the game builds BuildPlugin would make"""
+    targets = [("UnrealEditor", host_platform(), "Development")]
+    if editor_only:
+        return targets
+    for platform in UatOptions.from_args(uat_args).target_platforms or [host_platform()]:
+        targets += [("UnrealGame", platform, "Development"), ("UnrealGame", platform, "Shipping")]
+    return targets
+
+
+def workspace_path(plugin, engine, platform, root=WORKSPACE_DIR):
+    """Folder of the workspace for a plugin (by path) built with an engine for a platform"""
+    digest = hashlib.blake2b(os.path.normcase(os.path.abspath(plugin)).encode(), digest_size=4).hexdigest()
+    return os.path.join(root, f"{plugin_name(plugin)}-{digest}", f"{engine_label(engine)}-{platform}")
+
+
+class Workspace:
+    """Host project for one plugin/engine/platform, plus its reuse statistics"""
+
+    def __init__(self, plugin, engine, platform=None, root=WORKSPACE_DIR):
+        self.plugin = os.path.abspath(plugin)
+        self.engine = engine
+        self.platform = platform or host_platform()
+        self.path = workspace_path(plugin, engine, self.platform, root)
+        self.project_dir = os.path.join(self.path, HOST_PROJECT)
+        self.project_file = os.path.join(self.project_dir, f"{HOST_PROJECT}.uproject")
+        self.plugin_dir = os.path.join(self.project_dir, "Plugins", plugin_name(plugin))
+        self.plugin_file = os.path.join(self.plugin_dir, os.path.basename(plugin))
+        self.state_path = os.path.join(self.path, STATE_FILE)
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {"plugin": self.plugin, "engine": self.engine, "platform": self.platform, "targets": {}, "builds": 0}
+
+    def save_state(self):
+        temp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp, self.state_path)
+
+    def lock(self, timeout=WORKSPACE_LOCK_TIMEOUT):
+        os.makedirs(self.path, exist_ok=True)
+        return FileLock(os.path.join(self.path, "workspace"), timeout=timeout)
+
+    def prepare(self):
+        """Create the host project if needed and sync the plugin's sources into it; returns the SyncResult"""
+        os.makedirs(self.plugin_dir, exist_ok=True)
+        project = {
+            "FileVersion": 3,
+            "Plugins": [{"Name": plugin_name(self.plugin), "Enabled": True}],
+        }
+        try:
+            with open(self.project_file, 'r', encoding='utf-8') as f:
+                unchanged = json.load(f) == project
+        except (json.JSONDecodeError, IOError):
+            unchanged = False
+        if not unchanged:
+            # Only rewritten when it differs, a newer .uproject makes UBT rebuild its makefiles
+            with open(self.project_file, 'w', encoding='utf-8') as f:
+                json.dump(project, f, indent=4)
+        return sync_tree(os.path.dirname(self.plugin), self.plugin_dir, SOURCE_EXCLUDES, hardlink=False)
+
+    def ubt_command(self, target, platform, configuration, extra_args=()):
+        """argv of UBT building one target of the workspace's host project"""
+        return ubt_command(self.engine, target, platform, configuration, [
+            f"-Project={self.project_file}",
+            f"-Plugin={self.plugin_file}",
+            "-NoHotReload",
+            "-WaitMutex",
+            *extra_args,
+        ])
+
+    def record(self, key, compiled):
+        """Remember a target's compile count; returns the share of compile actions reused, or None"""
+        targets = self.state.setdefault("targets", {})
+        entry = targets.setdefault(key, {"full": 0, "builds": 0, "compiled": 0})
+        # The biggest compile count seen is taken to be a full build of the target
+        entry["full"] = max(entry["full"], compiled)
+        entry["builds"] += 1
+        entry["compiled"] += compiled
+        entry["last_compiled"] = compiled
+        if entry["builds"] == 1 or not entry["full"]:
+            entry["last_reuse"] = None if entry["builds"] == 1 else 1.0
+        else:
+            entry["last_reuse"] = 1 - compiled / entry["full"]
+        return entry["last_reuse"]
+
+    def hit_rate(self):
+        """Share of compile actions avoided over every incremental build, or None before the second build"""
+        reused = possible = 0
+        for entry in self.state.get("targets", {}).values():
+            incremental = entry["builds"] - 1
+            if incremental > 0:
+                possible += incremental * entry["full"]
+                reused += incremental * entry["full"] - (entry["compiled"] - entry["full"])
+        return reused / possible if possible else None
+
+    def size(self):
+        total = 0
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+
+def list_workspaces(root=WORKSPACE_DIR):
+    """(path, state) of every workspace under root"""
+    workspaces = []
+    try:
+        plugins = os.listdir(root)
+    except OSError:
+        return workspaces
+    for plugin in plugins:
+        try:
+            builds = os.listdir(os.path.join(root, plugin))
+        except OSError:
+            continue
+        for build in builds:
+            path = os.path.join(root, plugin, build)
+            try:
+                with open(os.path.join(path, STATE_FILE), 'r') as f:
+                    workspaces.append((path, json.load(f)))
+            except (json.JSONDecodeError, IOError):
+                pass
+    return workspaces
+
+
+class WorkspaceSettings:
+    """How a BuildQueue builds in workspaces (see WorkspaceBuildJob)"""
+
+    def __init__(self, root=WORKSPACE_DIR, editor_only=True, ubt_args=()):
+        self.root = root
+        self.editor_only = editor_only
+        self.ubt_args = list(ubt_args)
+
+
+class WorkspaceBuildJob(BuildJob):
+    """A BuildJob that compiles in a persistent workspace with UBT instead of running BuildPlugin"""
+
+    def __init__(self, plugin, engine, package_dir, settings, **kwargs):
+        # uat_args needs these while BuildJob sets up progress tracking
+        self.settings = settings
+        self.targets = workspace_targets(kwargs.get("extra_args", ()), settings.editor_only)
+        super().__init__(plugin, engine, package_dir, **kwargs)
+        self.workspace = Workspace(plugin, engine, host_platform(), settings.root)
+        self.argv = self.workspace.ubt_command(*self.targets[0], settings.ubt_args)
+        self.command = format_command(self.argv)
+        self.progress.expected_phases = len(self.targets)
+        self.reuse = None
+        self.compiled = 0
+        self._compiled = 0
+        self._compile_lock = threading.Lock()
+        self.progress.add_listener(self._count_compiles)
+
+    @property
+    def uat_args(self):
+        return ["Workspace", *(" ".join(target) for target in self.targets), *self.settings.ubt_args]
+
+    def _count_compiles(self, event):
+        if type(event) is ActionProgress and event.action == "Compile":
+            with self._compile_lock:
+                self._compiled += 1
+
+    def _run_ubt(self, target, platform, configuration):
+        budget_args = self.budget.ubt_args() if self.budget else []
+        self.argv = self.workspace.ubt_command(target, platform, configuration,
+                                               [*budget_args, *self.settings.ubt_args])
+        self.command = format_command(self.argv)
+        self.log.append(f"Running: {self.command}")
+        self.progress.apply(PhaseStarted(target, platform, configuration))
+        self._compiled = 0
+        try:
+            returncode = run_command(self.argv, self._output, self._process_started)
+        finally:
+            self._finish_setup()
+            if self._rss_sampler:
+                self.peak_rss = max(self.peak_rss or 0, self._rss_sampler.stop() or 0) or None
+                self._rss_sampler = None
+            if self._job_object and not self._terminator:
+                # Each UBT run gets its own job object; one being cancelled is closed by run() after the terminator
+                self._job_object.close()
+                self._job_object = None
+        self.compiled += self._compiled
+        if returncode == 0 and not self.cancel_requested:
+            reuse = self.workspace.record(f"{target} {platform} {configuration}", self._compiled)
+            if reuse is None:
+                self.log.append(f"Workspace: {self._compiled} files compiled, first build of {target} {platform} {configuration}")
+            else:
+                self.log.append(f"Workspace: {self._compiled} files compiled, {reuse * 100:.0f}% of the full build reused")
+        return returncode
+
+    def _lock_workspace(self):
+        """Wait for the workspace lock (held on return), or None once the job is cancelled"""
+        deadline = time.time() + WORKSPACE_LOCK_TIMEOUT
+        waiting = False
+        while not self.cancel_requested:
+            lock = self.workspace.lock(timeout=WORKSPACE_LOCK_POLL)
+            try:
+                return lock.__enter__()
+            except TimeoutError:
+                if time.time() > deadline:
+                    raise
+            if not waiting:
+                self.log.append("Waiting for another build of this workspace to finish...")
+                waiting = True
+        return None
+
+    def _build(self):
+        workspace = self.workspace
+        started = time.time()
+        lock = self._lock_workspace()
+        if lock is None:
+            return None
+        try:
+            synced = workspace.prepare()
+            self.log.append(f"Synced sources into workspace {synced.summary()}")
+            if synced.errors:
+                raise RuntimeError(f"Could not sync the plugin into its workspace: {synced.errors[0]}")
+            ignored = [arg for arg in self.extra_args if not arg.lower().startswith("-targetplatforms=")]
+            if ignored:
+                self.log.append(f"Warning: BuildPlugin options don't apply to workspace builds, ignoring {' '.join(ignored)}")
+            returncode = 0
+            for target in self.targets:
+                if self.cancel_requested:
+                    break
+                returncode = self._run_ubt(*target)
+                if returncode != 0:
+                    break
+            workspace.state["builds"] = workspace.state.get("builds", 0) + 1
+            workspace.state["last_build"] = time.time()
+            workspace.save_state()
+            if returncode == 0 and not self.cancel_requested:
+                packaged = sync_tree(workspace.plugin_dir, self.package_dir, PACKAGE_EXCLUDES, hardlink=False)
+                self.log.append(f"Packaged {packaged.summary()}")
+                if packaged.errors:
+                    raise RuntimeError(f"Could not copy the built plugin to {self.package_dir}: {packaged.errors[0]}")
+        finally:
+            lock.__exit__(None, None, None)
+        hit_rate = workspace.hit_rate()
+        if hit_rate is not None:
+            self.reuse = hit_rate
+            self.log.append(f"Workspace reuse over all rebuilds: {hit_rate * 100:.0f}% ({time.time() - started:.1f}s this time)")
+        if self._terminator:
+            self.cancel_report = self._terminator.join()
+        return returncode
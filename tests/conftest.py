@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Before the package is imported: its data folder (cache, indexes, logs) must not be the user's
+os.environ["UE_PLUGIN_REBUILDER_HOME"] = tempfile.mkdtemp(prefix="plugin-rebuilder-tests-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
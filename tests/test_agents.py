@@ -0,0 +1,112 @@
+import http.client
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+from plugin_rebuilder.agents import (
+    EXCLUDED_DIRS, AgentClient, AgentPool, BuildAgent, check_agent_args, extract_archive, zip_directory,
+)
+from plugin_rebuilder.build_queue import CANCELLED, SUCCEEDED, BuildQueue
+from plugin_rebuilder.simulator import create_fake_engine, create_fake_plugin
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def setup(tmp_path):
+    """Two agents on localhost with a fast UE 5.4 and a slow UE 5.3, and a plugin to build"""
+    fast = create_fake_engine(str(tmp_path / "UE_5.4"), (5, 4, 0), startup=0.5)
+    slow = create_fake_engine(str(tmp_path / "UE_5.3"), (5, 3, 0), rate=200)
+    agents, servers = [], []
+    for n in range(2):
+        agent = BuildAgent(str(tmp_path / f"agent{n}"), max_jobs=1, engines=[fast, slow])
+        server = agent.serve("127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        agents.append(agent)
+        servers.append(server)
+    urls = [f"http://127.0.0.1:{server.server_address[1]}" for server in servers]
+    yield {"fast": fast, "slow": slow, "urls": urls, "plugin": create_fake_plugin(str(tmp_path / "src"))}
+    for agent, server in zip(agents, servers):
+        agent.queue.cancel_all()
+        server.shutdown()
+        server.server_close()
+
+
+def test_remote_builds_stream_their_log_and_return_the_package(tmp_path, setup):
+    queue = BuildQueue(max_workers=2, agents=AgentPool(setup["urls"]), log_dir=str(tmp_path / "logs"))
+    jobs = [queue.submit(setup["plugin"], setup["fast"], str(tmp_path / f"out{n}")) for n in range(2)]
+    wait_for(lambda: all(job.finished for job in jobs))
+    for job in jobs:
+        assert job.status == SUCCEEDED, job.log.since(0)[0]
+        lines = job.log.since(0)[0]
+        assert any(line.startswith("Simulated build: BuildPlugin") for line in lines)
+        assert "BUILD SUCCESSFUL" in lines
+        assert job.progress.warnings > 0
+        assert os.path.isfile(os.path.join(job.package_dir, "Simulated.uplugin"))
+    # Each agent has one slot, so the least loaded one takes the second build
+    assert sorted(job.agent for job in jobs) == sorted(setup["urls"])
+
+
+def test_cancel_stops_the_remote_build(tmp_path, setup):
+    queue = BuildQueue(agents=AgentPool(setup["urls"]), log_dir=str(tmp_path / "logs"))
+    job = queue.submit(setup["plugin"], setup["slow"], str(tmp_path / "out"))
+    wait_for(lambda: job.progress.fraction > 0)  # Lines arrive while the build runs
+    queue.cancel(job.id)
+    wait_for(lambda: job.finished)
+    assert job.status == CANCELLED
+    assert job.elapsed < 5  # The whole log takes over 6s to replay
+    assert not os.path.exists(os.path.join(job.package_dir, "Simulated.uplugin"))
+
+
+def test_agent_rejects_bad_requests(tmp_path, setup):
+    archive = str(tmp_path / "plugin.zip")
+    zip_directory(os.path.dirname(setup["plugin"]), archive, EXCLUDED_DIRS)
+    client = AgentClient(setup["urls"][0])
+    for args in (["-Package=/tmp/x"], ["-Foo=../../bar"]):
+        with pytest.raises(RuntimeError, match="not allowed|set by the agent"):
+            client.submit(archive, "5.4", "Simulated.uplugin", args)
+    with pytest.raises(RuntimeError, match="No engine"):
+        client.submit(archive, "4.27", "Simulated.uplugin")
+
+    port = int(setup["urls"][0].rsplit(":", 1)[1])
+    for length in (None, "-5", "lots"):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.putrequest("POST", "/jobs?engine=5.4&plugin=Simulated.uplugin")
+        if length is not None:
+            connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        connection.close()
+
+    job_id = client.submit(archive, "5.4", "Simulated.uplugin", ["-TargetPlatforms=Win64+Linux"])
+    with pytest.raises(RuntimeError, match="must be numbers"):
+        client.log(job_id, "abc")
+    wait_for(lambda: client.log(job_id, 0, wait=0)["finished"])
+    output = str(tmp_path / "output.zip")
+    client.download(job_id, output)
+    with zipfile.ZipFile(output) as zf:
+        assert "Simulated.uplugin" in zf.namelist()
+    client.delete(job_id)
+
+
+def test_argument_and_archive_checks(tmp_path):
+    assert check_agent_args(["-Rocket", "-TargetPlatforms=Win64+Linux"]) == ["-Rocket", "-TargetPlatforms=Win64+Linux"]
+    for arg in ("Rocket", "-Plugin=P.uplugin", "-project=x", "-X=a b", "-X=C:\\evil", "-X=/etc", "-X=$(id)"):
+        with pytest.raises(ValueError):
+            check_agent_args([arg])
+
+    archive = str(tmp_path / "evil.zip")
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr("../escaped.txt", "x")
+    with pytest.raises(ValueError):
+        extract_archive(archive, str(tmp_path / "dest"))
+    assert not os.path.exists(tmp_path / "escaped.txt")
@@ -0,0 +1,46 @@
+import sys
+import time
+
+import pytest
+
+from plugin_rebuilder.async_runner import LineSplitter, run_command
+from plugin_rebuilder.process_tree import pid_alive
+
+# Starts a grandchild that would sleep for a minute and prints its pid
+SPAWN_CHILD = (
+    "import subprocess, sys, time\n"
+    "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+    "print(child.pid, flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+
+def test_lines_and_exit_code():
+    batches = []
+    code = run_command([sys.executable, "-c", "print('a'); print(); print(' b '); raise SystemExit(3)"],
+                       batches.append)
+    assert code == 3
+    assert [line for batch in batches for line in batch] == ["a", "b"]
+
+
+def test_split_characters_and_bad_bytes():
+    splitter = LineSplitter("utf-8")
+    assert splitter.feed("café 1\nx".encode()[:4]) == []
+    assert splitter.feed("café 1\nx".encode()[4:] + b"\xff\n") == ["café 1", "x�"]
+
+
+def test_failing_consumer_kills_the_whole_tree():
+    children = []
+
+    def on_lines(lines):
+        children.extend(int(line) for line in lines)
+        raise RuntimeError("consumer failed")
+
+    started = time.time()
+    with pytest.raises(RuntimeError, match="consumer failed"):
+        run_command([sys.executable, "-c", SPAWN_CHILD], on_lines)
+    assert time.time() - started < 30
+    deadline = time.time() + 5
+    while pid_alive(children[0]):
+        assert time.time() < deadline, "grandchild survived"
+        time.sleep(0.05)
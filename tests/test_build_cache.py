@@ -0,0 +1,96 @@
+import json
+import os
+
+from plugin_rebuilder.build_cache import BuildCache, cache_key
+
+
+def make_engine(root, patch=2):
+    os.makedirs(os.path.join(root, "Engine", "Build"))
+    with open(os.path.join(root, "Engine", "Build", "Build.version"), "w") as f:
+        json.dump({"MajorVersion": 5, "MinorVersion": 4, "PatchVersion": patch}, f)
+    return str(root)
+
+
+def test_key_follows_every_input(tmp_path):
+    engine = make_engine(tmp_path / "UE_5.4")
+    key = cache_key("P.uplugin", engine, ["BuildPlugin"], tree_hash="a" * 40)
+    assert key == cache_key("P.uplugin", engine, ["BuildPlugin"], tree_hash="a" * 40)
+    assert key != cache_key("P.uplugin", engine, ["BuildPlugin"], tree_hash="b" * 40)
+    assert key != cache_key("P.uplugin", engine, ["BuildPlugin", "-TargetPlatforms=Win64"], tree_hash="a" * 40)
+    assert key != cache_key("P.uplugin", make_engine(tmp_path / "UE_5.4.3", patch=3), ["BuildPlugin"],
+                            tree_hash="a" * 40)
+
+
+def test_same_engine_version_in_another_folder_shares_the_key(tmp_path):
+    first = cache_key("P.uplugin", make_engine(tmp_path / "a"), ["BuildPlugin"], tree_hash="a" * 40)
+    second = cache_key("P.uplugin", make_engine(tmp_path / "b"), ["BuildPlugin"], tree_hash="a" * 40)
+    assert first == second
+
+
+def test_store_restore_and_eviction(tmp_path):
+    package = tmp_path / "package"
+    (package / "Binaries").mkdir(parents=True)
+    (package / "Binaries" / "lib.so").write_bytes(b"x" * 1000)
+    cache = BuildCache(str(tmp_path / "cache"), max_size=1500)
+    cache.store("one", str(package))
+    restored = tmp_path / "restored"
+    cache.restore("one", str(restored))
+    assert (restored / "Binaries" / "lib.so").read_bytes() == b"x" * 1000
+
+    cache.store("two", str(package))
+    assert cache.lookup("one") is None  # Least recently used, over the limit
+    assert cache.lookup("two") is not None
+    assert BuildCache(str(tmp_path / "cache"), max_size=1500).lookup("two") is not None
+
+
+def test_writes_to_a_restored_file_leave_the_entry_alone(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "lib.so").write_bytes(b"x" * 100)
+    cache = BuildCache(str(tmp_path / "cache"))
+    cache.store("k", str(package))
+    with open(package / "lib.so", "r+b") as f:
+        f.write(b"built again")
+
+    restored = tmp_path / "restored"
+    counts = cache.restore("k", str(restored))
+    assert "hardlink" not in counts
+    with open(restored / "lib.so", "r+b") as f:
+        f.write(b"edited in place")
+    assert (tmp_path / "cache" / "k" / "lib.so").read_bytes() == b"x" * 100
+    cache.restore("k", str(tmp_path / "again"))
+    assert (tmp_path / "again" / "lib.so").read_bytes() == b"x" * 100
+
+
+def test_instances_sharing_a_folder_see_each_others_changes(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "lib.so").write_bytes(b"x" * 100)
+    root = str(tmp_path / "cache")
+    first = BuildCache(root, max_size=250)
+    second = BuildCache(root, max_size=250)
+    first.store("k", str(package))
+    second.store("k2", str(package))
+    assert first.lookup("k2") is not None
+
+    second.remove("k")
+    assert first.lookup("k") is None
+    assert first.restore("k", str(tmp_path / "restored")) is None
+
+    first.store("k3", str(package))
+    assert sorted(BuildCache(root).index) == ["k2", "k3"]
+    first.store("k4", str(package))  # Over the limit: k2 is the oldest and must go
+    assert second.lookup("k2") is None
+    assert second.lookup("k3") is not None and second.lookup("k4") is not None
+    assert sorted(name for name in os.listdir(root) if not name.startswith("index")) == ["k3", "k4"]
+
+
+def test_empty_entry_is_a_miss(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "lib.so").write_bytes(b"x")
+    cache = BuildCache(str(tmp_path / "cache"))
+    cache.store("k", str(package))
+    os.unlink(tmp_path / "cache" / "k" / "lib.so")
+    assert cache.restore("k", str(tmp_path / "restored")) is None
+    assert cache.lookup("k") is None
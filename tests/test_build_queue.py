@@ -0,0 +1,62 @@
+import itertools
+import os
+import threading
+import time
+
+from plugin_rebuilder import build_queue
+from plugin_rebuilder.build_queue import BuildJob, BuildQueue
+from plugin_rebuilder.scheduler import Budget
+from plugin_rebuilder.simulator import create_fake_engine, create_fake_plugin
+from plugin_rebuilder.watch import WatchSession
+
+
+def make_job(tmp_path, monkeypatch, pid):
+    # A fresh counter and pid stand in for a separate process
+    monkeypatch.setattr(BuildJob, "_ids", itertools.count(1))
+    monkeypatch.setattr(os, "getpid", lambda: pid)
+    job = BuildJob(str(tmp_path / "MyPlugin" / "MyPlugin.uplugin"), str(tmp_path / "UE_5.4"),
+                   str(tmp_path / "out"), log_dir=str(tmp_path / "logs"))
+    job.log.close_file()
+    return job
+
+
+def test_log_names_differ_between_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr("time.strftime", lambda *args: "20260101-120000")
+    first = make_job(tmp_path, monkeypatch, 1000)
+    second = make_job(tmp_path, monkeypatch, 1001)
+    assert first.id == second.id == 1
+    assert first.log.log_path != second.log.log_path
+
+
+def test_process_setup_runs_off_the_output_loop(tmp_path, monkeypatch):
+    threads = []
+    monkeypatch.setattr(build_queue, "set_tree_affinity",
+                        lambda *args: threads.append(threading.current_thread().name))
+    job = BuildJob(create_fake_plugin(str(tmp_path / "src")), create_fake_engine(str(tmp_path / "UE_5.4")),
+                   str(tmp_path / "out"))
+    job.apply_budget(Budget([0]))
+    job.run()
+    assert job.status == build_queue.SUCCEEDED
+    assert threads and all(name.startswith("build-process-setup") for name in threads)
+    assert job.peak_rss is not None
+
+
+def test_notes_are_logged_before_the_build(tmp_path):
+    plugin = create_fake_plugin(str(tmp_path / "src"))
+    engine = create_fake_engine(str(tmp_path / "UE_5.4"))
+    queue = BuildQueue(max_workers=2)
+    note = "Warning: disk: Only 9 GB free"
+    job = queue.submit(plugin, engine, str(tmp_path / "out"), notes=[note])
+    session = WatchSession(queue, plugin, engine, str(tmp_path / "watched"), notes=[note]).start(build_now=False)
+    session._rebuild("First")
+    first = session.job
+    session._rebuild("Second")
+    session.stop()
+    deadline = time.time() + 30
+    while not (job.finished and first.finished and session.job.finished):
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.05)
+    lines = job.log.since(0)[0]
+    assert lines[:2] == [note, "Starting plugin rebuild..."]
+    assert first.log.since(0)[0][0] == note
+    assert note not in session.job.log.since(0)[0]
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from plugin_rebuilder import commands
+from plugin_rebuilder.commands import UatOptions, check_batch_args, parse_platforms, script_argv, uat_command
+
+
+def test_scripts_without_exec_bit_run_under_bash(tmp_path):
+    script = tmp_path / "RunUAT.sh"
+    script.write_text("#!/bin/bash\n")
+    if os.name != "nt":
+        assert script_argv(str(script)) == ["bash", str(script)]
+    script.chmod(0o755)
+    assert script_argv(str(script)) == [str(script)]
+
+
+def test_paths_stay_single_arguments(tmp_path):
+    argv = uat_command(str(tmp_path), "C:/My Plugins/P&Q/P.uplugin", "D:/out dir", ["-Rocket"])
+    assert argv[-4:] == ["BuildPlugin", "-Plugin=C:/My Plugins/P&Q/P.uplugin", "-Package=D:/out dir", "-Rocket"]
+
+
+@pytest.mark.parametrize("arg", [
+    '-Plugin=C:/P"Q/P.uplugin',
+    "-Package=%TEMP%",
+    "-Rocket\r\n",
+    "-Plugin=C:/P&Q/P.uplugin",
+    "-X=a|b",
+    "-X=a^b",
+    "-X=<in",
+])
+def test_batch_files_refuse_arguments_cmd_would_expand(monkeypatch, arg):
+    monkeypatch.setattr(commands.os, "name", "nt")
+    with pytest.raises(ValueError):
+        check_batch_args(["RunUAT.bat", "BuildPlugin", arg])
+
+
+def test_batch_files_accept_quoted_specials_and_plain_args(monkeypatch):
+    monkeypatch.setattr(commands.os, "name", "nt")
+    argv = ["RunUAT.bat", "BuildPlugin", "-Plugin=C:/My Plugins/P&Q/P.uplugin", "-TargetPlatforms=Win64+Linux"]
+    assert check_batch_args(argv) == argv
+    assert check_batch_args(["RunUAT.sh", "-X=%TEMP%&"]) == ["RunUAT.sh", "-X=%TEMP%&"]
+
+
+def test_batch_rules_only_apply_on_windows(monkeypatch):
+    monkeypatch.setattr(commands.os, "name", "posix")
+    assert check_batch_args(["RunUAT.bat", "-Package=%TEMP%"]) == ["RunUAT.bat", "-Package=%TEMP%"]
+
+
+@pytest.mark.parametrize("options", [
+    UatOptions(),
+    UatOptions(target_platforms=["Win64"], no_host_platform=True),
+    UatOptions(target_platforms=["Win64", "Linux"], rocket=True, strict_includes=True, vs2022=True),
+    UatOptions(extra_args=["-Unversioned", "-Foo=bar"]),
+])
+def test_options_round_trip(options):
+    assert UatOptions.from_args(options.args()) == options
+
+
+def test_options_parse_case_insensitively():
+    options = UatOptions.from_args(["-targetplatforms=Win64++Android", "-ROCKET", "-VS2022", "-Custom"])
+    assert options == UatOptions(target_platforms=["Win64", "Android"], rocket=True, vs2022=True,
+                                 extra_args=["-Custom"])
+    assert parse_platforms("Win64, Android+Linux") == ["Win64", "Android", "Linux"]
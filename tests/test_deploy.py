@@ -0,0 +1,97 @@
+import pytest
+
+from plugin_rebuilder.deploy import Deployer, overlaps, sync_tree
+
+
+@pytest.fixture
+def layout(tmp_path):
+    """A package, and a project whose Plugins/MyPlugin is the plugin's own source folder"""
+    package = tmp_path / "package"
+    (package / "Binaries").mkdir(parents=True)
+    (package / "MyPlugin.uplugin").write_text("{}")
+    (package / "Binaries" / "lib.so").write_text("built")
+    project = tmp_path / "Project"
+    source = project / "Plugins" / "MyPlugin"
+    (source / "Source" / "MyPlugin").mkdir(parents=True)
+    (source / "Source" / "MyPlugin" / "MyPlugin.Build.cs").write_text("rules")
+    (source / "MyPlugin.uplugin").write_text('{"Modules": []}')
+    (project / "Project.uproject").write_text("{}")
+    other = tmp_path / "Other"
+    (other / "Plugins" / "MyPlugin").mkdir(parents=True)
+    (other / "Other.uproject").write_text("{}")
+    (other / "Plugins" / "MyPlugin" / "stale.txt").write_text("old")
+    return package, project, source, other
+
+
+def test_overlaps(tmp_path):
+    assert overlaps(tmp_path / "a", tmp_path / "a")
+    assert overlaps(tmp_path / "a", tmp_path / "a" / "b")
+    assert overlaps(tmp_path / "a" / "b", tmp_path / "a")
+    assert not overlaps(tmp_path / "a", tmp_path / "ab")
+
+
+def test_refuses_the_plugins_own_source_folder(layout):
+    package, project, source, other = layout
+    results = Deployer([str(project), str(other)], delete=True).deploy(
+        str(package), "MyPlugin", source_plugin=str(source / "MyPlugin.uplugin"))
+    by_target = {result.target: result for result in results}
+    assert by_target[str(source)].errors
+    assert (source / "Source" / "MyPlugin" / "MyPlugin.Build.cs").exists()
+    assert not by_target[str(other / "Plugins" / "MyPlugin")].errors
+    assert (other / "Plugins" / "MyPlugin" / "stale.txt").exists()  # No deploy wrote it
+    assert (other / "Plugins" / "MyPlugin" / "Binaries" / "lib.so").read_text() == "built"
+
+
+def test_refuses_a_target_around_the_source(layout, tmp_path):
+    package, _, source, _ = layout
+    # Not a project folder, so the target is tmp_path/Project, which holds the plugin's sources
+    results = Deployer([str(tmp_path)]).deploy(str(package), "Project", source_plugin=str(source / "MyPlugin.uplugin"))
+    assert results[0].errors
+    assert (source / "Source").exists()
+
+
+def test_nothing_is_deleted_without_the_source(layout):
+    package, _, _, other = layout
+    results = Deployer([str(other)], delete=True).deploy(str(package), "MyPlugin")
+    assert not results[0].errors
+    assert (other / "Plugins" / "MyPlugin" / "stale.txt").exists()
+
+
+def test_sync_tree_refuses_nested_folders(tmp_path):
+    (tmp_path / "src" / "sub").mkdir(parents=True)
+    with pytest.raises(ValueError):
+        sync_tree(str(tmp_path / "src"), str(tmp_path / "src" / "sub"))
+
+
+def test_deletes_are_opt_in_and_limited_to_deployed_files(layout):
+    package, _, source, other = layout
+    target = other / "Plugins" / "MyPlugin"
+    (package / "Binaries" / "old.so").write_text("old build")
+    (package / "Binaries" / "edited.so").write_text("old build")
+    (target / ".git").mkdir()
+    (target / ".git" / "HEAD").write_text("ref")
+    uplugin = str(source / "MyPlugin.uplugin")
+    Deployer([str(other)]).deploy(str(package), "MyPlugin", source_plugin=uplugin)
+    (package / "Binaries" / "old.so").unlink()
+    (package / "Binaries" / "edited.so").unlink()
+    (target / "Binaries" / "edited.so").write_text("local change")
+
+    Deployer([str(other)]).deploy(str(package), "MyPlugin", source_plugin=uplugin)
+    assert (target / "Binaries" / "old.so").exists()  # Deletes are off by default
+
+    results = Deployer([str(other)], delete=True).deploy(str(package), "MyPlugin", source_plugin=uplugin)
+    assert results[0].deleted == 1
+    assert not (target / "Binaries" / "old.so").exists()
+    assert (target / "Binaries" / "edited.so").read_text() == "local change"
+    assert (target / ".git" / "HEAD").exists() and (target / "stale.txt").exists()
+    assert (target / "Binaries" / "lib.so").read_text() == "built"
+
+
+def test_plain_sync_still_mirrors(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    (tmp_path / "dst" / "old").mkdir(parents=True)
+    (tmp_path / "dst" / "old" / "b.txt").write_text("b")
+    result = sync_tree(str(tmp_path / "src"), str(tmp_path / "dst"))
+    assert result.deleted == 1
+    assert sorted(p.name for p in (tmp_path / "dst").iterdir()) == ["a.txt"]
@@ -0,0 +1,31 @@
+import json
+
+from plugin_rebuilder.engines import EngineRegistry, inspect_engine
+from plugin_rebuilder.simulator import create_fake_engine
+
+
+def test_stale_cache_entries_are_read_again(tmp_path):
+    engine = create_fake_engine(str(tmp_path / "UE_5.4"), (5, 4, 2))
+    cache = tmp_path / "engines.json"
+    registry = EngineRegistry(str(cache))
+    registry.get(engine)
+    registry._save_cache()
+    data = json.loads(cache.read_text())
+    for entry in data.values():
+        entry["engine"]["removed_field"] = True  # Written by another version of the tool
+    cache.write_text(json.dumps(data))
+    found = EngineRegistry(str(cache)).discover([engine])
+    assert [e.version for e in found if e.root == engine] == ["5.4.2"]
+
+
+def test_malformed_build_version_is_unknown_not_fatal(tmp_path):
+    engine = create_fake_engine(str(tmp_path / "UE_5.4"))
+    version_file = tmp_path / "UE_5.4" / "Engine" / "Build" / "Build.version"
+    version_file.write_text(json.dumps({"MajorVersion": 5, "MinorVersion": "four", "PatchVersion": None}))
+    install = inspect_engine(engine)
+    assert (install.major, install.minor, install.patch, install.version) == (5, 0, 0, "5.0.0")
+    assert len(install.warnings) == 2 and "MinorVersion" in install.warnings[0]
+
+    version_file.write_text("[5, 4]")
+    assert inspect_engine(engine).version is None
+    assert inspect_engine(engine).warnings
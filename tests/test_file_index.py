@@ -0,0 +1,62 @@
+import os
+import time
+
+from plugin_rebuilder.file_index import FileIndex, RACY_WINDOW_NS
+
+
+def make_plugin(root):
+    (root / "Source" / "P" / "Private").mkdir(parents=True)
+    (root / "Source" / "P" / "P.Build.cs").write_text("rules")
+    (root / "Source" / "P" / "Private" / "P.cpp").write_text("int x;")
+    (root / "Binaries").mkdir()
+    (root / "Binaries" / "P.dll").write_text("not an input")
+    (root / "P.uplugin").write_text("{}")
+    return str(root / "P.uplugin")
+
+
+def age(path, seconds=RACY_WINDOW_NS / 1e9 * 2):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_only_changed_files_are_rehashed(tmp_path):
+    plugin = make_plugin(tmp_path / "P")
+    for root, _, files in os.walk(tmp_path / "P"):
+        for name in files:
+            age(os.path.join(root, name))
+    index_dir = str(tmp_path / "index")
+
+    first = FileIndex(plugin, index_dir)
+    tree_hash = first.update()
+    assert first.stats["files"] == 3  # Binaries is not an input
+    assert first.stats["hashed"] == 3
+
+    again = FileIndex(plugin, index_dir)
+    assert again.update() == tree_hash
+    assert again.stats["hashed"] == 0
+
+    cpp = tmp_path / "P" / "Source" / "P" / "Private" / "P.cpp"
+    cpp.write_text("int y;")
+    age(cpp)
+    changed = FileIndex(plugin, index_dir)
+    assert changed.update() != tree_hash
+    assert changed.stats["hashed"] == 1
+
+
+def test_recently_modified_files_are_hashed_again(tmp_path):
+    plugin = make_plugin(tmp_path / "P")
+    index_dir = str(tmp_path / "index")
+    FileIndex(plugin, index_dir).update()
+    # Written within the racy window: a second write in the same mtime tick must not go unnoticed
+    again = FileIndex(plugin, index_dir)
+    again.update()
+    assert again.stats["hashed"] == 3
+
+
+def test_non_input_files_do_not_change_the_hash(tmp_path):
+    plugin = make_plugin(tmp_path / "P")
+    index_dir = str(tmp_path / "index")
+    tree_hash = FileIndex(plugin, index_dir).update()
+    (tmp_path / "P" / "Binaries" / "P.dll").write_text("rebuilt")
+    (tmp_path / "P" / "Intermediate").mkdir()
+    assert FileIndex(plugin, index_dir).update() == tree_hash
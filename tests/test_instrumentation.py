@@ -0,0 +1,33 @@
+import pstats
+import threading
+
+from plugin_rebuilder.instrumentation import Metrics, SessionProfiler
+
+
+def busy_in_thread():
+    return sum(range(10000))
+
+
+def test_profile_covers_threads_started_while_it_runs(tmp_path):
+    profiler = SessionProfiler().start()
+    thread = threading.Thread(target=busy_in_thread)
+    thread.start()
+    thread.join()
+    path = str(tmp_path / "session.prof")
+    profiler.stop(path)
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert "busy_in_thread" in functions
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    metrics.count("lines", 5)
+    with metrics.timer("work"):
+        pass
+    assert metrics.snapshot()["counters"] == {} and metrics.snapshot()["timers"] == {}
+    metrics.enabled = True
+    metrics.count("lines", 5)
+    with metrics.timer("work"):
+        pass
+    assert metrics.snapshot()["counters"] == {"lines": 5}
+    assert "plugin_rebuilder_work_seconds_count 1" in metrics.prometheus_text()
@@ -0,0 +1,66 @@
+from plugin_rebuilder import log_archive
+from plugin_rebuilder.log_archive import LogArchive, compile_pattern, list_logs, open_log_writer, search_logs
+from plugin_rebuilder.uat_parser import WARNING
+
+LINES = [
+    "Running AutomationTool...",
+    *[f"[{n}/300] Compile Module.P.{n}.cpp" for n in range(1, 301)],
+    "C:\\P\\Source\\P\\Private\\A.cpp(12): error C2065: 'x': undeclared identifier",
+    "C:\\P\\Source\\P\\Private\\B.cpp(3): warning C4996: 'y': was declared deprecated",
+    "BUILD FAILED",
+]
+
+
+def write_log(path, lines=LINES):
+    writer = open_log_writer(str(path))
+    writer.write_lines(lines[:150])
+    writer.write_lines(lines[150:])
+    writer.close()
+    return str(path)
+
+
+def test_round_trip_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_archive, "BLOCK_SIZE", 512)  # Many small blocks
+    archive = LogArchive(write_log(tmp_path / "build.log.gz"))
+    assert len(archive.blocks) > 5
+    assert archive.total_lines == len(LINES)
+    assert [line for _, line in archive.lines(1, len(LINES))] == LINES
+    assert archive.lines(150, 3) == [(150, LINES[149]), (151, LINES[150]), (152, LINES[151])]
+
+
+def test_diagnostics_and_grep(tmp_path):
+    archive = LogArchive(write_log(tmp_path / "build.log.gz"))
+    error = archive.diagnostic_line(1)
+    assert "error C2065" in LINES[error - 1]
+    assert "warning C4996" in LINES[archive.diagnostic_line(1, WARNING) - 1]
+    assert archive.diagnostic_line(2) is None
+    assert archive.grep(compile_pattern("build failed", ignore_case=True)) == [(len(LINES), "BUILD FAILED")]
+
+
+def test_plain_logs_read_the_same(tmp_path):
+    archive = LogArchive(write_log(tmp_path / "build.log"))
+    assert archive.total_lines == len(LINES)
+    assert archive.around(archive.diagnostic_line(1), 1)[1][1] == LINES[-3]
+
+
+def test_appending_continues_the_line_numbers(tmp_path):
+    path = write_log(tmp_path / "build.log.gz", LINES[:10])
+    writer = open_log_writer(path)
+    writer.write_lines(["more"])
+    writer.close()
+    assert LogArchive(path).lines(11, 1) == [(11, "more")]
+
+
+def test_list_and_search(tmp_path):
+    write_log(tmp_path / "a.log.gz")
+    write_log(tmp_path / "b.log", ["nothing here"])
+    logs = {entry["path"]: entry for entry in list_logs(str(tmp_path))}
+    assert logs[str(tmp_path / "a.log.gz")]["errors"] == 1
+    assert [path for path, _, _ in search_logs(str(tmp_path), "C2065")] == [str(tmp_path / "a.log.gz")]
+
+
+def test_grep_anchors_match_inside_a_block(tmp_path):
+    archive = LogArchive(write_log(tmp_path / "build.log.gz", ["first", "ERROR: Missing module", "last\r"]))
+    assert archive.grep(compile_pattern("^ERROR", regex=True)) == [(2, "ERROR: Missing module")]
+    assert archive.grep(compile_pattern("module$", regex=True, ignore_case=True)) == [(2, "ERROR: Missing module")]
+    assert archive.grep(compile_pattern("^last$", regex=True)) == [(3, "last")]
@@ -0,0 +1,12 @@
+from plugin_rebuilder.log_archive import LogArchive
+from plugin_rebuilder.log_buffer import LogBuffer
+
+
+def test_generators_reach_the_file_too(tmp_path):
+    path = str(tmp_path / "build.log.gz")
+    buffer = LogBuffer(capacity=3, log_path=path)
+    buffer.extend(f"line {n}" for n in range(5))
+    buffer.close_file()
+    assert buffer.snapshot() == ["line 2", "line 3", "line 4"]
+    assert buffer.dropped_lines == 2
+    assert [line for _, line in LogArchive(path).lines(1, 5)] == [f"line {n}" for n in range(5)]
@@ -0,0 +1,68 @@
+import json
+import time
+
+from plugin_rebuilder import path_cache
+from plugin_rebuilder.path_cache import PathCacheStore
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_changes_are_saved_together_after_a_quiet_period(tmp_path):
+    path = tmp_path / "path_cache.json"
+    store = PathCacheStore(str(path), delay=0.2)
+    store.add("ue_paths", "/UE_5.3")
+    store.add("ue_paths", "/UE_5.4")
+    store.add("ue_paths", "")  # Ignored
+    assert store["ue_paths"] == ["/UE_5.4", "/UE_5.3"]
+    assert not path.exists()
+    wait_for(path.exists)
+    assert read(path)["ue_paths"] == ["/UE_5.4", "/UE_5.3"]
+
+
+def test_instances_merge_instead_of_overwriting(tmp_path):
+    path = str(tmp_path / "path_cache.json")
+    first = PathCacheStore(path, delay=60)
+    second = PathCacheStore(path, delay=60)
+    first.add("uplugin_paths", "/A/A.uplugin")
+    first.add("save_paths", "/out")
+    second.add("uplugin_paths", "/B/B.uplugin")
+    assert first.flush() and second.flush()
+    assert read(path)["uplugin_paths"] == ["/B/B.uplugin", "/A/A.uplugin"]
+
+    second.remove("save_paths", "/out")
+    first.add("uplugin_paths", "/C/C.uplugin")
+    assert second.flush() and first.flush()
+    assert first["uplugin_paths"] == ["/C/C.uplugin", "/B/B.uplugin", "/A/A.uplugin"]
+    assert first["save_paths"] == [] == read(path)["save_paths"]
+
+
+def test_failed_save_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(path_cache, "RETRY_DELAY", 0.1)
+    path = tmp_path / "path_cache.json"
+    errors = []
+    store = PathCacheStore(str(path), delay=0.05, on_error=errors.append)
+    write = store._write
+    calls = []
+
+    def fail_once(cache_data):
+        calls.append(cache_data)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        write(cache_data)
+
+    monkeypatch.setattr(store, "_write", fail_once)
+    store.add("ue_paths", "/UE_5.4")
+    wait_for(lambda: errors)
+    assert store.last_error == "disk full"
+    wait_for(lambda: store.last_error is None)  # No further change needed
+    assert read(path)["ue_paths"] == ["/UE_5.4"]
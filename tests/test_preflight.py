@@ -0,0 +1,71 @@
+import json
+import time
+
+import pytest
+
+from plugin_rebuilder import commands
+from plugin_rebuilder.build_queue import BuildQueue
+from plugin_rebuilder.preflight import CHECKS, blocking_issues, check_modules, preflight_check, run_preflight
+from plugin_rebuilder.simulator import create_fake_engine, create_fake_plugin
+from plugin_rebuilder.uat_parser import ERROR
+
+
+def make_plugin(root, modules, rules):
+    root.mkdir(parents=True)
+    for relative in rules:
+        (root / relative).parent.mkdir(parents=True, exist_ok=True)
+        (root / relative).write_text("rules")
+    (root / "P.uplugin").write_text(json.dumps({"Modules": [{"Name": name} for name in modules]}))
+    return str(root / "P.uplugin")
+
+
+def test_rules_files_are_found_in_nested_folders(tmp_path):
+    plugin = make_plugin(tmp_path / "P", ["Core", "CoreEditor"], [
+        "Source/Runtime/Core/Core.Build.cs",
+        "Source/Editor/CoreEditor/CoreEditor.Build.cs",
+    ])
+    assert check_modules(plugin) == []
+
+
+def test_missing_rules_file_is_an_error(tmp_path):
+    plugin = make_plugin(tmp_path / "P", ["Core", "Missing"], ["Source/Core/Core.Build.cs"])
+    issues = check_modules(plugin)
+    assert [(severity, "Missing" in message) for severity, message, _ in issues] == [(ERROR, True)]
+
+
+def test_case_mismatch_gets_a_rename_hint(tmp_path):
+    plugin = make_plugin(tmp_path / "P", ["MyModule"], ["Source/mymodule/mymodule.Build.cs"])
+    (_, _, fix), = check_modules(plugin)
+    assert "MyModule.Build.cs" in fix
+
+
+@pytest.fixture
+def slow_check():
+    @preflight_check("slow", uses=("plugin",))
+    def slow(plugin):
+        time.sleep(0.5)
+        return []
+    yield "slow"
+    del CHECKS["slow"]
+
+
+def test_a_check_that_times_out_blocks_the_build(tmp_path, slow_check):
+    plugin = make_plugin(tmp_path / "P", [], [])
+    skip = [name for name in CHECKS if name != slow_check]
+    issues = run_preflight([(plugin, str(tmp_path))], str(tmp_path / "out"), skip=skip, timeout=0.05)
+    assert [issue.check for issue in blocking_issues(issues)] == [slow_check]
+
+
+def test_arguments_unsafe_for_run_uat_bat_are_reported_before_queueing(tmp_path, monkeypatch):
+    monkeypatch.setattr(commands.os, "name", "nt")
+    engine = create_fake_engine(str(tmp_path / "UE_5.4"))
+    plugin = create_fake_plugin(str(tmp_path / "src"))
+    issues = run_preflight([(plugin, engine)], str(tmp_path / "out"), skip=[name for name in CHECKS if name != "inputs"],
+                           extra_args=["-Define=%PATH%"])
+    assert [issue.check for issue in blocking_issues(issues)] == ["inputs"]
+    assert "%PATH%" in issues[0].message
+
+    queue = BuildQueue(max_workers=1)
+    with pytest.raises(ValueError):
+        queue.submit_matrix([plugin], [engine, str(tmp_path / "UE_5.4&5")], str(tmp_path / "out"))
+    assert queue.jobs == []  # Nothing queued when one of the builds is refused
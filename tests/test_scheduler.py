@@ -0,0 +1,58 @@
+import random
+import threading
+import time
+
+from plugin_rebuilder.scheduler import MEMORY_PER_ACTION, Budget, ResourceScheduler
+
+
+class FakeJob:
+    def __init__(self):
+        self.budget = None
+
+    def apply_budget(self, budget):
+        time.sleep(random.random() / 1000)
+        self.budget = budget
+
+
+def test_slices_cover_every_core_without_overlap():
+    scheduler = ResourceScheduler(cpus=range(10), memory=64 * 1024 ** 3)
+    jobs = [FakeJob() for _ in range(3)]
+    for job in jobs:
+        scheduler.acquire(job)
+    cpus = [cpu for job in jobs for cpu in job.budget.cpus]
+    assert sorted(cpus) == list(range(10))
+    assert sorted(job.budget.cores for job in jobs) == [3, 3, 4]
+
+    scheduler.release(jobs[0])
+    assert sorted(jobs[1].budget.cpus + jobs[2].budget.cpus) == list(range(10))
+
+
+def test_memory_limits_parallel_actions():
+    budget = Budget(range(16), memory=3 * MEMORY_PER_ACTION)
+    assert budget.parallel_actions == 3
+    assert budget.ubt_args() == ["-MaxParallelActions=3"]
+    assert Budget(range(4), memory=MEMORY_PER_ACTION / 2).parallel_actions == 1
+
+
+def test_max_builds_keeps_minimum_cores():
+    assert ResourceScheduler(cpus=range(8), memory=1024 ** 4, min_cores_per_build=2).max_builds() == 4
+    assert ResourceScheduler(cpus=range(1), memory=1024 ** 4).max_builds() == 1
+
+
+def test_concurrent_acquire_and_release_end_without_overlap():
+    scheduler = ResourceScheduler(cpus=range(16), memory=64 * 1024 ** 3)
+    jobs = [FakeJob() for _ in range(8)]
+
+    def churn(job):
+        for _ in range(20):
+            scheduler.acquire(job)
+            scheduler.release(job)
+        scheduler.acquire(job)
+
+    threads = [threading.Thread(target=churn, args=(job,)) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cpus = [cpu for job in jobs for cpu in job.budget.cpus]
+    assert sorted(cpus) == list(range(16))
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from plugin_rebuilder.simulator import synthetic_log
+from plugin_rebuilder.uat_parser import (
+    ERROR, WARNING, ActionCount, ActionProgress, BuildResult, Diagnostic, PhaseStarted, ProgressTracker,
+    TargetUpToDate, TotalTime, expected_phase_count, parse_line,
+)
+
+MSVC_ERROR = "C:\\P\\Source\\P\\Private\\A.cpp(12): error C2065: 'x': undeclared identifier"
+MSVC_FATAL = "C:\\P\\Source\\P\\Public\\A.h(1): fatal error C1083: Cannot open include file: 'B.h'"
+CLANG_WARNING = "/P/Source/P/Private/A.cpp:12:3: warning: unused variable 'x' [-Wunused-variable]"
+
+
+@pytest.mark.parametrize("line, event", [
+    ("Running AutomationTool...", None),
+    ('Running: /Engine/Binaries/ThirdParty/DotNet/dotnet "/Engine/Binaries/DotNET/UnrealBuildTool/'
+     'UnrealBuildTool.dll" UnrealGame Linux Shipping -Project=HostProject.uproject',
+     PhaseStarted("UnrealGame", "Linux", "Shipping")),
+    ('Running: C:\\UE\\Engine\\Binaries\\DotNET\\UnrealBuildTool\\UnrealBuildTool.exe '
+     '-Target="UnrealEditor Win64 Development -Project=H.uproject" -nomutex',
+     PhaseStarted("UnrealEditor", "Win64", "Development")),
+    ("Building 340 actions with 16 processes...", ActionCount(340)),
+    ("Building 1 action with 1 process...", ActionCount(1)),
+    ("[12/340] Compile [x64] Module.P.cpp", ActionProgress(12, 340, "Compile", "[x64] Module.P.cpp")),
+    ("Target is up to date", TargetUpToDate()),
+    ("Total execution time: 45.23 seconds", TotalTime(45.23)),
+    ("Total time in Parallel executor: 40.11 seconds", TotalTime(40.11)),
+    ("BUILD SUCCESSFUL", BuildResult(True)),
+    ("BUILD FAILED", BuildResult(False)),
+    ("ERROR: Unable to find plugin", Diagnostic(ERROR, "Unable to find plugin", category="UAT")),
+    ("WARNING: Plugin is deprecated", Diagnostic(WARNING, "Plugin is deprecated", category="UAT")),
+    ("LogPluginManager: Error: Unable to load plugin 'P'",
+     Diagnostic(ERROR, "Unable to load plugin 'P'", category="LogPluginManager")),
+    ("[2026.01.01-12.00.00:000][  0]LogInit: Warning: Missing config",
+     Diagnostic(WARNING, "Missing config", category="LogInit")),
+    (MSVC_ERROR, Diagnostic(ERROR, MSVC_ERROR, code="C2065")),
+    (MSVC_FATAL, Diagnostic(ERROR, MSVC_FATAL, code="C1083")),
+    (CLANG_WARNING, Diagnostic(WARNING, CLANG_WARNING)),
+    ("Compiled without errors or warnings", None),
+    ("Parsing command line: BuildPlugin -Plugin=P.uplugin", None),
+])
+def test_parse_line(line, event):
+    assert parse_line(line) == event
+
+
+def test_synthetic_build_is_tracked_to_the_end():
+    tracker = ProgressTracker(expected_phase_count(["BuildPlugin"]))
+    for line in synthetic_log(actions=100, platform="Win64", warning_every=10, errors=2):
+        tracker.feed(line)
+    assert [phase.label for phase in tracker.phases] == [
+        "UnrealEditor Win64 Development", "UnrealGame Win64 Development", "UnrealGame Win64 Shipping",
+    ]
+    assert all(phase.finished for phase in tracker.phases)
+    assert (tracker.errors, tracker.warnings) == (3 * 2, 3 * 10)  # Per target
+    assert tracker.result is False
+    assert tracker.fraction == 1.0 and tracker.eta is None
+    assert tracker.total_time == pytest.approx(3 * 12.34)
+
+
+def test_progress_and_eta_follow_the_phases():
+    tracker = ProgressTracker(expected_phases=3)
+    tracker.started = time.time() - 30
+    assert tracker.fraction == 0.0 and tracker.eta is None
+
+    tracker.feed('Running: UnrealBuildTool.sh UnrealEditor Linux Development -Project=H.uproject')
+    tracker.feed("Building 100 actions with 8 processes...")
+    tracker.feed("[50/100] Compile Module.P.cpp")
+    assert tracker.fraction == pytest.approx(0.5 / 3)
+    assert tracker.eta == pytest.approx(30 * 5, rel=0.01)  # A sixth done in 30s
+    assert tracker.summary().startswith("UnrealEditor Linux Development [50/100] 17% ETA 2m 30s")
+
+    tracker.feed('Running: UnrealBuildTool.sh UnrealGame Linux Shipping -Project=H.uproject')
+    assert tracker.phases[0].finished  # A new UBT run ends the previous one
+    assert tracker.current_phase.label == "UnrealGame Linux Shipping"
+    assert tracker.fraction == pytest.approx(1 / 3)
+
+    tracker.feed('Running: UnrealBuildTool.sh UnrealGame Linux Development -Project=H.uproject')
+    tracker.feed('Running: UnrealBuildTool.sh UnrealGame Android Development -Project=H.uproject')
+    assert tracker.fraction == pytest.approx(3 / 4)  # More phases than expected
+    tracker.feed("BUILD SUCCESSFUL")
+    assert tracker.fraction == 1.0
+
+
+def test_expected_phase_count():
+    assert expected_phase_count(["BuildPlugin"]) == 3
+    assert expected_phase_count(["BuildPlugin", "-TargetPlatforms=Win64+Android"]) == 5
+    assert expected_phase_count(["BuildPlugin", "-TargetPlatforms=Win64", "-NoHostPlatform"]) == 2
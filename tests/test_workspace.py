@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from plugin_rebuilder import workspace as workspace_module
+from plugin_rebuilder.build_queue import CANCELLED
+from plugin_rebuilder.simulator import create_fake_engine, create_fake_plugin
+from plugin_rebuilder.workspace import Workspace, WorkspaceBuildJob, WorkspaceSettings
+
+
+def test_reuse_is_measured_against_the_biggest_build(tmp_path):
+    workspace = Workspace(str(tmp_path / "P" / "P.uplugin"), str(tmp_path / "UE_5.4"), "Linux", str(tmp_path / "ws"))
+    assert workspace.hit_rate() is None
+    assert workspace.record("UnrealEditor Linux Development", 100) is None  # First build
+    assert workspace.hit_rate() is None
+    assert workspace.record("UnrealEditor Linux Development", 10) == pytest.approx(0.9)
+    assert workspace.record("UnrealEditor Linux Development", 0) == 1.0
+    # Two incremental builds that could have compiled 200 files compiled 10
+    assert workspace.hit_rate() == pytest.approx(0.95)
+
+    assert workspace.record("UnrealGame Linux Shipping", 50) is None
+    assert workspace.record("UnrealGame Linux Shipping", 50) == 0.0
+    assert workspace.hit_rate() == pytest.approx(190 / 250)
+    entry = workspace.state["targets"]["UnrealEditor Linux Development"]
+    assert (entry["full"], entry["builds"], entry["compiled"], entry["last_compiled"]) == (100, 3, 110, 0)
+
+
+def test_cancel_while_waiting_for_the_workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace_module, "WORKSPACE_LOCK_POLL", 0.05)
+    engine = create_fake_engine(str(tmp_path / "UE_5.4"))
+    plugin = create_fake_plugin(str(tmp_path / "src"))
+    job = WorkspaceBuildJob(plugin, engine, str(tmp_path / "out"), WorkspaceSettings(str(tmp_path / "ws")))
+    with job.workspace.lock():  # Another build holds the workspace
+        thread = threading.Thread(target=job.run)
+        thread.start()
+        deadline = time.time() + 5
+        while not any(line.startswith("Waiting for another build") for line in job.log.snapshot()):
+            assert time.time() < deadline, "timed out"
+            time.sleep(0.01)
+        job.cancel()
+        thread.join(5)
+        assert not thread.is_alive()
+    assert job.status == CANCELLED